@@ -6,6 +6,7 @@ from django.db.models import Q, F
 from django.core.paginator import Paginator
 from inventory.models import Branch, Category, InventoryRecord, StockTransaction
 from inventory.utils import generate_branch_qr
+from inventory.summary import get_inventory_summary, summarize_inventory
 
 @login_required
 def branch_list(request):
@@ -192,17 +193,11 @@ def branch_stock_view(request, branch_id):
     elif stock_status == 'in':
         inventory = inventory.filter(quantity__gte=F('safety_stock'))
     
-    # Calculate statistics
-    total_items = inventory.count()
-    out_of_stock = inventory.filter(quantity=0).count()
-    low_stock = inventory.filter(quantity__lt=F('safety_stock'), quantity__gt=0).count()
-    in_stock = inventory.filter(quantity__gte=F('safety_stock')).count()
-    
-    # Calculate total value (quantity * price)
-    total_value = sum(
-        item.quantity * item.sku.price 
-        for item in inventory
-    )
+    # Calculate statistics (cached for the unfiltered branch, one query otherwise)
+    if search_query or category_id or stock_status:
+        summary = summarize_inventory(inventory)
+    else:
+        summary = get_inventory_summary(branch)
     
     # Pagination
     paginator = Paginator(inventory, 20)
@@ -224,11 +219,11 @@ def branch_stock_view(request, branch_id):
         'search_query': search_query,
         'selected_category': category_id,
         'selected_status': stock_status,
-        'total_items': total_items,
-        'out_of_stock': out_of_stock,
-        'low_stock': low_stock,
-        'in_stock': in_stock,
-        'total_value': total_value,
+        'total_items': summary['total_items'],
+        'out_of_stock': summary['out_of_stock'],
+        'low_stock': summary['low_stock'],
+        'in_stock': summary['in_stock'],
+        'total_value': summary['stock_value'],
         'recent_transactions': recent_txns,
     }
     
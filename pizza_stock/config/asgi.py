@@ -2,6 +2,10 @@
 ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve the site through it (e.g. ``uvicorn config.asgi:application``) for
+the live order streams (orders.views.order_events and
+order_status_events), which hold a connection open per board; under WSGI
+those endpoints answer 204 and pages fall back to reloading.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -109,6 +109,17 @@ AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.NumericPasswordValidator"},
 ]
 
+# Cache (local memory by default; point CACHE_BACKEND/CACHE_LOCATION at
+# django.core.cache.backends.redis.RedisCache and a redis:// URL in production)
+CACHES = {
+    "default": {
+        "BACKEND": config(
+            "CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": config("CACHE_LOCATION", default="pizza-stock"),
+    }
+}
+
 # Internationalization
 LANGUAGE_CODE = "en-us"
 TIME_ZONE = "Asia/Manila"
@@ -147,10 +158,25 @@ LOGOUT_REDIRECT_URL = "users:login"
 SESSION_COOKIE_AGE = 86400  # 24 hours
 SESSION_SAVE_EVERY_REQUEST = True
 
+# Processes used by the nightly forecast (0 = one per CPU, 1 = serial)
+FORECAST_WORKERS = config("FORECAST_WORKERS", default=0, cast=int)
+
+# Reorder suggestions: days from ordering to receiving stock, and days
+# between ordering opportunities
+REORDER_LEAD_TIME_DAYS = config("REORDER_LEAD_TIME_DAYS", default=2, cast=int)
+REORDER_REVIEW_DAYS = config("REORDER_REVIEW_DAYS", default=1, cast=int)
+
+# Live order events (orders.events): in-process by default, which only
+# reaches boards served by the same ASGI process; set a redis:// URL to
+# share events between processes
+ORDER_EVENTS_REDIS_URL = config("ORDER_EVENTS_REDIS_URL", default="")
+
 # Cronjobs
 CRONJOBS = [
     ("0 1 * * *", "sales.tasks.aggregate_sales_daily"),
-    ("0 2 * * *", "forecast.tasks.run_forecast"),
+    ("*/15 * * * *", "sales.tasks.aggregate_sales_incremental_task"),
+    ("30 1 * * *", "forecast.tasks.update_forecast_actuals"),
+    ("0 2 * * *", "django.core.management.call_command", ["run_forecast"]),
     ("0 */6 * * *", "inventory.tasks.send_low_stock_alerts"),
     ("0 3 * * *", "orders.tasks.auto_close_unpaid_orders"),
 ]
@@ -1,9 +1,9 @@
 from django.contrib import admin
-from .models import Forecast
+from .models import Forecast, ForecastAccuracy, ForecastHorizon
 
 @admin.register(Forecast)
 class ForecastAdmin(admin.ModelAdmin):
-    list_display = ['forecast_date', 'branch', 'sku', 'predicted_quantity', 'actual_quantity', 'accuracy_display', 'confidence_level']
+    list_display = ['forecast_date', 'branch', 'sku', 'predicted_quantity', 'actual_quantity', 'absolute_error', 'accuracy_display', 'confidence_level']
     list_filter = ['branch', 'forecast_date']
     search_fields = ['sku__name', 'branch__name']
     readonly_fields = ['created_at', 'updated_at']
@@ -14,4 +14,21 @@ class ForecastAdmin(admin.ModelAdmin):
         if acc is None:
             return '-'
         return f"{acc}%"
-    accuracy_display.short_description = 'Accuracy'
\ No newline at end of file
+    accuracy_display.short_description = 'Accuracy'
+
+
+@admin.register(ForecastHorizon)
+class ForecastHorizonAdmin(admin.ModelAdmin):
+    list_display = ['origin_date', 'branch', 'sku', 'start_date', 'horizon', 'method']
+    list_filter = ['branch', 'method', 'origin_date']
+    search_fields = ['sku__name', 'branch__name']
+    readonly_fields = ['created_at', 'updated_at']
+    date_hierarchy = 'origin_date'
+
+
+@admin.register(ForecastAccuracy)
+class ForecastAccuracyAdmin(admin.ModelAdmin):
+    list_display = ['branch', 'sku', 'window_start', 'window_end', 'forecast_count', 'avg_accuracy', 'wape']
+    list_filter = ['branch']
+    search_fields = ['sku__name', 'branch__name']
+    readonly_fields = ['updated_at']
@@ -0,0 +1,124 @@
+"""
+Rolling-origin backtesting of the registered forecasting methods.
+
+The history is replayed from a series of forecast origins. At each origin
+every method forecasts every series at once from the days before it, and
+the errors against what was actually sold are accumulated per series, so
+a year of history costs one pass per origin rather than one per series.
+"""
+
+import numpy as np
+
+from .methods import FORECAST_METHODS, select_and_forecast
+
+AUTO_METHOD = 'auto'  # Per-series selection, as used by the nightly run
+
+
+def empty_totals(series):
+    """Zeroed error accumulators for `series` series"""
+    return {
+        'abs_error': np.zeros(series),
+        'error': np.zeros(series),
+        'actual': np.zeros(series),
+        'ape': np.zeros(series),
+        'ape_count': np.zeros(series, dtype=np.int64),
+        'points': np.zeros(series, dtype=np.int64),
+    }
+
+
+def accumulate(totals, predicted, actual):
+    """Add the errors of one origin's forecasts (series, horizon) to the totals"""
+    error = predicted - actual
+    sold = actual > 0
+    totals['abs_error'] += np.abs(error).sum(axis=1)
+    totals['error'] += error.sum(axis=1)
+    totals['actual'] += actual.sum(axis=1)
+    totals['ape'] += np.divide(np.abs(error), actual, out=np.zeros_like(error), where=sold).sum(axis=1)
+    totals['ape_count'] += sold.sum(axis=1)
+    totals['points'] += actual.shape[1]
+
+
+def rolling_origin_backtest(demand, origins, lookback=56, horizon=7, gap=1, methods=None,
+                            include_auto=True):
+    """
+    Replay every method over a set of forecast origins.
+
+    At origin `o` the history is demand[:, o - gap - lookback:o - gap] and
+    the forecast for days o .. o + horizon - 1 is compared with demand.
+    `gap` mirrors the nightly run, which forecasts from yesterday because
+    today is still in progress.
+
+    Args:
+        demand: Array (series, days) of daily quantities
+        origins: Day indexes to forecast from
+        lookback: Days of history per origin
+        horizon: Days forecast per origin
+        gap: Unobserved days between the history and the origin
+        methods: Method names to evaluate (defaults to all registered)
+        include_auto: Also evaluate per-series method selection
+
+    Returns:
+        dict: {method name: totals (see empty_totals)}
+    """
+    names = list(methods or FORECAST_METHODS)
+    demand = demand.astype(float)
+    series, days = demand.shape
+
+    results = {name: empty_totals(series) for name in names}
+    if include_auto:
+        results[AUTO_METHOD] = empty_totals(series)
+
+    for origin in origins:
+        end = origin - gap
+        if end - lookback < 0 or origin + horizon > days:
+            raise ValueError(f"Origin {origin} needs {lookback + gap} days before and {horizon} after it")
+        history = demand[:, end - lookback:end]
+        actual = demand[:, origin:origin + horizon]
+
+        for name in names:
+            predicted = np.maximum(0, FORECAST_METHODS[name](history, horizon + gap))[:, gap:]
+            accumulate(results[name], predicted, actual)
+
+        if include_auto:
+            predicted, _, _ = select_and_forecast(history, horizon=horizon + gap, methods=names)
+            accumulate(results[AUTO_METHOD], predicted[:, gap:], actual)
+
+    return results
+
+
+def error_metrics(totals):
+    """
+    Accuracy metrics from accumulated totals (any shape).
+
+    MAPE only counts days with sales (it is undefined otherwise). WAPE and
+    bias are relative to total actual demand; positive bias means
+    over-forecasting.
+
+    Returns:
+        dict: Arrays 'mape', 'wape', 'bias' in percent (NaN where undefined)
+        and 'actual', 'points'
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        actual = totals['actual']
+        return {
+            'mape': np.where(totals['ape_count'] > 0, totals['ape'] / totals['ape_count'] * 100, np.nan),
+            'wape': np.where(actual > 0, totals['abs_error'] / actual * 100, np.nan),
+            'bias': np.where(actual > 0, totals['error'] / actual * 100, np.nan),
+            'actual': actual,
+            'points': totals['points'],
+        }
+
+
+def group_totals(totals, shape, axis):
+    """
+    Sum per-series totals over one axis of the (branches, skus) grid.
+
+    Args:
+        totals: Totals with arrays of length branches * skus
+        shape: (branches, skus)
+        axis: Axis to sum over (1 gives per branch, (0, 1) gives overall)
+
+    Returns:
+        dict: Totals with the summed arrays
+    """
+    return {key: values.reshape(shape).sum(axis=axis) for key, values in totals.items()}
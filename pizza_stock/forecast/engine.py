@@ -0,0 +1,561 @@
+"""
+Batched demand forecasting.
+
+History for every (branch, SKU) series is loaded with one query and pivoted
+into a dense NumPy array of shape (branches, skus, days) with zero-filled
+gaps. Forecasting methods (see forecast.methods) then work on the whole
+array at once and results are written back with a single bulk upsert, so
+a run costs a handful of queries no matter how many branches and SKUs
+there are.
+
+Each run stores tomorrow as a Forecast row (used for accuracy tracking) and
+the full horizon as one ForecastHorizon row per series, with the daily
+predictions and their prediction interval packed into JSON arrays (see
+forecast.services for reading them back).
+
+Fitting is CPU bound, so runs can be sharded by branch across a process
+pool. Each worker loads and forecasts its own branches with its own
+database connection and returns arrays; the parent does the single bulk
+write. FORECAST_WORKERS in settings sets the pool size.
+
+Once a day has been aggregated, reconcile_actuals copies what was actually
+sold onto its forecasts with set-based UPDATEs, stores each forecast's
+error and accuracy, and refreshes the rolling ForecastAccuracy summary.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.db.models import (
+    Avg, Case, Count, DecimalField, F, FloatField, OuterRef, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Abs, Cast, Coalesce, Greatest, Round
+from django.utils import timezone
+
+from inventory.models import Branch, SKU
+from sales.models import DailySales
+from .models import Forecast, ForecastAccuracy, ForecastHorizon
+from .methods import get_method, select_and_forecast
+
+DEFAULT_HORIZON = 14  # Days
+INTERVAL_Z = {80: 1.2816, 90: 1.6449, 95: 1.9600}  # Two-sided normal quantiles
+ACCURACY_WINDOW_DAYS = 30
+
+
+def load_demand(start_date, end_date, branch_ids=None, sku_ids=None):
+    """
+    Load daily demand for a date range as a dense array.
+
+    Args:
+        start_date: First day of history (date)
+        end_date: Day after the last day of history (date, exclusive)
+        branch_ids: Branch ids to include (defaults to all active branches)
+        sku_ids: SKU ids to include (defaults to all active SKUs)
+
+    Returns:
+        tuple: (branch_ids, sku_ids, demand) where demand is an int array of
+        shape (len(branch_ids), len(sku_ids), days) and days with no
+        DailySales row are 0
+    """
+    if branch_ids is None:
+        branch_ids = list(Branch.objects.filter(is_active=True).order_by('id').values_list('id', flat=True))
+    if sku_ids is None:
+        sku_ids = list(SKU.objects.filter(is_active=True).order_by('id').values_list('id', flat=True))
+
+    days = (end_date - start_date).days
+    demand = np.zeros((len(branch_ids), len(sku_ids), days), dtype=np.int64)
+    if not branch_ids or not sku_ids or days <= 0:
+        return branch_ids, sku_ids, demand
+
+    rows = DailySales.objects.filter(
+        branch_id__in=branch_ids,
+        sku_id__in=sku_ids,
+        date__gte=start_date,
+        date__lt=end_date
+    ).values_list('branch_id', 'sku_id', 'date', 'total_quantity')
+
+    rows = list(rows)
+    if rows:
+        branch_index = {branch_id: i for i, branch_id in enumerate(branch_ids)}
+        sku_index = {sku_id: i for i, sku_id in enumerate(sku_ids)}
+        b, s, d, q = zip(*rows)
+        demand[
+            [branch_index[branch_id] for branch_id in b],
+            [sku_index[sku_id] for sku_id in s],
+            [(date - start_date).days for date in d],
+        ] = q
+
+    return branch_ids, sku_ids, demand
+
+
+def data_confidence(demand, window=7):
+    """Confidence (0-100) from how many of the last `window` days had sales"""
+    days_with_sales = np.count_nonzero(demand[..., -window:], axis=-1)
+    return np.minimum(100.0, days_with_sales / window * 100)
+
+
+def write_forecasts(branch_ids, sku_ids, forecast_date, predicted, confidence, method):
+    """
+    Upsert one forecast per (branch, SKU) with a single bulk statement.
+
+    Args:
+        branch_ids: Branch ids along axis 0
+        sku_ids: SKU ids along axis 1
+        forecast_date: Date being forecast
+        predicted: Array (branches, skus) of predicted quantities
+        confidence: Array (branches, skus) of confidence levels
+        method: Method name, or array (branches, skus) of method names
+
+    Returns:
+        int: Number of Forecast rows written
+    """
+    methods = np.broadcast_to(np.asarray(method, dtype=object), predicted.shape)
+
+    rows = [
+        Forecast(
+            branch_id=branch_id,
+            sku_id=sku_id,
+            forecast_date=forecast_date,
+            predicted_quantity=int(predicted[i, j]),
+            confidence_level=round(float(confidence[i, j]), 2),
+            method=methods[i, j],
+        )
+        for i, branch_id in enumerate(branch_ids)
+        for j, sku_id in enumerate(sku_ids)
+    ]
+
+    Forecast.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['branch', 'sku', 'forecast_date'],
+        update_fields=['predicted_quantity', 'confidence_level', 'method', 'updated_at'],
+    )
+
+    return len(rows)
+
+
+def prediction_intervals(predictions, scale, first_step, level=90):
+    """
+    Normal prediction interval around each prediction.
+
+    The one-step error scale widens with the square root of the number of
+    days ahead of the last observed day.
+
+    Args:
+        predictions: Array (series, horizon)
+        scale: Array (series,) of one-step error scale
+        first_step: Steps ahead of the history for predictions[:, 0]
+        level: Interval level in percent (80, 90 or 95)
+
+    Returns:
+        tuple: (lower, upper) arrays (series, horizon), lower clipped at 0
+    """
+    if level not in INTERVAL_Z:
+        raise ValueError(f"Unsupported interval level {level}. Available: {', '.join(map(str, INTERVAL_Z))}")
+    steps = np.arange(first_step, first_step + predictions.shape[1])
+    width = INTERVAL_Z[level] * scale[:, None] * np.sqrt(steps)[None, :]
+    return np.maximum(0, predictions - width), predictions + width
+
+
+def write_horizons(branch_ids, sku_ids, origin_date, start_date, predictions, lower, upper, method,
+                   interval_level=90):
+    """
+    Upsert one ForecastHorizon per (branch, SKU) with a single bulk statement.
+
+    Args:
+        branch_ids: Branch ids along axis 0
+        sku_ids: SKU ids along axis 1
+        origin_date: Day the run was made for
+        start_date: First forecast day
+        predictions: Array (branches, skus, horizon) of predicted quantities
+        lower: Array (branches, skus, horizon) of lower interval bounds
+        upper: Array (branches, skus, horizon) of upper interval bounds
+        method: Method name, or array (branches, skus) of method names
+        interval_level: Interval level in percent
+
+    Returns:
+        int: Number of ForecastHorizon rows written
+    """
+    methods = np.broadcast_to(np.asarray(method, dtype=object), predictions.shape[:2])
+    horizon = predictions.shape[2]
+    predictions = np.round(predictions, 1).tolist()
+    lower = np.round(lower, 1).tolist()
+    upper = np.round(upper, 1).tolist()
+
+    rows = [
+        ForecastHorizon(
+            branch_id=branch_id,
+            sku_id=sku_id,
+            origin_date=origin_date,
+            start_date=start_date,
+            horizon=horizon,
+            predictions=predictions[i][j],
+            lower=lower[i][j],
+            upper=upper[i][j],
+            interval_level=interval_level,
+            method=methods[i, j],
+        )
+        for i, branch_id in enumerate(branch_ids)
+        for j, sku_id in enumerate(sku_ids)
+    ]
+
+    ForecastHorizon.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['branch', 'sku', 'origin_date'],
+        update_fields=[
+            'start_date', 'horizon', 'predictions', 'lower', 'upper',
+            'interval_level', 'method', 'updated_at',
+        ],
+    )
+
+    return len(rows)
+
+
+def forecast_shard(branch_ids, sku_ids, today, lookback_days=56, method=None,
+                   horizon=DEFAULT_HORIZON, interval_level=90):
+    """
+    Load history for some branches and forecast them, without writing.
+
+    Args:
+        branch_ids: Branch ids to forecast
+        sku_ids: SKU ids to forecast (the same list for every shard)
+        today: Forecast origin
+        lookback_days: Days of history to load
+        method: Registered method name to use for every series (optional)
+        horizon: Days to forecast, starting tomorrow
+        interval_level: Prediction interval level in percent (80, 90 or 95)
+
+    Returns:
+        dict: Arrays 'predictions', 'lower', 'upper' (branches, skus, horizon)
+        and 'methods', 'confidence' (branches, skus), plus 'timings' with
+        the seconds spent on 'load' and 'fit'
+    """
+    started = time.perf_counter()
+    branch_ids, sku_ids, demand = load_demand(
+        today - timedelta(days=lookback_days), today, branch_ids=branch_ids, sku_ids=sku_ids
+    )
+    loaded = time.perf_counter()
+    shape = demand.shape[:2]
+    history = demand.reshape(-1, demand.shape[-1])
+
+    # History ends yesterday (today is still in progress), so tomorrow is
+    # two steps ahead and step one is dropped
+    predictions, methods, scale = select_and_forecast(
+        history, horizon=horizon + 1, methods=[get_method(method).method_name] if method else None
+    )
+    predictions = predictions[:, 1:]
+    lower, upper = prediction_intervals(predictions, scale, first_step=2, level=interval_level)
+    confidence = data_confidence(demand)
+
+    return {
+        'predictions': predictions.reshape(*shape, horizon),
+        'lower': lower.reshape(*shape, horizon),
+        'upper': upper.reshape(*shape, horizon),
+        'methods': methods.reshape(shape),
+        'confidence': confidence,
+        'timings': {'load': loaded - started, 'fit': time.perf_counter() - loaded},
+    }
+
+
+def get_forecast_workers(workers=None):
+    """
+    Resolve how many processes a forecast run may use.
+
+    Args:
+        workers: Requested count (defaults to settings.FORECAST_WORKERS;
+            0 means one per CPU)
+
+    Returns:
+        int: Worker count, at least 1 and at most the number of CPUs
+    """
+    if workers is None:
+        workers = getattr(settings, 'FORECAST_WORKERS', 0)
+    cpus = os.cpu_count() or 1
+    if workers <= 0:
+        workers = cpus
+    return max(1, min(workers, cpus))
+
+
+def _init_worker():
+    """Process pool initializer: set up Django and never reuse the parent's connections"""
+    import django
+    django.setup()
+    for conn in connections.all(initialized_only=True):
+        conn.close()
+
+
+def _run_shard(kwargs):
+    return forecast_shard(**kwargs)
+
+
+def run_shards(branch_ids, sku_ids, workers=1, **options):
+    """
+    Forecast branches in shards, in parallel when more than one worker is available.
+
+    Runs serially with one worker, one branch, or inside a transaction
+    (worker processes could not see uncommitted rows).
+
+    Args:
+        branch_ids: Branch ids to forecast
+        sku_ids: SKU ids to forecast
+        workers: Maximum number of processes
+        **options: Passed to forecast_shard (today, lookback_days, method,
+            horizon, interval_level)
+
+    Returns:
+        dict: Same arrays as forecast_shard, for all branches in order, with
+        'timings' summed over shards (CPU seconds when run in parallel)
+    """
+    shards = [
+        list(chunk) for chunk in np.array_split(np.asarray(branch_ids, dtype=np.int64), workers)
+        if len(chunk)
+    ]
+
+    if len(shards) <= 1 or connection.in_atomic_block:
+        return forecast_shard(branch_ids, sku_ids, **options)
+
+    # Forked workers must not share the parent's open connections
+    connections.close_all()
+    jobs = [
+        {'branch_ids': [int(branch_id) for branch_id in shard], 'sku_ids': sku_ids, **options}
+        for shard in shards
+    ]
+    with ProcessPoolExecutor(max_workers=len(shards), initializer=_init_worker) as pool:
+        results = list(pool.map(_run_shard, jobs))
+
+    merged = {
+        key: np.concatenate([result[key] for result in results], axis=0)
+        for key in results[0] if key != 'timings'
+    }
+    merged['timings'] = {
+        phase: sum(result['timings'][phase] for result in results)
+        for phase in results[0]['timings']
+    }
+    return merged
+
+
+def run_batch_forecast(today=None, lookback_days=56, method=None, horizon=DEFAULT_HORIZON,
+                       interval_level=90, workers=None, branch_ids=None, dry_run=False):
+    """
+    Forecast the next `horizon` days of demand for every active branch x active SKU.
+
+    Unless a method is forced, each series gets the registered method with
+    the lowest error over the last week of its history (see
+    forecast.methods.select_and_forecast).
+
+    Args:
+        today: Forecast origin (defaults to today in the configured TIME_ZONE)
+        lookback_days: Days of history to load
+        method: Registered method name to use for every series (optional)
+        horizon: Days to forecast, starting tomorrow
+        interval_level: Prediction interval level in percent (80, 90 or 95)
+        workers: Processes to shard branches across (see get_forecast_workers)
+        branch_ids: Only forecast these branches (defaults to all active)
+        dry_run: Forecast without writing anything
+
+    Returns:
+        dict: 'branch_ids', 'sku_ids', 'forecast_date', 'forecasts' and
+        'horizons' (rows written), 'result' (arrays from forecast_shard) and
+        'timings' in seconds for 'load', 'fit', 'write' and 'total'
+    """
+    if horizon < 1:
+        raise ValueError("Forecast horizon must be at least 1 day")
+    if method:
+        get_method(method)
+
+    started = time.perf_counter()
+    today = today or timezone.localdate()
+    tomorrow = today + timedelta(days=1)
+
+    branches = Branch.objects.filter(is_active=True)
+    if branch_ids is not None:
+        branches = branches.filter(id__in=branch_ids)
+    branch_ids = list(branches.order_by('id').values_list('id', flat=True))
+    sku_ids = list(SKU.objects.filter(is_active=True).order_by('id').values_list('id', flat=True))
+
+    result = run_shards(
+        branch_ids, sku_ids,
+        workers=get_forecast_workers(workers),
+        today=today,
+        lookback_days=lookback_days,
+        method=method,
+        horizon=horizon,
+        interval_level=interval_level,
+    )
+    timings = result.pop('timings')
+
+    written = {'forecasts': 0, 'horizons': 0}
+    write_started = time.perf_counter()
+    if not dry_run:
+        with transaction.atomic():
+            written['horizons'] = write_horizons(
+                branch_ids, sku_ids, today, tomorrow,
+                result['predictions'], result['lower'], result['upper'], result['methods'],
+                interval_level=interval_level,
+            )
+            predicted = np.rint(result['predictions'][:, :, 0]).astype(np.int64)
+            written['forecasts'] = write_forecasts(
+                branch_ids, sku_ids, tomorrow, predicted, result['confidence'], result['methods']
+            )
+    finished = time.perf_counter()
+
+    timings['write'] = finished - write_started
+    timings['total'] = finished - started
+
+    return {
+        'branch_ids': branch_ids,
+        'sku_ids': sku_ids,
+        'forecast_date': tomorrow,
+        'result': result,
+        'timings': timings,
+        **written,
+    }
+
+
+def reconcile_actuals(start_date, end_date=None, branch=None):
+    """
+    Fill Forecast.actual_quantity from DailySales for a range of days.
+
+    Runs as a single UPDATE with a correlated subquery, and days without a
+    DailySales row count as 0 sold. Rows that already have actuals are
+    overwritten, so rerunning after re-aggregating sales backfills them.
+    Error and accuracy fields are then recomputed for the range (see
+    score_forecasts) and the rolling summary refreshed.
+
+    Args:
+        start_date: First forecast date (date)
+        end_date: Last forecast date, inclusive (defaults to start_date)
+        branch: Only reconcile this branch (optional)
+
+    Returns:
+        int: Number of Forecast rows updated
+    """
+    end_date = end_date or start_date
+    if end_date < start_date:
+        raise ValueError("end_date must not be before start_date")
+
+    actual = DailySales.objects.filter(
+        branch_id=OuterRef('branch_id'),
+        sku_id=OuterRef('sku_id'),
+        date=OuterRef('forecast_date')
+    ).values('total_quantity')[:1]
+
+    forecasts = Forecast.objects.filter(forecast_date__gte=start_date, forecast_date__lte=end_date)
+    if branch is not None:
+        forecasts = forecasts.filter(branch=branch)
+
+    updated = forecasts.update(
+        actual_quantity=Coalesce(Subquery(actual), Value(0)),
+        updated_at=timezone.now(),
+    )
+
+    score_forecasts(forecasts)
+    refresh_accuracy_summary(branch=branch)
+
+    return updated
+
+
+def score_forecasts(forecasts):
+    """
+    Store absolute error, percentage error and accuracy on forecasts with actuals.
+
+    Accuracy follows Forecast.accuracy(): 100 minus the error as a
+    percentage of the prediction, floored at 0, with 100 when both are 0.
+    Percentage error is relative to the actual and left empty when nothing
+    sold.
+
+    Args:
+        forecasts: Forecast queryset to score
+
+    Returns:
+        int: Number of Forecast rows updated
+    """
+    error = Abs(F('predicted_quantity') - F('actual_quantity'))
+    error_pct = Cast(error, FloatField()) * 100
+
+    return forecasts.filter(actual_quantity__isnull=False).update(
+        absolute_error=error,
+        percentage_error=Case(
+            When(actual_quantity__gt=0, then=Round(error_pct / F('actual_quantity'), 2)),
+            default=None,
+            output_field=DecimalField(max_digits=9, decimal_places=2),
+        ),
+        accuracy_score=Case(
+            When(predicted_quantity=0, actual_quantity=0, then=Value(100.0)),
+            When(predicted_quantity=0, then=Value(0.0)),
+            default=Greatest(Value(0.0), Round(100 - error_pct / F('predicted_quantity'), 2)),
+            output_field=DecimalField(max_digits=5, decimal_places=2),
+        ),
+    )
+
+
+def refresh_accuracy_summary(window_end=None, window_days=ACCURACY_WINDOW_DAYS, branch=None):
+    """
+    Rebuild the rolling ForecastAccuracy rows from stored forecast errors.
+
+    One GROUP BY over the window's scored forecasts feeds one bulk upsert;
+    summary rows for SKUs with no scored forecast in the window are removed.
+
+    Args:
+        window_end: Last day of the window (defaults to yesterday)
+        window_days: Window length in days
+        branch: Only refresh this branch (optional)
+
+    Returns:
+        int: Number of ForecastAccuracy rows written
+    """
+    window_end = window_end or timezone.localdate() - timedelta(days=1)
+    window_start = window_end - timedelta(days=window_days - 1)
+
+    forecasts = Forecast.objects.filter(
+        forecast_date__gte=window_start,
+        forecast_date__lte=window_end,
+        accuracy_score__isnull=False
+    )
+    summaries = ForecastAccuracy.objects.all()
+    if branch is not None:
+        forecasts = forecasts.filter(branch=branch)
+        summaries = summaries.filter(branch=branch)
+
+    rows = forecasts.values('branch_id', 'sku_id').annotate(
+        count=Count('id'),
+        predicted=Sum('predicted_quantity'),
+        actual=Sum('actual_quantity'),
+        error=Sum('absolute_error'),
+        accuracy=Avg('accuracy_score'),
+    )
+
+    summary = [
+        ForecastAccuracy(
+            branch_id=row['branch_id'],
+            sku_id=row['sku_id'],
+            window_start=window_start,
+            window_end=window_end,
+            forecast_count=row['count'],
+            total_predicted=row['predicted'],
+            total_actual=row['actual'],
+            total_absolute_error=row['error'],
+            avg_accuracy=round(row['accuracy'], 2),
+            wape=round(row['error'] / row['actual'] * 100, 2) if row['actual'] else None,
+        )
+        for row in rows
+    ]
+
+    ForecastAccuracy.objects.bulk_create(
+        summary,
+        update_conflicts=True,
+        unique_fields=['branch', 'sku'],
+        update_fields=[
+            'window_start', 'window_end', 'forecast_count', 'total_predicted',
+            'total_actual', 'total_absolute_error', 'avg_accuracy', 'wape', 'updated_at',
+        ],
+    )
+    summaries.exclude(window_start=window_start, window_end=window_end).delete()
+
+    return len(summary)
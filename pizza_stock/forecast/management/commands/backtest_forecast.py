@@ -0,0 +1,137 @@
+import csv
+import time
+from datetime import date, timedelta
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from inventory.models import Branch, SKU
+from forecast.backtest import error_metrics, group_totals, rolling_origin_backtest
+from forecast.engine import load_demand
+from forecast.methods import get_method
+
+
+def _format(value):
+    return '-' if np.isnan(value) else f"{value:.1f}"
+
+
+class Command(BaseCommand):
+    help = "Backtest every forecasting method over historical DailySales with a rolling origin"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=date.fromisoformat, help='First day evaluated (YYYY-MM-DD, default --end minus 365 days)')
+        parser.add_argument('--end', type=date.fromisoformat, help='Last day evaluated, inclusive (YYYY-MM-DD, default yesterday)')
+        parser.add_argument('--horizon', type=int, default=7, help='Days forecast from each origin')
+        parser.add_argument('--step', type=int, default=7, help='Days between origins')
+        parser.add_argument('--lookback', type=int, default=56, help='Days of history per origin')
+        parser.add_argument('--models', help='Comma-separated method names (default all registered)')
+        parser.add_argument('--branches', help='Comma-separated branch codes (default all active)')
+        parser.add_argument('--csv', help='Write per branch/SKU/model metrics to this CSV file')
+        parser.add_argument('--detail', action='store_true', help='Also print per branch/SKU/model metrics')
+
+    def handle(self, *args, **options):
+        end = options['end'] or timezone.localdate() - timedelta(days=1)
+        start = options['start'] or end - timedelta(days=365)
+        horizon, step, lookback = options['horizon'], options['step'], options['lookback']
+        if end < start:
+            raise CommandError('--end must not be before --start.')
+        if horizon < 1 or step < 1 or lookback < 1:
+            raise CommandError('--horizon, --step and --lookback must be positive.')
+
+        methods = None
+        if options['models']:
+            try:
+                methods = [get_method(name.strip()).method_name for name in options['models'].split(',')]
+            except ValueError as e:
+                raise CommandError(str(e))
+
+        branches = Branch.objects.filter(is_active=True).order_by('id')
+        if options['branches']:
+            codes = [code.strip() for code in options['branches'].split(',')]
+            branches = branches.filter(code__in=codes)
+            missing = set(codes) - set(branches.values_list('code', flat=True))
+            if missing:
+                raise CommandError(f"Unknown branch codes: {', '.join(sorted(missing))}")
+        branch_codes = dict(branches.values_list('id', 'code'))
+        sku_names = dict(SKU.objects.filter(is_active=True).order_by('id').values_list('id', 'name'))
+
+        # One unobserved day (today) sits between history and origin, as in the nightly run
+        gap = 1
+        history_start = start - timedelta(days=lookback + gap)
+        days = (end - start).days + 1
+        if days < horizon:
+            raise CommandError('The evaluated range is shorter than --horizon.')
+
+        started = time.perf_counter()
+        branch_ids, sku_ids, demand = load_demand(
+            history_start, end + timedelta(days=1),
+            branch_ids=list(branch_codes), sku_ids=list(sku_names),
+        )
+        loaded = time.perf_counter()
+
+        offset = lookback + gap
+        origins = range(offset, offset + days - horizon + 1, step)
+        shape = demand.shape[:2]
+        results = rolling_origin_backtest(
+            demand.reshape(-1, demand.shape[-1]), origins,
+            lookback=lookback, horizon=horizon, gap=gap, methods=methods,
+        )
+        finished = time.perf_counter()
+
+        self.stdout.write(
+            f"{len(branch_ids)} branches x {len(sku_ids)} SKUs, {len(origins)} origins "
+            f"from {start} to {end}, horizon {horizon} days "
+            f"(load {loaded - started:.2f}s, backtest {finished - loaded:.2f}s)"
+        )
+
+        self.stdout.write('\nOverall')
+        self._write_header('Model')
+        for name, totals in results.items():
+            self._write_row(name, error_metrics(group_totals(totals, shape, (0, 1))))
+
+        per_branch = {name: error_metrics(group_totals(totals, shape, 1)) for name, totals in results.items()}
+        for i, branch_id in enumerate(branch_ids):
+            self.stdout.write(f"\nBranch {branch_codes[branch_id]}")
+            self._write_header('Model')
+            for name, metrics in per_branch.items():
+                self._write_row(name, {key: values[i] for key, values in metrics.items()})
+
+        detail = {name: error_metrics(totals) for name, totals in results.items()}
+        rows = (
+            (branch_codes[branch_id], sku_names[sku_id], name,
+             {key: values[i * len(sku_ids) + j] for key, values in metrics.items()})
+            for i, branch_id in enumerate(branch_ids)
+            for j, sku_id in enumerate(sku_ids)
+            for name, metrics in detail.items()
+        )
+
+        if options['detail'] or options['csv']:
+            rows = list(rows)
+
+        if options['detail']:
+            self.stdout.write('\nPer branch / SKU')
+            self._write_header('Branch / SKU / Model')
+            for code, sku_name, name, metrics in rows:
+                self._write_row(f"{code} / {sku_name} / {name}", metrics)
+
+        if options['csv']:
+            with open(options['csv'], 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['branch', 'sku', 'model', 'mape', 'wape', 'bias', 'actual', 'points'])
+                for code, sku_name, name, metrics in rows:
+                    writer.writerow([
+                        code, sku_name, name,
+                        *(_format(metrics[key]) for key in ('mape', 'wape', 'bias')),
+                        int(metrics['actual']), int(metrics['points']),
+                    ])
+            self.stdout.write(self.style.SUCCESS(f"\nWrote {len(rows)} rows to {options['csv']}"))
+
+    def _write_header(self, label):
+        self.stdout.write(f"{label:<40} {'MAPE %':>8} {'WAPE %':>8} {'Bias %':>8} {'Actual':>10}")
+
+    def _write_row(self, label, metrics):
+        self.stdout.write(
+            f"{label:<40} {_format(metrics['mape']):>8} {_format(metrics['wape']):>8} "
+            f"{_format(metrics['bias']):>8} {int(metrics['actual']):>10}"
+        )
@@ -0,0 +1,66 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.models import Branch
+from forecast.safety_stock import DEFAULT_SERVICE_LEVEL, apply_safety_stock, compute_safety_stock
+
+
+class Command(BaseCommand):
+    help = "Recompute safety stock from demand variability; shows old and new values and only writes with --apply"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--service-level', type=float, default=DEFAULT_SERVICE_LEVEL, help='Target chance of not running out per cycle (default 0.95)')
+        parser.add_argument('--lookback', type=int, default=56, help='Days of sales history to measure variability over')
+        parser.add_argument('--lead-time', type=int, help='Days from ordering to receiving stock (default REORDER_LEAD_TIME_DAYS setting)')
+        parser.add_argument('--review-days', type=int, help='Days until the next chance to order (default REORDER_REVIEW_DAYS setting)')
+        parser.add_argument('--min', type=int, default=0, help='Lowest safety stock to set')
+        parser.add_argument('--branches', help='Comma-separated branch codes (default all active)')
+        parser.add_argument('--csv', help='Write old and new values to this CSV file')
+        parser.add_argument('--apply', action='store_true', help='Write the new values (default is a preview)')
+
+    def handle(self, *args, **options):
+        if options['lookback'] < 2:
+            raise CommandError('--lookback must be at least 2 days.')
+
+        branch_ids = None
+        if options['branches']:
+            codes = [code.strip() for code in options['branches'].split(',')]
+            branches = dict(Branch.objects.filter(code__in=codes, is_active=True).values_list('code', 'id'))
+            missing = set(codes) - set(branches)
+            if missing:
+                raise CommandError(f"Unknown or inactive branch codes: {', '.join(sorted(missing))}")
+            branch_ids = list(branches.values())
+
+        try:
+            changes = compute_safety_stock(
+                service_level=options['service_level'],
+                lookback_days=options['lookback'],
+                branch_ids=branch_ids,
+                lead_time_days=options['lead_time'],
+                review_days=options['review_days'],
+                minimum=options['min'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        changed = [change for change in changes if change[3] != change[4]]
+
+        if options['csv']:
+            with open(options['csv'], 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['branch', 'sku', 'old', 'new', 'daily_std'])
+                for _, code, sku_name, old, new, std in changes:
+                    writer.writerow([code, sku_name, old, new, std])
+        else:
+            self.stdout.write(f"{'Branch':<10} {'Item':<30} {'Old':>6} {'New':>6} {'Daily std':>10}")
+            for _, code, sku_name, old, new, std in changed:
+                self.stdout.write(f"{code:<10} {sku_name[:30]:<30} {old:>6} {new:>6} {std:>10}")
+
+        summary = f"{len(changed)} of {len(changes)} records change"
+        if not options['apply']:
+            self.stdout.write(self.style.WARNING(f"{summary}. Preview only: rerun with --apply to write."))
+            return
+
+        updated = apply_safety_stock(changes)
+        self.stdout.write(self.style.SUCCESS(f"{summary}. Updated safety stock on {updated} records."))
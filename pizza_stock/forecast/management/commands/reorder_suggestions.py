@@ -0,0 +1,66 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.models import Branch
+from forecast.reorder import compute_reorder_plan, plan_rows
+
+
+class Command(BaseCommand):
+    help = "Suggest order quantities per branch and SKU from forecast demand over the lead time plus safety stock"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--branches', help='Comma-separated branch codes (default all active)')
+        parser.add_argument('--lead-time', type=int, help='Days from ordering to receiving stock (default REORDER_LEAD_TIME_DAYS setting)')
+        parser.add_argument('--review-days', type=int, help='Days until the next chance to order (default REORDER_REVIEW_DAYS setting)')
+        parser.add_argument('--all', action='store_true', help='Include items that do not need ordering')
+        parser.add_argument('--csv', help='Write the plan to this CSV file instead of printing it')
+
+    def handle(self, *args, **options):
+        branch_ids = None
+        if options['branches']:
+            codes = [code.strip() for code in options['branches'].split(',')]
+            branches = dict(Branch.objects.filter(code__in=codes, is_active=True).values_list('code', 'id'))
+            missing = set(codes) - set(branches)
+            if missing:
+                raise CommandError(f"Unknown or inactive branch codes: {', '.join(sorted(missing))}")
+            branch_ids = list(branches.values())
+
+        started = time.perf_counter()
+        try:
+            plan = compute_reorder_plan(branch_ids, options['lead_time'], options['review_days'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        rows = plan_rows(plan, only_orders=not options['all'])
+        elapsed = time.perf_counter() - started
+
+        columns = [
+            'branch_code', 'sku_name', 'quantity', 'safety_stock', 'lead_time_demand',
+            'reorder_point', 'order_up_to', 'suggested', 'has_forecast',
+        ]
+        if options['csv']:
+            with open(options['csv'], 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(columns)
+                for row in rows:
+                    writer.writerow([row[column] for column in columns])
+        else:
+            self.stdout.write(
+                f"{'Branch':<10} {'Item':<30} {'Stock':>7} {'Safety':>7} {'Lead dem.':>10} "
+                f"{'ROP':>6} {'Up to':>6} {'Order':>6}"
+            )
+            for row in rows:
+                self.stdout.write(
+                    f"{row['branch_code']:<10} {row['sku_name'][:30]:<30} {row['quantity']:>7} "
+                    f"{row['safety_stock']:>7} {row['lead_time_demand']:>10} {row['reorder_point']:>6} "
+                    f"{row['order_up_to']:>6} {row['suggested']:>6}"
+                    + ('' if row['has_forecast'] else '  (no forecast)')
+                )
+
+        ordering = int(plan['needs_order'].sum())
+        self.stdout.write(self.style.SUCCESS(
+            f"{ordering} of {len(plan['record_id'])} items need ordering "
+            f"(lead time {plan['lead_time_days']}d, review {plan['review_days']}d, {elapsed:.2f}s)"
+            + (f"; wrote {len(rows)} rows to {options['csv']}" if options['csv'] else '')
+        ))
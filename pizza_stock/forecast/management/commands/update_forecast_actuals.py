@@ -0,0 +1,32 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from inventory.models import Branch
+from forecast.engine import reconcile_actuals
+
+
+class Command(BaseCommand):
+    help = "Fill forecast actuals from DailySales for a date range (rerun after re-aggregating sales)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=date.fromisoformat, help='First forecast date (YYYY-MM-DD, default yesterday)')
+        parser.add_argument('--end', type=date.fromisoformat, help='Last forecast date, inclusive (YYYY-MM-DD, default --start)')
+        parser.add_argument('--branch', help='Only this branch code')
+
+    def handle(self, *args, **options):
+        start = options['start'] or timezone.localdate() - timedelta(days=1)
+        end = options['end'] or start
+        if end < start:
+            raise CommandError('--end must not be before --start.')
+
+        branch = None
+        if options['branch']:
+            branch = Branch.objects.filter(code=options['branch']).first()
+            if branch is None:
+                raise CommandError(f"Unknown branch code: {options['branch']}")
+
+        count = reconcile_actuals(start, end, branch=branch)
+
+        self.stdout.write(self.style.SUCCESS(f"Updated actuals on {count} forecasts"))
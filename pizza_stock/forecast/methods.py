@@ -0,0 +1,169 @@
+"""
+Registry of forecasting methods.
+
+Every method takes a float array of daily history with shape
+(series, days) and a horizon, and returns predictions with shape
+(series, horizon). Methods only loop over time, never over series, so one
+call forecasts every (branch, SKU) pair at once.
+"""
+
+import numpy as np
+
+SEASON_LENGTH = 7  # Weekly seasonality (days)
+
+FORECAST_METHODS = {}
+
+
+def register(name, label):
+    """Register a forecasting method under `name` (stored in Forecast.method)"""
+    def decorator(func):
+        func.method_name = name
+        func.label = label
+        FORECAST_METHODS[name] = func
+        return func
+    return decorator
+
+
+def get_method(name):
+    """Look up a registered method by name"""
+    try:
+        return FORECAST_METHODS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown forecast method '{name}'. Available: {', '.join(FORECAST_METHODS)}"
+        )
+
+
+@register('moving_average', 'Moving average (7 days)')
+def moving_average(history, horizon=1, window=7):
+    """Mean of the last `window` days, flat over the horizon"""
+    series, days = history.shape
+    if days == 0:
+        return np.zeros((series, horizon))
+    level = history[:, -window:].mean(axis=1)
+    return np.repeat(level[:, None], horizon, axis=1)
+
+
+@register('seasonal_naive', 'Seasonal naive (same weekday last week)')
+def seasonal_naive(history, horizon=1):
+    """Repeat the last observed week, so each day gets last week's same weekday"""
+    series, days = history.shape
+    if days < SEASON_LENGTH:
+        return moving_average(history, horizon)
+    steps = np.arange(horizon) % SEASON_LENGTH
+    return history[:, days - SEASON_LENGTH + steps]
+
+
+@register('ses', 'Simple exponential smoothing')
+def simple_exponential_smoothing(history, horizon=1, alpha=0.3):
+    """Exponentially weighted level, flat over the horizon"""
+    series, days = history.shape
+    if days == 0:
+        return np.zeros((series, horizon))
+    level = history[:, 0].astype(float)
+    for t in range(1, days):
+        level = alpha * history[:, t] + (1 - alpha) * level
+    return np.repeat(level[:, None], horizon, axis=1)
+
+
+@register('holt', "Holt's linear trend (damped)")
+def holt(history, horizon=1, alpha=0.3, beta=0.1, phi=0.9):
+    """Level plus a damped trend, so short-lived trends do not run away"""
+    series, days = history.shape
+    if days < 2:
+        return simple_exponential_smoothing(history, horizon)
+    level = history[:, 0].astype(float)
+    trend = (history[:, 1] - history[:, 0]).astype(float)
+    for t in range(1, days):
+        previous_level = level
+        level = alpha * history[:, t] + (1 - alpha) * (level + phi * trend)
+        trend = beta * (level - previous_level) + (1 - beta) * phi * trend
+    damping = np.cumsum(phi ** np.arange(1, horizon + 1))
+    return level[:, None] + damping[None, :] * trend[:, None]
+
+
+@register('holt_winters', 'Holt-Winters (additive weekly seasonality)')
+def holt_winters(history, horizon=1, alpha=0.3, beta=0.05, gamma=0.2, phi=0.9):
+    """Damped trend plus an additive day-of-week seasonal component"""
+    series, days = history.shape
+    if days < 2 * SEASON_LENGTH:
+        return holt(history, horizon)
+
+    first_week = history[:, :SEASON_LENGTH].astype(float)
+    second_week = history[:, SEASON_LENGTH:2 * SEASON_LENGTH].astype(float)
+    level = first_week.mean(axis=1)
+    trend = (second_week.mean(axis=1) - level) / SEASON_LENGTH
+    seasonal = first_week - level[:, None]
+
+    for t in range(SEASON_LENGTH, days):
+        s = t % SEASON_LENGTH
+        previous_level = level
+        level = alpha * (history[:, t] - seasonal[:, s]) + (1 - alpha) * (level + phi * trend)
+        trend = beta * (level - previous_level) + (1 - beta) * phi * trend
+        seasonal[:, s] = gamma * (history[:, t] - level) + (1 - gamma) * seasonal[:, s]
+
+    steps = np.arange(1, horizon + 1)
+    damping = np.cumsum(phi ** steps)
+    season_index = (days + steps - 1) % SEASON_LENGTH
+    return level[:, None] + damping[None, :] * trend[:, None] + seasonal[:, season_index]
+
+
+def backtest_errors(history, holdout=SEASON_LENGTH, methods=None):
+    """
+    Errors of each method over the last `holdout` days.
+
+    Each method is fitted on the history before the holdout and its
+    (non-negative) forecast compared with what actually sold.
+
+    Args:
+        history: Array (series, days)
+        holdout: Days held out at the end of the history
+        methods: Method names to evaluate (defaults to all registered)
+
+    Returns:
+        tuple: (method names, array (methods, series, holdout) of forecast
+        minus actual)
+    """
+    names = list(methods or FORECAST_METHODS)
+    train, actual = history[:, :-holdout], history[:, -holdout:]
+    residuals = np.stack([
+        np.maximum(0, FORECAST_METHODS[name](train, holdout)) - actual for name in names
+    ])
+    return names, residuals
+
+
+def select_and_forecast(history, horizon=1, holdout=SEASON_LENGTH, methods=None):
+    """
+    Pick the method with the lowest recent backtest error for each series and forecast.
+
+    Ties (e.g. series with no sales) go to the first method in registry order.
+    Series too short to hold out `holdout` days use the first method.
+
+    Args:
+        history: Array (series, days)
+        horizon: Days to forecast
+        holdout: Days held out for method selection
+        methods: Method names to choose from (defaults to all registered)
+
+    Returns:
+        tuple: (array (series, horizon) of non-negative predictions,
+        object array (series,) of chosen method names, array (series,) of
+        one-step error scale for prediction intervals)
+    """
+    names = list(methods or FORECAST_METHODS)
+    history = history.astype(float)
+    series, days = history.shape
+
+    if days > holdout + 1:
+        _, residuals = backtest_errors(history, holdout, names)
+        chosen = np.abs(residuals).mean(axis=2).argmin(axis=0)
+        chosen_residuals = np.take_along_axis(residuals, chosen[None, :, None], axis=0)[0]
+        scale = np.sqrt((chosen_residuals ** 2).mean(axis=1))
+    else:
+        chosen = np.zeros(series, dtype=int)
+        scale = history.std(axis=1) if days else np.zeros(series)
+
+    forecasts = np.stack([FORECAST_METHODS[name](history, horizon) for name in names])
+    predictions = np.take_along_axis(forecasts, chosen[None, :, None], axis=0)[0]
+
+    return np.maximum(0, predictions), np.asarray(names, dtype=object)[chosen], scale
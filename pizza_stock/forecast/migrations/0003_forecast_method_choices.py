@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:39
+
+from django.db import migrations, models
+
+# Method names written by the old moving-average cron job
+LEGACY_METHODS = {"moving_average_7day": "moving_average"}
+
+
+def rename_legacy_methods(apps, schema_editor):
+    Forecast = apps.get_model("forecast", "Forecast")
+    for old, new in LEGACY_METHODS.items():
+        Forecast.objects.filter(method=old).update(method=new)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("forecast", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(rename_legacy_methods, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="forecast",
+            name="method",
+            field=models.CharField(
+                choices=[
+                    ("moving_average", "Moving average (7 days)"),
+                    ("seasonal_naive", "Seasonal naive (same weekday last week)"),
+                    ("ses", "Simple exponential smoothing"),
+                    ("holt", "Holt's linear trend (damped)"),
+                    ("holt_winters", "Holt-Winters (additive weekly seasonality)"),
+                ],
+                default="moving_average",
+                max_length=50,
+            ),
+        ),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("forecast", "0003_forecast_method_choices"),
+        ("inventory", "0003_alter_sku_image"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ForecastHorizon",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("origin_date", models.DateField()),
+                ("start_date", models.DateField()),
+                ("horizon", models.PositiveSmallIntegerField()),
+                ("predictions", models.JSONField(default=list)),
+                ("lower", models.JSONField(default=list)),
+                ("upper", models.JSONField(default=list)),
+                ("interval_level", models.PositiveSmallIntegerField(default=90)),
+                (
+                    "method",
+                    models.CharField(
+                        choices=[
+                            ("moving_average", "Moving average (7 days)"),
+                            (
+                                "seasonal_naive",
+                                "Seasonal naive (same weekday last week)",
+                            ),
+                            ("ses", "Simple exponential smoothing"),
+                            ("holt", "Holt's linear trend (damped)"),
+                            (
+                                "holt_winters",
+                                "Holt-Winters (additive weekly seasonality)",
+                            ),
+                        ],
+                        default="moving_average",
+                        max_length=50,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "branch",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="forecast_horizons",
+                        to="inventory.branch",
+                    ),
+                ),
+                (
+                    "sku",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="forecast_horizons",
+                        to="inventory.sku",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-origin_date", "branch", "sku"],
+                "indexes": [
+                    models.Index(
+                        fields=["branch", "-origin_date"],
+                        name="forecast_fo_branch__4dcb66_idx",
+                    )
+                ],
+                "unique_together": {("branch", "sku", "origin_date")},
+            },
+        ),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("forecast", "0004_forecasthorizon"),
+        ("inventory", "0003_alter_sku_image"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="forecast",
+            name="absolute_error",
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="forecast",
+            name="accuracy_score",
+            field=models.DecimalField(
+                blank=True, decimal_places=2, max_digits=5, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="forecast",
+            name="percentage_error",
+            field=models.DecimalField(
+                blank=True, decimal_places=2, max_digits=9, null=True
+            ),
+        ),
+        migrations.CreateModel(
+            name="ForecastAccuracy",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("window_start", models.DateField()),
+                ("window_end", models.DateField()),
+                ("forecast_count", models.IntegerField(default=0)),
+                ("total_predicted", models.IntegerField(default=0)),
+                ("total_actual", models.IntegerField(default=0)),
+                ("total_absolute_error", models.IntegerField(default=0)),
+                (
+                    "avg_accuracy",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=5),
+                ),
+                (
+                    "wape",
+                    models.DecimalField(
+                        blank=True, decimal_places=2, max_digits=9, null=True
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "branch",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="forecast_accuracy",
+                        to="inventory.branch",
+                    ),
+                ),
+                (
+                    "sku",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="forecast_accuracy",
+                        to="inventory.sku",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Forecast accuracy",
+                "ordering": ["branch", "avg_accuracy"],
+                "unique_together": {("branch", "sku")},
+            },
+        ),
+    ]
@@ -1,14 +1,23 @@
 from django.db import models
 
+from .methods import FORECAST_METHODS
+
 class Forecast(models.Model):
     """Demand forecast per SKU per branch"""
+    # One choice per registered method, so a new method cannot be left out
+    METHOD_CHOICES = [(name, method.label) for name, method in FORECAST_METHODS.items()]
+    
     branch = models.ForeignKey('inventory.Branch', on_delete=models.CASCADE, related_name='forecasts')
     sku = models.ForeignKey('inventory.SKU', on_delete=models.CASCADE, related_name='forecasts')
     forecast_date = models.DateField()
     predicted_quantity = models.IntegerField(default=0)
     confidence_level = models.DecimalField(max_digits=5, decimal_places=2, default=0)  # 0-100
     actual_quantity = models.IntegerField(null=True, blank=True)
-    method = models.CharField(max_length=50, default='moving_average')
+    # Filled in with actual_quantity (see forecast.engine.reconcile_actuals)
+    absolute_error = models.IntegerField(null=True, blank=True)
+    percentage_error = models.DecimalField(max_digits=9, decimal_places=2, null=True, blank=True)  # Of actual
+    accuracy_score = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)  # 0-100
+    method = models.CharField(max_length=50, choices=METHOD_CHOICES, default='moving_average')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -27,6 +36,9 @@ class Forecast(models.Model):
         if self.actual_quantity is None:
             return None
         
+        if self.accuracy_score is not None:
+            return float(self.accuracy_score)
+        
         if self.predicted_quantity == 0 and self.actual_quantity == 0:
             return 100.0
         
@@ -35,4 +47,66 @@ class Forecast(models.Model):
         
         error = abs(self.predicted_quantity - self.actual_quantity)
         accuracy = max(0, 100 - (error / self.predicted_quantity * 100))
-        return round(accuracy, 2)
\ No newline at end of file
+        return round(accuracy, 2)
+
+
+class ForecastAccuracy(models.Model):
+    """Rolling forecast accuracy per SKU per branch, refreshed when actuals are reconciled"""
+    branch = models.ForeignKey('inventory.Branch', on_delete=models.CASCADE, related_name='forecast_accuracy')
+    sku = models.ForeignKey('inventory.SKU', on_delete=models.CASCADE, related_name='forecast_accuracy')
+    window_start = models.DateField()
+    window_end = models.DateField()
+    forecast_count = models.IntegerField(default=0)
+    total_predicted = models.IntegerField(default=0)
+    total_actual = models.IntegerField(default=0)
+    total_absolute_error = models.IntegerField(default=0)
+    avg_accuracy = models.DecimalField(max_digits=5, decimal_places=2, default=0)  # Mean accuracy_score
+    wape = models.DecimalField(max_digits=9, decimal_places=2, null=True, blank=True)  # Error % of actual
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['branch', 'sku']
+        ordering = ['branch', 'avg_accuracy']
+        verbose_name_plural = 'Forecast accuracy'
+    
+    def __str__(self):
+        return f"{self.branch.code} - {self.sku.name}: {self.avg_accuracy}%"
+    
+    def bias(self):
+        """Over (+) or under (-) forecast as a percentage of actual demand"""
+        if not self.total_actual:
+            return None
+        return round((self.total_predicted - self.total_actual) / self.total_actual * 100, 2)
+
+
+class ForecastHorizon(models.Model):
+    """Multi-day forecast per SKU per branch, packed into one row per run"""
+    branch = models.ForeignKey('inventory.Branch', on_delete=models.CASCADE, related_name='forecast_horizons')
+    sku = models.ForeignKey('inventory.SKU', on_delete=models.CASCADE, related_name='forecast_horizons')
+    origin_date = models.DateField()  # Day the run was made for
+    start_date = models.DateField()  # First forecast day
+    horizon = models.PositiveSmallIntegerField()
+    predictions = models.JSONField(default=list)  # One value per day from start_date
+    lower = models.JSONField(default=list)  # Prediction interval bounds
+    upper = models.JSONField(default=list)
+    interval_level = models.PositiveSmallIntegerField(default=90)  # Percent
+    method = models.CharField(max_length=50, choices=Forecast.METHOD_CHOICES, default='moving_average')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['branch', 'sku', 'origin_date']
+        ordering = ['-origin_date', 'branch', 'sku']
+        indexes = [
+            models.Index(fields=['branch', '-origin_date']),
+        ]
+    
+    def __str__(self):
+        return f"{self.origin_date} - {self.branch.code} - {self.sku.name}: {self.horizon} days"
+    
+    def days(self):
+        """Yield (date, predicted, lower, upper) for each day of the horizon"""
+        from datetime import timedelta
+        
+        for offset, (predicted, lower, upper) in enumerate(zip(self.predictions, self.lower, self.upper)):
+            yield self.start_date + timedelta(days=offset), predicted, lower, upper
@@ -0,0 +1,196 @@
+"""
+Forecast-driven reorder suggestions.
+
+For every inventory record the order-up-to level is the forecast demand
+over the lead time plus one review period, plus safety stock; an order is
+suggested when stock is at or below the reorder point (lead-time demand
+plus safety stock). Inventory and the latest multi-day forecasts are each
+read with one query and the whole plan is computed as NumPy arrays.
+"""
+
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+from django.utils import timezone
+
+from inventory.models import InventoryRecord
+from inventory.summary import get_stock_version
+from .models import ForecastHorizon
+from .services import latest_horizons
+
+REORDER_CACHE_KEY = 'reorder:{branch_id}:{origin}:{stock}:{lead_time}:{review}'
+REORDER_CACHE_TIMEOUT = 60 * 5  # 5 minutes
+
+
+def get_reorder_settings(lead_time_days=None, review_days=None):
+    """Lead time and review period in days, defaulting to settings"""
+    if lead_time_days is None:
+        lead_time_days = getattr(settings, 'REORDER_LEAD_TIME_DAYS', 2)
+    if review_days is None:
+        review_days = getattr(settings, 'REORDER_REVIEW_DAYS', 1)
+    if lead_time_days < 0 or review_days < 0:
+        raise ValueError("Lead time and review period must not be negative")
+    return lead_time_days, review_days
+
+
+def forecast_matrix(branch_ids=None, start_date=None, days=1):
+    """
+    Latest forecast demand per (branch, SKU) for `days` days from start_date.
+
+    Args:
+        branch_ids: Restrict to these branches (optional)
+        start_date: First day (defaults to tomorrow)
+        days: Number of days
+
+    Returns:
+        dict: {(branch_id, sku_id): array (days,)}; days outside a run's
+        horizon are 0
+    """
+    start_date = start_date or timezone.localdate() + timedelta(days=1)
+    horizons = latest_horizons()
+    if branch_ids is not None:
+        horizons = horizons.filter(branch_id__in=branch_ids)
+
+    matrix = {}
+    for branch_id, sku_id, first_day, predictions in horizons.values_list(
+        'branch_id', 'sku_id', 'start_date', 'predictions'
+    ):
+        offset = (start_date - first_day).days
+        skip, pad = max(offset, 0), max(-offset, 0)
+        values = predictions[skip:skip + days - pad]
+        row = np.zeros(days)
+        row[pad:pad + len(values)] = values
+        matrix[(branch_id, sku_id)] = row
+    return matrix
+
+
+def compute_reorder_plan(branch_ids=None, lead_time_days=None, review_days=None, start_date=None):
+    """
+    Compute reorder points and suggested order quantities for all inventory.
+
+    Args:
+        branch_ids: Restrict to these branches (defaults to all active)
+        lead_time_days: Days between ordering and receiving stock
+        review_days: Days until the next chance to order
+        start_date: First day of demand (defaults to tomorrow)
+
+    Returns:
+        dict: Per-record lists/arrays 'record_id', 'branch_id', 'branch_code',
+        'sku_id', 'sku_name', 'category_name', 'quantity', 'safety_stock',
+        'lead_time_demand', 'cover_demand', 'reorder_point', 'order_up_to',
+        'suggested', 'needs_order', 'has_forecast', plus the 'lead_time_days'
+        and 'review_days' used
+    """
+    lead_time_days, review_days = get_reorder_settings(lead_time_days, review_days)
+    cover_days = lead_time_days + review_days
+
+    records = InventoryRecord.objects.filter(branch__is_active=True, sku__is_active=True)
+    if branch_ids is not None:
+        records = records.filter(branch_id__in=branch_ids)
+    rows = list(records.order_by('branch_id', 'sku__name').values_list(
+        'id', 'branch_id', 'branch__code', 'sku_id', 'sku__name', 'sku__category__name',
+        'quantity', 'safety_stock'
+    ))
+    record_ids, record_branches, branch_codes, sku_ids, sku_names, category_names, quantity, safety = (
+        zip(*rows) if rows else [()] * 8
+    )
+    keys = list(zip(record_branches, sku_ids))
+
+    days = max(cover_days, 1)
+    forecasts = forecast_matrix(branch_ids, start_date, days)
+    missing = np.zeros(days)
+    demand = np.array([forecasts.get(key, missing) for key in keys]).reshape(len(rows), days)
+
+    quantity = np.asarray(quantity, dtype=np.int64)
+    safety = np.asarray(safety, dtype=np.int64)
+    lead_time_demand = demand[:, :lead_time_days].sum(axis=1)
+    cover_demand = demand[:, :cover_days].sum(axis=1)
+    reorder_point = np.ceil(lead_time_demand + safety).astype(np.int64)
+    order_up_to = np.ceil(cover_demand + safety).astype(np.int64)
+    needs_order = quantity <= reorder_point
+    suggested = np.where(needs_order, np.maximum(0, order_up_to - quantity), 0)
+
+    return {
+        'record_id': list(record_ids),
+        'branch_id': list(record_branches),
+        'branch_code': list(branch_codes),
+        'sku_id': list(sku_ids),
+        'sku_name': list(sku_names),
+        'category_name': list(category_names),
+        'quantity': quantity,
+        'safety_stock': safety,
+        'lead_time_demand': lead_time_demand,
+        'cover_demand': cover_demand,
+        'reorder_point': reorder_point,
+        'order_up_to': order_up_to,
+        'suggested': suggested,
+        'needs_order': needs_order & (suggested > 0),
+        'has_forecast': np.array([key in forecasts for key in keys], dtype=bool),
+        'lead_time_days': lead_time_days,
+        'review_days': review_days,
+    }
+
+
+def plan_rows(plan, only_orders=True):
+    """
+    Turn a plan into one dict per record, largest suggested order first.
+
+    Args:
+        plan: Result of compute_reorder_plan
+        only_orders: Only include records with a suggested order
+
+    Returns:
+        list: Dicts with the per-record keys of the plan
+    """
+    keys = [
+        'record_id', 'branch_id', 'branch_code', 'sku_id', 'sku_name', 'category_name',
+        'quantity', 'safety_stock', 'lead_time_demand', 'cover_demand', 'reorder_point',
+        'order_up_to', 'suggested', 'needs_order', 'has_forecast',
+    ]
+    indexes = np.flatnonzero(plan['needs_order']) if only_orders else np.arange(len(plan['record_id']))
+    indexes = indexes[np.argsort(-plan['suggested'][indexes], kind='stable')]
+
+    rows = []
+    for i in indexes:
+        row = {key: plan[key][i] for key in keys}
+        for key in ('quantity', 'safety_stock', 'reorder_point', 'order_up_to', 'suggested'):
+            row[key] = int(row[key])
+        for key in ('lead_time_demand', 'cover_demand'):
+            row[key] = round(float(row[key]), 1)
+        row['needs_order'] = bool(row['needs_order'])
+        row['has_forecast'] = bool(row['has_forecast'])
+        rows.append(row)
+    return rows
+
+
+def get_branch_reorder_suggestions(branch, lead_time_days=None, review_days=None):
+    """
+    Cached reorder suggestions for one branch.
+
+    Cached for a few minutes per forecast run and branch stock version, so
+    a new run or a stock movement shows up immediately.
+
+    Args:
+        branch: Branch instance
+        lead_time_days: Days between ordering and receiving stock
+        review_days: Days until the next chance to order
+
+    Returns:
+        list: Rows from plan_rows for records that need ordering
+    """
+    lead_time_days, review_days = get_reorder_settings(lead_time_days, review_days)
+    origin = ForecastHorizon.objects.filter(branch=branch).aggregate(origin=Max('origin_date'))['origin']
+    key = REORDER_CACHE_KEY.format(
+        branch_id=branch.id, origin=origin, stock=get_stock_version(branch.id),
+        lead_time=lead_time_days, review=review_days,
+    )
+
+    rows = cache.get(key)
+    if rows is None:
+        plan = compute_reorder_plan([branch.id], lead_time_days, review_days)
+        rows = plan_rows(plan)
+        cache.set(key, rows, REORDER_CACHE_TIMEOUT)
+    return rows
@@ -0,0 +1,118 @@
+"""
+Safety stock from demand variability.
+
+Safety stock covers demand above forecast while waiting for the next
+delivery: z * sigma * sqrt(days), where sigma is the standard deviation of
+daily demand, days is the lead time plus review period, and z is the
+normal quantile of the target service level (the share of cycles that
+should not run out). Demand for every branch x SKU is loaded with one
+query and the new values are written with one UPDATE. Records whose demand
+shows no variability (no sales, or the same quantity every day) keep their
+current safety stock rather than dropping to zero.
+"""
+
+from datetime import timedelta
+from statistics import NormalDist
+
+import numpy as np
+from django.db.models import Case, IntegerField, Value, When
+from django.utils import timezone
+
+from inventory.models import InventoryRecord
+from inventory.summary import invalidate_inventory_summary_on_commit
+from .engine import load_demand
+from .reorder import get_reorder_settings
+
+DEFAULT_SERVICE_LEVEL = 0.95
+
+
+def service_level_z(service_level):
+    """Normal quantile for a service level between 0.5 and 1 (exclusive)"""
+    if not 0.5 <= service_level < 1:
+        raise ValueError("Service level must be at least 0.5 and below 1")
+    return NormalDist().inv_cdf(service_level)
+
+
+def compute_safety_stock(service_level=DEFAULT_SERVICE_LEVEL, lookback_days=56, branch_ids=None,
+                         lead_time_days=None, review_days=None, minimum=0, today=None):
+    """
+    Recommended safety stock for every active inventory record.
+
+    Args:
+        service_level: Target probability of not running out per cycle
+        lookback_days: Days of DailySales history (ending yesterday)
+        branch_ids: Restrict to these branches (defaults to all active)
+        lead_time_days: Days from ordering to receiving stock
+        review_days: Days until the next chance to order
+        minimum: Lowest safety stock to recommend
+        today: Day the history ends before (defaults to today)
+
+    Returns:
+        list: (record_id, branch_code, sku_name, old, new, daily_std) tuples
+        ordered by branch and SKU name; new is old when daily_std is 0
+    """
+    z = service_level_z(service_level)
+    lead_time_days, review_days = get_reorder_settings(lead_time_days, review_days)
+    protection_days = max(lead_time_days + review_days, 1)
+    today = today or timezone.localdate()
+
+    records = InventoryRecord.objects.filter(branch__is_active=True, sku__is_active=True)
+    if branch_ids is not None:
+        records = records.filter(branch_id__in=branch_ids)
+    rows = list(records.order_by('branch__code', 'sku__name').values_list(
+        'id', 'branch_id', 'branch__code', 'sku_id', 'sku__name', 'safety_stock'
+    ))
+    if not rows:
+        return []
+
+    record_ids, record_branches, branch_codes, record_skus, sku_names, old = zip(*rows)
+    branch_ids = sorted(set(record_branches))
+    sku_ids = sorted(set(record_skus))
+    _, _, demand = load_demand(
+        today - timedelta(days=lookback_days), today, branch_ids=branch_ids, sku_ids=sku_ids
+    )
+
+    branch_index = {branch_id: i for i, branch_id in enumerate(branch_ids)}
+    sku_index = {sku_id: i for i, sku_id in enumerate(sku_ids)}
+    series = demand[
+        [branch_index[branch_id] for branch_id in record_branches],
+        [sku_index[sku_id] for sku_id in record_skus],
+    ].astype(float)
+
+    daily_std = series.std(axis=1, ddof=1) if series.shape[1] > 1 else np.zeros(len(rows))
+    # Zero variability means there is nothing to size from (usually too
+    # little history), not that no buffer is needed
+    computed = np.ceil(z * daily_std * np.sqrt(protection_days))
+    new = np.maximum(minimum, np.where(daily_std > 0, computed, old)).astype(np.int64)
+
+    return [
+        (record_ids[i], branch_codes[i], sku_names[i], old[i], int(new[i]), round(float(daily_std[i]), 2))
+        for i in range(len(rows))
+    ]
+
+
+def apply_safety_stock(changes):
+    """
+    Write new safety stock values with a single UPDATE.
+
+    Args:
+        changes: (record_id, ..., old, new, ...) tuples from
+            compute_safety_stock; unchanged rows are skipped
+
+    Returns:
+        int: Number of InventoryRecord rows updated
+    """
+    changed = {change[0]: change[4] for change in changes if change[3] != change[4]}
+    if not changed:
+        return 0
+
+    records = InventoryRecord.objects.filter(id__in=changed)
+    branch_ids = set(records.values_list('branch_id', flat=True))
+    updated = records.update(
+        safety_stock=Case(
+            *[When(id=record_id, then=Value(value)) for record_id, value in changed.items()],
+            output_field=IntegerField(),
+        )
+    )
+    invalidate_inventory_summary_on_commit(*branch_ids)
+    return updated
@@ -0,0 +1,113 @@
+"""
+Read side of multi-day forecasts.
+
+ForecastHorizon stores one row per (branch, SKU, run) with the daily
+predictions packed into arrays. These helpers pick the latest run and
+expand it into per-day values only as they are consumed, so callers that
+need a week never build rows for the whole horizon.
+"""
+
+from datetime import timedelta
+
+from django.db.models import Max, Q
+
+from .models import ForecastHorizon
+
+
+def latest_horizons(branch=None, sku_ids=None):
+    """
+    Get the most recent forecast run for each (branch, SKU).
+
+    Args:
+        branch: Branch instance or id (optional, defaults to every branch)
+        sku_ids: Restrict to these SKU ids (optional)
+
+    Returns:
+        QuerySet: ForecastHorizon rows from the latest run per branch
+    """
+    queryset = ForecastHorizon.objects.all()
+    if branch is not None:
+        queryset = queryset.filter(branch=branch)
+    if sku_ids is not None:
+        queryset = queryset.filter(sku_id__in=sku_ids)
+
+    latest = queryset.order_by().values('branch_id').annotate(origin=Max('origin_date'))
+    origins = {row['branch_id']: row['origin'] for row in latest}
+    if not origins:
+        return queryset.none()
+
+    if len(set(origins.values())) == 1:
+        return queryset.filter(origin_date=next(iter(origins.values())))
+
+    condition = Q()
+    for branch_id, origin in origins.items():
+        condition |= Q(branch_id=branch_id, origin_date=origin)
+    return queryset.filter(condition)
+
+
+def expand_horizons(horizons, start_date=None, end_date=None):
+    """
+    Lazily expand packed forecasts into one dict per day.
+
+    Args:
+        horizons: Iterable of ForecastHorizon (select_related('sku') avoids
+            a query per row when reading sku names)
+        start_date: First day to yield (optional, inclusive)
+        end_date: Last day to yield (optional, inclusive)
+
+    Yields:
+        dict: {'horizon', 'branch_id', 'sku_id', 'date', 'predicted',
+        'lower', 'upper', 'method'}
+    """
+    for horizon in horizons:
+        for date, predicted, lower, upper in horizon.days():
+            if start_date and date < start_date:
+                continue
+            if end_date and date > end_date:
+                break
+            yield {
+                'horizon': horizon,
+                'branch_id': horizon.branch_id,
+                'sku_id': horizon.sku_id,
+                'date': date,
+                'predicted': predicted,
+                'lower': lower,
+                'upper': upper,
+                'method': horizon.method,
+            }
+
+
+def daily_forecast_table(branch, start_date, days=7):
+    """
+    Predicted demand for the next `days` days per SKU, for the dashboard.
+
+    Args:
+        branch: Branch instance
+        start_date: First day shown
+        days: Number of days shown
+
+    Returns:
+        tuple: (list of dates, list of {'sku', 'method', 'days': [(predicted,
+        lower, upper), ...], 'total'} sorted by total descending). Each row
+        has one entry per date; days outside the SKU's forecast are None.
+    """
+    end_date = start_date + timedelta(days=days - 1)
+    dates = [start_date + timedelta(days=offset) for offset in range(days)]
+
+    rows = {}
+    horizons = latest_horizons(branch).select_related('sku')
+    for day in expand_horizons(horizons, start_date, end_date):
+        horizon = day['horizon']
+        row = rows.setdefault(horizon.sku_id, {
+            'sku': horizon.sku,
+            'method': horizon.method,
+            'days': dict.fromkeys(dates),
+            'total': 0,
+        })
+        row['days'][day['date']] = (day['predicted'], day['lower'], day['upper'])
+        row['total'] += day['predicted']
+
+    for row in rows.values():
+        row['days'] = list(row['days'].values())
+    table = sorted(rows.values(), key=lambda row: row['total'], reverse=True)
+    return dates, table
@@ -1,3 +1,426 @@
-from django.test import TestCase
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.utils import timezone
+
+from inventory.models import Branch, Category, InventoryRecord, SKU
+from sales.models import DailySales
+from users.models import User
+from .backtest import AUTO_METHOD, empty_totals, accumulate, error_metrics, group_totals, rolling_origin_backtest
+from .methods import FORECAST_METHODS, SEASON_LENGTH, backtest_errors, select_and_forecast
+from .engine import forecast_shard, load_demand, reconcile_actuals, refresh_accuracy_summary, run_batch_forecast, run_shards
+from .models import Forecast, ForecastAccuracy, ForecastHorizon
+from .reorder import compute_reorder_plan, plan_rows
+from .safety_stock import compute_safety_stock
+from .services import daily_forecast_table
+
+
+WEEK = np.arange(SEASON_LENGTH, dtype=float)  # A weekly pattern: 0 on day 0 up to 6 on day 6
+
+
+class ForecastMethodTests(SimpleTestCase):
+    def test_every_method_returns_series_by_horizon(self):
+        rng = np.random.default_rng(0)
+        for days in (0, 1, 5, SEASON_LENGTH, 2 * SEASON_LENGTH - 1, 28):
+            history = rng.poisson(5, (3, days)).astype(float)
+            for name, method in FORECAST_METHODS.items():
+                predictions = method(history, 10)
+                self.assertEqual(predictions.shape, (3, 10), f'{name} with {days} days')
+                self.assertTrue(np.isfinite(predictions).all(), name)
+
+    def test_seasonal_methods_continue_the_week(self):
+        # Four weeks ending on day 6, so the forecast starts on day 0
+        history = np.tile(WEEK, (2, 4))
+        expected = np.tile(np.resize(WEEK, 10), (2, 1))
+
+        np.testing.assert_array_equal(FORECAST_METHODS['seasonal_naive'](history, 10), expected)
+        np.testing.assert_allclose(FORECAST_METHODS['holt_winters'](history, 10), expected, atol=1e-9)
+
+        # Ending mid-week shifts the pattern with it
+        shifted = np.tile(WEEK, 4)[None, :-3]
+        np.testing.assert_array_equal(FORECAST_METHODS['seasonal_naive'](shifted, 3), [[4, 5, 6]])
+        np.testing.assert_allclose(FORECAST_METHODS['holt_winters'](shifted, 3), [[4, 5, 6]], atol=1e-9)
+
+    def test_level_and_trend_methods(self):
+        history = np.array([[1, 2, 3, 4, 5, 6, 7, 8, 9, 10], [4] * 10], dtype=float)
+
+        np.testing.assert_allclose(FORECAST_METHODS['moving_average'](history, 2), [[7, 7], [4, 4]])
+        np.testing.assert_allclose(FORECAST_METHODS['ses'](history, 2)[1], [4, 4])
+
+        trend = FORECAST_METHODS['holt'](history, 5)
+        steps = np.diff(trend[0])
+        self.assertTrue((steps > 0).all())  # Still rising ...
+        self.assertTrue((np.diff(steps) < 0).all())  # ... but damped
+        np.testing.assert_allclose(trend[1], [4] * 5)
+
+    def test_backtest_errors_are_forecast_minus_actual(self):
+        history = np.array([[5] * 14, [0] * 7 + [3] * 7], dtype=float)
+
+        names, residuals = backtest_errors(history, holdout=7, methods=['moving_average'])
+
+        self.assertEqual((names, residuals.shape), (['moving_average'], (1, 2, 7)))
+        np.testing.assert_allclose(residuals[0], [[0] * 7, [-3] * 7])
+
+    def test_selection_picks_the_best_recent_method(self):
+        seasonal = np.tile(WEEK, 5)
+        history = np.stack([seasonal, np.zeros_like(seasonal), np.full_like(seasonal, 4)])
+
+        predictions, methods, scale = select_and_forecast(history, horizon=7)
+
+        self.assertEqual(predictions.shape, (3, 7))
+        self.assertEqual(methods[0], 'seasonal_naive')
+        np.testing.assert_allclose(predictions[0], WEEK)
+        # Ties (no sales, flat demand) go to the first registered method
+        self.assertEqual(list(methods[1:]), ['moving_average', 'moving_average'])
+        np.testing.assert_allclose(scale, [0, 0, 0])
+        self.assertTrue((predictions >= 0).all())
+
+
+class BacktestTests(SimpleTestCase):
+    def test_error_metrics(self):
+        totals = empty_totals(1)
+        accumulate(totals, np.array([[2.0, 4.0, 0.0, 3.0]]), np.array([[1.0, 4.0, 2.0, 0.0]]))
+
+        metrics = error_metrics(totals)
+
+        # Errors 1, 0, -2, 3; MAPE skips the day with no sales
+        np.testing.assert_allclose(metrics['mape'], [(1 / 1 + 0 / 4 + 2 / 2) / 3 * 100])
+        np.testing.assert_allclose(metrics['wape'], [6 / 7 * 100])
+        np.testing.assert_allclose(metrics['bias'], [2 / 7 * 100])
+        self.assertEqual((metrics['actual'][0], metrics['points'][0]), (7, 4))
+
+        unsold = error_metrics(empty_totals(1))
+        self.assertTrue(np.isnan([unsold['mape'], unsold['wape'], unsold['bias']]).all())
+
+    def test_rolling_origin_on_a_weekly_series(self):
+        demand = np.stack([np.tile(WEEK + 1, 8), np.full(56, 2.0)])
+
+        results = rolling_origin_backtest(demand, origins=[29, 36, 43], lookback=28, horizon=7)
+
+        self.assertEqual(set(results), set(FORECAST_METHODS) | {AUTO_METHOD})
+        for name in ('seasonal_naive', AUTO_METHOD):
+            metrics = error_metrics(results[name])
+            np.testing.assert_allclose(metrics['wape'], [0, 0], atol=1e-9, err_msg=name)
+            np.testing.assert_array_equal(metrics['points'], [21, 21])
+        moving_average = error_metrics(results['moving_average'])
+        self.assertGreater(moving_average['mape'][0], 0)
+        self.assertAlmostEqual(moving_average['bias'][1], 0)
+
+        overall = group_totals(results['moving_average'], (1, 2), (0, 1))
+        self.assertEqual(overall['points'], 42)
+
+    def test_origin_without_enough_history(self):
+        with self.assertRaises(ValueError):
+            rolling_origin_backtest(np.zeros((1, 30)), origins=[10], lookback=28, horizon=7)
+
+
+class ForecastDataMixin:
+    """Branches, SKUs and daily sales for forecasting tests"""
+
+    today = date(2026, 3, 1)
+
+    def create_catalog(self, branches=2, skus=3):
+        category = Category.objects.create(name='Classic')
+        self.branches = [
+            Branch.objects.create(name=f'Branch {i}', code=f'B{i}', address='-', phone='-')
+            for i in range(branches)
+        ]
+        self.skus = [
+            SKU.objects.create(name=f'Pizza {i}', category=category, price=Decimal('300.00'))
+            for i in range(skus)
+        ]
+
+    def add_sales(self, branch, sku, quantities, end=None):
+        """One DailySales row per quantity, the last one on the day before `end` (default today)"""
+        end = end or self.today
+        DailySales.objects.bulk_create([
+            DailySales(
+                branch=branch, sku=sku, date=end - timedelta(days=len(quantities) - i),
+                total_quantity=quantity, total_amount=quantity * 300, transaction_count=1,
+            )
+            for i, quantity in enumerate(map(int, quantities))
+        ])
+
+
+class ForecastEngineTests(ForecastDataMixin, TestCase):
+    def setUp(self):
+        self.create_catalog()
+        self.add_sales(self.branches[0], self.skus[0], np.tile(WEEK + 1, 4))
+        self.add_sales(self.branches[1], self.skus[2], [3] * 28)
+
+    def test_load_demand_zero_fills_missing_days(self):
+        start = self.today - timedelta(days=4)
+        branch, other_branch = self.branches
+        DailySales.objects.filter(branch=branch, sku=self.skus[0], date=start + timedelta(days=1)).delete()
+
+        branch_ids, sku_ids, demand = load_demand(
+            start, self.today, branch_ids=[other_branch.id, branch.id], sku_ids=[self.skus[2].id, self.skus[0].id]
+        )
+
+        self.assertEqual((branch_ids, sku_ids), ([other_branch.id, branch.id], [self.skus[2].id, self.skus[0].id]))
+        self.assertEqual(demand.shape, (2, 2, 4))
+        np.testing.assert_array_equal(demand[1, 1], [4, 0, 6, 7])  # The deleted day is 0
+        np.testing.assert_array_equal(demand[0, 0], [3, 3, 3, 3])
+        np.testing.assert_array_equal(demand[0, 1], [0, 0, 0, 0])
+
+    def test_run_writes_one_forecast_and_horizon_per_series(self):
+        run = run_batch_forecast(today=self.today, horizon=5, workers=1)
+        rerun = run_batch_forecast(today=self.today, horizon=5, workers=1)
+
+        tomorrow = self.today + timedelta(days=1)
+        self.assertEqual((run['forecasts'], run['horizons'], run['forecast_date']), (6, 6, tomorrow))
+        self.assertEqual((rerun['forecasts'], Forecast.objects.count(), ForecastHorizon.objects.count()), (6, 6, 6))
+
+        horizon = ForecastHorizon.objects.get(branch=self.branches[0], sku=self.skus[0])
+        self.assertEqual((horizon.origin_date, horizon.start_date, horizon.horizon), (self.today, tomorrow, 5))
+        # The last observed day was day 6 of the pattern, so tomorrow is day 1
+        self.assertEqual(horizon.method, 'seasonal_naive')
+        self.assertEqual(horizon.predictions, [2.0, 3.0, 4.0, 5.0, 6.0])
+        self.assertTrue(all(
+            lower <= predicted <= upper
+            for predicted, lower, upper in zip(horizon.predictions, horizon.lower, horizon.upper)
+        ))
+
+        forecast = Forecast.objects.get(branch=self.branches[0], sku=self.skus[0])
+        self.assertEqual((forecast.forecast_date, forecast.predicted_quantity, forecast.method), (tomorrow, 2, 'seasonal_naive'))
+        steady = Forecast.objects.get(branch=self.branches[1], sku=self.skus[2])
+        self.assertEqual((steady.predicted_quantity, steady.confidence_level), (3, Decimal('100.00')))
+
+    def test_run_forecast_command_options(self):
+        out = StringIO()
+        call_command(
+            'run_forecast', '--date', '2026-03-01', '--horizon', '3', '--model', 'moving_average',
+            '--branches', 'B1', '--workers', '1', stdout=out,
+        )
+
+        self.assertIn('Wrote 3 forecasts and 3 multi-day forecasts', out.getvalue())
+        horizons = ForecastHorizon.objects.all()
+        self.assertEqual({h.branch_id for h in horizons}, {self.branches[1].id})
+        self.assertEqual({(h.horizon, h.method) for h in horizons}, {(3, 'moving_average')})
+
+        with self.assertRaisesMessage(CommandError, 'NOPE'):
+            call_command('run_forecast', '--branches', 'B1,NOPE', stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command('run_forecast', '--horizon', '0', stdout=StringIO())
+
+    def test_dry_run_writes_nothing(self):
+        out = StringIO()
+        call_command('run_forecast', '--date', '2026-03-01', '--horizon', '7', '--dry-run', stdout=out)
+
+        self.assertFalse(Forecast.objects.exists())
+        self.assertFalse(ForecastHorizon.objects.exists())
+        self.assertIn('B0: 2 units on 2026-03-02, 28 over 7 days', out.getvalue())
+        self.assertIn('Dry run: nothing was written', out.getvalue())
+
+
+class ShardedForecastTests(ForecastDataMixin, TransactionTestCase):
+    """Sharded runs must match a single serial run"""
+
+    def test_parallel_shards_match_serial(self):
+        self.create_catalog(branches=3, skus=2)
+        rng = np.random.default_rng(3)
+        for branch in self.branches:
+            for sku in self.skus:
+                self.add_sales(branch, sku, rng.poisson(6, 35))
+        branch_ids = [branch.id for branch in self.branches]
+        sku_ids = [sku.id for sku in self.skus]
+        options = {'today': self.today, 'lookback_days': 35, 'horizon': 5}
+
+        serial = forecast_shard(branch_ids, sku_ids, **options)
+        # The in-memory test database is not visible to other processes, so
+        # the pool runs in threads; sharding and merging are the same
+        pools = []
+
+        class RecordingPool(ThreadPoolExecutor):
+            def map(self, fn, jobs):
+                jobs = list(jobs)
+                pools.append([job['branch_ids'] for job in jobs])
+                return super().map(fn, jobs)
+
+        with mock.patch('forecast.engine.ProcessPoolExecutor', RecordingPool):
+            parallel = run_shards(branch_ids, sku_ids, workers=2, **options)
+
+        self.assertEqual(pools, [[branch_ids[:2], branch_ids[2:]]])
+        for key in ('predictions', 'lower', 'upper', 'methods', 'confidence'):
+            np.testing.assert_array_equal(parallel[key], serial[key], err_msg=key)
+        self.assertEqual(set(parallel['timings']), {'load', 'fit'})
+
+
+class ReconcileActualsTests(ForecastDataMixin, TestCase):
+    def setUp(self):
+        self.create_catalog(branches=2, skus=7)
+        self.branch = self.branches[0]
+        self.yesterday = timezone.localdate() - timedelta(days=1)
+
+    def _forecast(self, sku, predicted, actual=None, day=None, branch=None):
+        day = day or self.yesterday
+        branch = branch or self.branch
+        Forecast.objects.create(branch=branch, sku=sku, forecast_date=day, predicted_quantity=predicted)
+        if actual:
+            self.add_sales(branch, sku, [actual], end=day + timedelta(days=1))
+
+    def test_actuals_are_zero_filled_and_scored(self):
+        cases = [(10, 8), (0, 0), (0, 5), (4, 0), (5, 20), (8, 10)]
+        for sku, (predicted, actual) in zip(self.skus, cases):
+            self._forecast(sku, predicted, actual)
+        self._forecast(self.skus[0], 6, 6, day=self.yesterday - timedelta(days=1))
+        self._forecast(self.skus[0], 9, day=self.yesterday + timedelta(days=1))  # Outside the range
+
+        updated = reconcile_actuals(self.yesterday - timedelta(days=1), self.yesterday)
+
+        self.assertEqual(updated, 7)
+        scored = Forecast.objects.filter(forecast_date=self.yesterday).order_by('sku__name')
+        self.assertEqual(
+            [(f.actual_quantity, f.absolute_error, f.percentage_error, f.accuracy_score) for f in scored],
+            [
+                (8, 2, Decimal('25.00'), Decimal('80.00')),
+                (0, 0, None, Decimal('100.00')),  # Nothing forecast, nothing sold
+                (5, 5, Decimal('100.00'), Decimal('0.00')),
+                (0, 4, None, Decimal('0.00')),  # No DailySales row counts as 0 sold
+                (20, 15, Decimal('75.00'), Decimal('0.00')),  # Floored at 0
+                (10, 2, Decimal('20.00'), Decimal('75.00')),
+            ],
+        )
+        for forecast in scored:
+            self.assertEqual(forecast.accuracy(), float(forecast.accuracy_score))
+        self.assertIsNone(Forecast.objects.get(forecast_date=self.yesterday + timedelta(days=1)).actual_quantity)
+
+        summary = ForecastAccuracy.objects.get(branch=self.branch, sku=self.skus[0])
+        self.assertEqual(
+            (summary.forecast_count, summary.total_predicted, summary.total_actual,
+             summary.total_absolute_error, summary.avg_accuracy, summary.wape, summary.window_end),
+            (2, 16, 14, 2, Decimal('90.00'), Decimal('14.29'), self.yesterday),
+        )
+        self.assertEqual(summary.bias(), 14.29)
+        self.assertIsNone(ForecastAccuracy.objects.get(branch=self.branch, sku=self.skus[1]).wape)
+
+    def test_summary_rebuild_removes_stale_rows(self):
+        other_branch = self.branches[1]
+        old_window = {'window_start': date(2025, 1, 1), 'window_end': date(2025, 1, 30)}
+        ForecastAccuracy.objects.create(branch=self.branch, sku=self.skus[6], **old_window)
+        ForecastAccuracy.objects.create(branch=other_branch, sku=self.skus[6], **old_window)
+        self._forecast(self.skus[0], 10, 8)
+
+        reconcile_actuals(self.yesterday, branch=self.branch)
+
+        self.assertEqual(
+            sorted(ForecastAccuracy.objects.values_list('branch_id', 'sku_id')),
+            [(self.branch.id, self.skus[0].id), (other_branch.id, self.skus[6].id)],  # Other branch untouched
+        )
+
+        # A window with no scored forecasts empties the summary
+        self.assertEqual(refresh_accuracy_summary(window_end=self.yesterday + timedelta(days=60)), 0)
+        self.assertFalse(ForecastAccuracy.objects.exists())
+
+
+class ReorderPlanTests(ForecastDataMixin, TestCase):
+    def test_reorder_point_and_order_up_to(self):
+        self.create_catalog(branches=1, skus=4)
+        branch = self.branches[0]
+        tomorrow = self.today + timedelta(days=1)
+        for sku, quantity, safety, start, predictions in [
+            (self.skus[0], 5, 3, tomorrow, [2, 3, 4.5, 5]),
+            (self.skus[1], 20, 3, tomorrow, [1, 1, 1, 1]),
+            (self.skus[2], 2, 3, None, None),  # No forecast
+            (self.skus[3], 0, 0, tomorrow + timedelta(days=1), [2, 2, 2]),  # Starts a day late
+        ]:
+            InventoryRecord.objects.create(branch=branch, sku=sku, quantity=quantity, safety_stock=safety)
+            if predictions:
+                ForecastHorizon.objects.create(
+                    branch=branch, sku=sku, origin_date=self.today, start_date=start,
+                    horizon=len(predictions), predictions=predictions, lower=predictions, upper=predictions,
+                )
+
+        plan = compute_reorder_plan([branch.id], lead_time_days=2, review_days=1, start_date=tomorrow)
+
+        self.assertEqual(plan['sku_name'], ['Pizza 0', 'Pizza 1', 'Pizza 2', 'Pizza 3'])
+        np.testing.assert_allclose(plan['lead_time_demand'], [5, 2, 0, 2])
+        np.testing.assert_allclose(plan['cover_demand'], [9.5, 3, 0, 4])
+        np.testing.assert_array_equal(plan['reorder_point'], [8, 5, 3, 2])
+        np.testing.assert_array_equal(plan['order_up_to'], [13, 6, 3, 4])
+        np.testing.assert_array_equal(plan['suggested'], [8, 0, 1, 4])
+        np.testing.assert_array_equal(plan['has_forecast'], [True, True, False, True])
+
+        rows = plan_rows(plan)
+        self.assertEqual([(row['sku_name'], row['suggested']) for row in rows], [('Pizza 0', 8), ('Pizza 3', 4), ('Pizza 2', 1)])
+
+
+class SafetyStockTests(TestCase):
+    def setUp(self):
+        self.branch = Branch.objects.create(name='Main', code='MAIN', address='-', phone='-')
+        self.category = Category.objects.create(name='Classic')
+        self.today = date(2026, 3, 1)
+
+    def _record(self, name, daily_quantities):
+        """InventoryRecord with safety stock 12 and one DailySales row per day before today"""
+        sku = SKU.objects.create(name=name, category=self.category, price=Decimal('300.00'))
+        record = InventoryRecord.objects.create(branch=self.branch, sku=sku, quantity=50, safety_stock=12)
+        DailySales.objects.bulk_create([
+            DailySales(
+                branch=self.branch, sku=sku, date=self.today - timedelta(days=days_ago),
+                total_quantity=quantity, total_amount=quantity * 300, transaction_count=1,
+            )
+            for days_ago, quantity in enumerate(daily_quantities, start=1)
+        ])
+        return record
+
+    def test_zero_variance_keeps_current_safety_stock(self):
+        steady = self._record('Steady', [5] * 14)
+        unsold = self._record('Unsold', [])
+        varying = self._record('Varying', [0, 10] * 7)
+
+        changes = compute_safety_stock(lookback_days=14, lead_time_days=2, review_days=1, today=self.today)
+
+        new = {record_id: (value, std) for record_id, _, _, _, value, std in changes}
+        self.assertEqual(new[steady.id], (12, 0.0))
+        self.assertEqual(new[unsold.id], (12, 0.0))
+        self.assertGreater(new[varying.id][0], 0)
+        self.assertNotEqual(new[varying.id][0], 12)
+
+
+class DailyForecastTableTests(TestCase):
+    def setUp(self):
+        self.branch = Branch.objects.create(name='Main', code='MAIN', address='-', phone='-')
+        self.category = Category.objects.create(name='Classic')
+
+    def _horizon(self, name, start_date, predictions):
+        return ForecastHorizon.objects.create(
+            branch=self.branch,
+            sku=SKU.objects.create(name=name, category=self.category, price=Decimal('300.00')),
+            origin_date=timezone.localdate(),
+            start_date=start_date,
+            horizon=len(predictions),
+            predictions=predictions,
+            lower=[p - 1 for p in predictions],
+            upper=[p + 1 for p in predictions],
+        )
+
+    def test_rows_have_one_cell_per_date(self):
+        start = timezone.localdate() + timedelta(days=1)
+        self._horizon('Short', start, [4, 5, 6])
+        self._horizon('Late', start + timedelta(days=2), [7, 8])
+
+        dates, table = daily_forecast_table(self.branch, start, days=5)
+
+        self.assertEqual(len(dates), 5)
+        rows = {row['sku'].name: row['days'] for row in table}
+        self.assertEqual(rows['Short'], [(4, 3, 5), (5, 4, 6), (6, 5, 7), None, None])
+        self.assertEqual(rows['Late'], [None, None, (7, 6, 8), (8, 7, 9), None])
+
+    def test_dashboard_renders_short_horizons(self):
+        self._horizon('Short', timezone.localdate() + timedelta(days=1), [4, 5, 6])
+        user = User.objects.create_user(username='manager', password='-', role='manager')
+        user.branches.add(self.branch)
+        self.client.force_login(user)
+
+        response = self.client.get('/forecast/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Short')
+        self.assertEqual(len(response.context['horizon_rows'][0]['days']), len(response.context['horizon_dates']))
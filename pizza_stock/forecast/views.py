@@ -1,10 +1,11 @@
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Avg
+from django.db.models import F, Sum
 from datetime import timedelta
 from django.utils import timezone
-from .models import Forecast
+from .models import Forecast, ForecastAccuracy
+from .services import daily_forecast_table
 
 @login_required
 def forecast_dashboard(request):
@@ -20,28 +21,45 @@ def forecast_dashboard(request):
         return redirect('users:profile')
     
     # Get tomorrow's forecast
-    tomorrow = timezone.now().date() + timedelta(days=1)
+    tomorrow = timezone.localdate() + timedelta(days=1)
     
     forecasts = Forecast.objects.filter(
         branch=branch,
         forecast_date=tomorrow
     ).select_related('sku', 'sku__category').order_by('-predicted_quantity')
     
-    # Get recent forecast accuracy
+    # Recent reconciled forecasts (accuracy is stored when actuals are filled)
     recent_forecasts = Forecast.objects.filter(
         branch=branch,
         actual_quantity__isnull=False
-    ).order_by('-forecast_date')[:30]
+    ).select_related('sku').order_by('-forecast_date')[:10]
     
-    # Calculate average accuracy
-    accuracies = [f.accuracy() for f in recent_forecasts if f.accuracy() is not None]
-    avg_accuracy = sum(accuracies) / len(accuracies) if accuracies else 0
+    # Rolling accuracy per SKU, weakest first unless ?sort=best
+    sku_accuracy = ForecastAccuracy.objects.filter(branch=branch).select_related('sku')
+    if request.GET.get('sort') == 'best':
+        sku_accuracy = sku_accuracy.order_by('-avg_accuracy', 'sku__name')
+    else:
+        sku_accuracy = sku_accuracy.order_by('avg_accuracy', 'sku__name')
+    
+    # Branch average weighted by forecasts per SKU
+    totals = ForecastAccuracy.objects.filter(branch=branch).aggregate(
+        weighted=Sum(F('avg_accuracy') * F('forecast_count')),
+        count=Sum('forecast_count'),
+    )
+    avg_accuracy = totals['weighted'] / totals['count'] if totals['count'] else 0
+    
+    # Next week from the latest multi-day run
+    horizon_dates, horizon_rows = daily_forecast_table(branch, tomorrow, days=7)
     
     context = {
         'forecasts': forecasts,
-        'recent_forecasts': recent_forecasts[:10],
+        'recent_forecasts': recent_forecasts,
+        'sku_accuracy': sku_accuracy,
+        'accuracy_sort': request.GET.get('sort', 'worst'),
         'avg_accuracy': round(avg_accuracy, 2),
         'forecast_date': tomorrow,
+        'horizon_dates': horizon_dates,
+        'horizon_rows': horizon_rows,
     }
     
     return render(request, 'forecast/dashboard.html', context)
\ No newline at end of file
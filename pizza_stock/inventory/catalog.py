@@ -0,0 +1,124 @@
+"""
+Cached snapshot of the active menu (categories and their SKUs).
+
+The menu changes rarely but is read on every QR menu, POS and inventory
+page, so it is served from a versioned snapshot instead of the database.
+Each process keeps the last snapshot in memory; the snapshot itself and
+its current version live in Django's cache so every process sees the same
+menu. Saving or deleting a SKU or Category bumps the version (see
+inventory.signals), which makes every process rebuild on its next read.
+"""
+
+import threading
+import uuid
+
+from django.core.cache import cache
+from django.db.models import Prefetch
+
+from .models import Category, SKU
+
+CATALOG_VERSION_KEY = 'catalog:version'
+CATALOG_SNAPSHOT_KEY = 'catalog:snapshot:{version}'
+CATALOG_TIMEOUT = 60 * 60 * 24  # 24 hours
+
+_process_snapshot = None
+_process_lock = threading.Lock()
+
+
+def get_catalog_version():
+    """Return the current catalog version, creating one if the cache is empty"""
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        # add() so concurrent processes agree on a single version
+        cache.add(CATALOG_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def build_catalog(version):
+    """
+    Build a catalog snapshot from the database.
+
+    Args:
+        version: Version string to stamp on the snapshot
+
+    Returns:
+        dict: {'version': str, 'categories': list of category dicts, each
+        with a 'skus' list of SKU dicts}
+    """
+    categories = Category.objects.filter(is_active=True).prefetch_related(
+        Prefetch('skus', queryset=SKU.objects.filter(is_active=True).order_by('name'))
+    )
+
+    snapshot = []
+    for category in categories:
+        skus = [
+            {
+                'id': sku.id,
+                'name': sku.name,
+                'description': sku.description,
+                'price': sku.price,
+                'image_url': sku.image.url if sku.image else '',
+                'category_id': category.id,
+                'category_name': category.name,
+            }
+            for sku in category.skus.all()
+        ]
+        if skus:
+            snapshot.append({
+                'id': category.id,
+                'name': category.name,
+                'description': category.description,
+                'display_order': category.display_order,
+                'skus': skus,
+            })
+
+    return {'version': version, 'categories': snapshot}
+
+
+def get_catalog():
+    """
+    Get the current catalog snapshot.
+
+    Served from process memory when the version is unchanged, then from the
+    shared cache, and only built from the database when both miss.
+
+    Returns:
+        dict: Catalog snapshot (see build_catalog); treat as read-only
+    """
+    global _process_snapshot
+
+    version = get_catalog_version()
+    snapshot = _process_snapshot
+    if snapshot is not None and snapshot['version'] == version:
+        return snapshot
+
+    key = CATALOG_SNAPSHOT_KEY.format(version=version)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = build_catalog(version)
+        cache.set(key, snapshot, CATALOG_TIMEOUT)
+
+    with _process_lock:
+        _process_snapshot = snapshot
+
+    return snapshot
+
+
+def get_menu_categories():
+    """Active categories with their active SKUs, in display order"""
+    return get_catalog()['categories']
+
+
+def get_menu_skus():
+    """All active SKUs in the catalog, grouped by category order"""
+    return [sku for category in get_menu_categories() for sku in category['skus']]
+
+
+def invalidate_catalog():
+    """Start a new catalog version so every process rebuilds on its next read"""
+    global _process_snapshot
+
+    cache.set(CATALOG_VERSION_KEY, uuid.uuid4().hex, None)
+    with _process_lock:
+        _process_snapshot = None
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0003_alter_sku_image"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="inventoryrecord",
+            index=models.Index(
+                condition=models.Q(("quantity__lt", models.F("safety_stock"))),
+                fields=["branch", "quantity"],
+                name="inventory_low_stock_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="inventoryrecord",
+            index=models.Index(
+                condition=models.Q(("quantity", 0)),
+                fields=["branch"],
+                name="inventory_out_of_stock_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="stocktransaction",
+            index=models.Index(
+                fields=["branch", "-created_at"], name="stocktxn_branch_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="stocktransaction",
+            index=models.Index(
+                fields=["branch", "transaction_type", "-created_at"],
+                name="stocktxn_branch_type_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="stocktransaction",
+            index=models.Index(
+                fields=["branch", "sku", "-created_at"], name="stocktxn_branch_sku_idx"
+            ),
+        ),
+    ]
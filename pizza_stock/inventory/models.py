@@ -69,6 +69,20 @@ class InventoryRecord(models.Model):
     class Meta:
         unique_together = ['branch', 'sku']
         ordering = ['branch', 'sku']
+        indexes = [
+            # Partial indexes (skipped on backends without support) so low
+            # stock and out of stock lookups only touch matching rows
+            models.Index(
+                fields=['branch', 'quantity'],
+                condition=models.Q(quantity__lt=models.F('safety_stock')),
+                name='inventory_low_stock_idx',
+            ),
+            models.Index(
+                fields=['branch'],
+                condition=models.Q(quantity=0),
+                name='inventory_out_of_stock_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.branch.code} - {self.sku.name}: {self.quantity}"
@@ -106,6 +120,12 @@ class StockTransaction(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Recent transactions per branch, optionally by type or SKU
+            models.Index(fields=['branch', '-created_at'], name='stocktxn_branch_created_idx'),
+            models.Index(fields=['branch', 'transaction_type', '-created_at'], name='stocktxn_branch_type_idx'),
+            models.Index(fields=['branch', 'sku', '-created_at'], name='stocktxn_branch_sku_idx'),
+        ]
     
     def __str__(self):
         return f"{self.branch.code} - {self.sku.name}: {self.quantity} ({self.transaction_type})"
\ No newline at end of file
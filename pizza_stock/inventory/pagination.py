@@ -0,0 +1,164 @@
+"""
+Keyset (cursor) pagination.
+
+Django's Paginator pages with COUNT(*) plus OFFSET, both of which get
+slower the longer a branch's history grows. CursorPaginator instead pages
+by the values of the last row seen, e.g. WHERE (created_at, id) <
+(last_created_at, last_id), which an index on the ordering serves at the
+same cost on every page. Cursors are opaque URL-safe strings; the total
+count is optional and can be capped.
+"""
+
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor cannot be decoded for this paginator"""
+
+
+class CursorPage:
+    """One page of results with cursors to the neighbouring pages"""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None, count=None,
+                 count_is_capped=False):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.count = count
+        self.count_is_capped = count_is_capped
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Page a queryset by a unique ordering instead of by offset.
+
+    Args:
+        queryset: QuerySet to page (its own ordering is replaced)
+        per_page: Rows per page
+        ordering: Field names, all ascending or all descending, ending in a
+            unique field (default newest first by created_at, then id)
+        count: None for no total, 'exact' for COUNT(*), or an int to count
+            at most that many rows (shown as "N+" when reached)
+    """
+
+    def __init__(self, queryset, per_page, ordering=('-created_at', '-id'), count=None):
+        descending = {name.startswith('-') for name in ordering}
+        if len(descending) != 1:
+            raise ValueError("Cursor ordering fields must all sort in the same direction")
+
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = tuple(ordering)
+        self.fields = [name.lstrip('-') for name in ordering]
+        self.descending = descending.pop()
+        self.count_mode = count
+
+    def _encode(self, obj, direction):
+        values = [getattr(obj, field) for field in self.fields]
+        payload = json.dumps([direction, [str(value) for value in values]], separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def _decode(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            direction, values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if direction not in ('n', 'p') or len(values) != len(self.fields):
+                raise ValueError
+            model = self.queryset.model
+            values = [
+                model._meta.get_field(field).to_python(value)
+                for field, value in zip(self.fields, values)
+            ]
+        except (ValueError, TypeError, ValidationError):
+            raise InvalidCursor("Invalid page cursor")
+        return direction, values
+
+    def _after(self, values, forward):
+        """Filter for rows strictly after (forward) or before the given values in page order"""
+        lookup = 'lt' if self.descending == forward else 'gt'
+        condition = Q()
+        for i, field in enumerate(self.fields):
+            equal = {name: value for name, value in zip(self.fields[:i], values[:i])}
+            condition |= Q(**equal, **{f"{field}__{lookup}": values[i]})
+        return condition
+
+    def _count(self):
+        if self.count_mode is None:
+            return None, False
+        if self.count_mode == 'exact':
+            return self.queryset.count(), False
+        counted = self.queryset.order_by()[:self.count_mode + 1].count()
+        return min(counted, self.count_mode), counted > self.count_mode
+
+    def page(self, cursor=None):
+        """
+        Get the page a cursor points to.
+
+        Args:
+            cursor: next_cursor or previous_cursor of another page, or None
+                for the first page
+
+        Returns:
+            CursorPage
+
+        Raises:
+            InvalidCursor: If the cursor is malformed
+        """
+        reverse_ordering = [name.lstrip('-') if name.startswith('-') else f"-{name}" for name in self.ordering]
+
+        if cursor:
+            direction, values = self._decode(cursor)
+        else:
+            direction, values = 'n', None
+
+        forward = direction == 'n'
+        queryset = self.queryset.order_by(*(self.ordering if forward else reverse_ordering))
+        if values is not None:
+            queryset = queryset.filter(self._after(values, forward))
+
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not forward:
+            rows.reverse()
+
+        if forward:
+            has_next, has_previous = has_more, values is not None
+        else:
+            has_next, has_previous = True, has_more
+
+        count, capped = self._count()
+
+        return CursorPage(
+            rows,
+            next_cursor=self._encode(rows[-1], 'n') if rows and has_next else None,
+            previous_cursor=self._encode(rows[0], 'p') if rows and has_previous else None,
+            count=count,
+            count_is_capped=capped,
+        )
+
+    def get_page(self, cursor=None):
+        """Like page(), but fall back to the first page for an invalid cursor"""
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page()
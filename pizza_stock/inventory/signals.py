@@ -0,0 +1,17 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Category, InventoryRecord, SKU
+from .catalog import invalidate_catalog
+from .summary import invalidate_inventory_summary_on_commit
+
+@receiver([post_save, post_delete], sender=SKU)
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_catalog_on_change(sender, **kwargs):
+    """Drop the cached menu once the SKU/Category change is committed"""
+    transaction.on_commit(invalidate_catalog)
+
+@receiver([post_save, post_delete], sender=InventoryRecord)
+def invalidate_inventory_summary_on_change(sender, instance, **kwargs):
+    """Drop the branch's cached stock counters once the record change is committed"""
+    invalidate_inventory_summary_on_commit(instance.branch_id)
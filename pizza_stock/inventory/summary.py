@@ -0,0 +1,96 @@
+"""
+Per-branch inventory status counters.
+
+The inventory dashboard, branch stock page and inventory report all show
+the same tiles (records, in stock, low, out of stock, stock value). They
+are computed with one aggregate() over the branch's InventoryRecords and
+cached per branch. Every stock mutation bumps the branch's stock version
+(see inventory.utils and inventory.signals), and the cache key also
+carries the catalog version so price changes reach the stock value.
+"""
+
+import uuid
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .catalog import get_catalog_version
+from .models import InventoryRecord
+
+STOCK_VERSION_KEY = 'inventory:stock_version:{branch_id}'
+INVENTORY_SUMMARY_KEY = 'inventory:summary:{branch_id}:{version}:{catalog}'
+INVENTORY_SUMMARY_TIMEOUT = 60 * 60  # 1 hour
+
+
+def get_stock_version(branch_id):
+    """Return the branch's current stock version, creating one if the cache is empty"""
+    key = STOCK_VERSION_KEY.format(branch_id=branch_id)
+    version = cache.get(key)
+    if version is None:
+        # add() so concurrent processes agree on a single version
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def summarize_inventory(queryset):
+    """
+    Status counters for an InventoryRecord queryset in one query.
+
+    Args:
+        queryset: InventoryRecord QuerySet (filters are kept, ordering dropped)
+
+    Returns:
+        dict: total_items, in_stock (at or above safety stock), low_stock
+        (below safety stock but not empty), out_of_stock, below_safety_stock
+        (below safety stock, empty or not) and stock_value (quantity x price)
+    """
+    below_safety = Q(quantity__lt=F('safety_stock'))
+    return queryset.order_by().aggregate(
+        total_items=Count('id'),
+        in_stock=Count('id', filter=Q(quantity__gte=F('safety_stock'))),
+        low_stock=Count('id', filter=below_safety & Q(quantity__gt=0)),
+        out_of_stock=Count('id', filter=Q(quantity=0)),
+        below_safety_stock=Count('id', filter=below_safety),
+        stock_value=Coalesce(
+            Sum(F('quantity') * F('sku__price'), output_field=DecimalField(max_digits=14, decimal_places=2)),
+            Value(Decimal('0.00')),
+            output_field=DecimalField(max_digits=14, decimal_places=2),
+        ),
+    )
+
+
+def get_inventory_summary(branch):
+    """
+    Cached status counters for every InventoryRecord of a branch.
+
+    Args:
+        branch: Branch instance
+
+    Returns:
+        dict: See summarize_inventory
+    """
+    key = INVENTORY_SUMMARY_KEY.format(
+        branch_id=branch.id, version=get_stock_version(branch.id), catalog=get_catalog_version()
+    )
+    summary = cache.get(key)
+    if summary is None:
+        summary = summarize_inventory(InventoryRecord.objects.filter(branch=branch))
+        cache.set(key, summary, INVENTORY_SUMMARY_TIMEOUT)
+    return summary
+
+
+def invalidate_inventory_summary(*branch_ids):
+    """Start a new stock version for each branch so cached counters are rebuilt"""
+    cache.set_many(
+        {STOCK_VERSION_KEY.format(branch_id=branch_id): uuid.uuid4().hex for branch_id in set(branch_ids)},
+        None
+    )
+
+
+def invalidate_inventory_summary_on_commit(*branch_ids):
+    """Invalidate once the current transaction commits (immediately outside one)"""
+    transaction.on_commit(lambda: invalidate_inventory_summary(*branch_ids))
@@ -1,3 +1,476 @@
-from django.test import TestCase
+import base64
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+from unittest import skipUnless
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import OperationalError, connection
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from .catalog import get_catalog_version, get_menu_skus
+from .models import Branch, Category, SKU, InventoryRecord, StockTransaction
+from .pagination import CursorPaginator, InvalidCursor
+from .summary import get_inventory_summary, summarize_inventory
+from .utils import (
+    apply_stock_transaction, apply_stock_transactions, get_low_stock_items, InsufficientStockError, resolve_skus,
+)
+
+
+class StockMutationTests(TestCase):
+    def setUp(self):
+        self.branch = Branch.objects.create(name='Main', code='MAIN', address='-', phone='-')
+        category = Category.objects.create(name='Classic')
+        self.sku = SKU.objects.create(name='Margherita', category=category, price=Decimal('300.00'))
+        self.other_sku = SKU.objects.create(name='Pepperoni', category=category, price=Decimal('350.00'))
+
+    def test_guarded_decrement_reports_failing_row(self):
+        apply_stock_transaction(self.branch, self.sku, 3, 'restock')
+
+        with self.assertRaises(InsufficientStockError) as ctx:
+            apply_stock_transaction(self.branch, self.sku, -5, 'sale')
+
+        self.assertEqual(ctx.exception.sku, self.sku)
+        self.assertEqual(ctx.exception.available, 3)
+        self.assertEqual(ctx.exception.requested, 5)
+        self.assertIn('Insufficient stock', str(ctx.exception))
+        self.assertEqual(InventoryRecord.objects.get(branch=self.branch, sku=self.sku).quantity, 3)
+
+    def test_bulk_lines_are_all_or_nothing(self):
+        apply_stock_transactions(self.branch, [
+            (self.sku, 5, 'restock'),
+            (self.other_sku, 1, 'restock'),
+        ])
+
+        with self.assertRaises(InsufficientStockError) as ctx:
+            apply_stock_transactions(self.branch, [
+                (self.sku, -2, 'sale'),
+                (self.other_sku, -2, 'sale'),
+            ])
+
+        self.assertEqual(ctx.exception.sku, self.other_sku)
+        quantities = dict(InventoryRecord.objects.values_list('sku_id', 'quantity'))
+        self.assertEqual(quantities, {self.sku.id: 5, self.other_sku.id: 1})
+        self.assertEqual(StockTransaction.objects.count(), 2)
+
+
+class ResolveSkusTests(TestCase):
+    def setUp(self):
+        from users.models import User
+
+        self.branch = Branch.objects.create(name='Main', code='MAIN', address='-', phone='-')
+        category = Category.objects.create(name='Classic')
+        self.sku = SKU.objects.create(name='Margherita', category=category, price=Decimal('300.00'))
+        self.other_sku = SKU.objects.create(name='Pepperoni', category=category, price=Decimal('350.00'))
+        self.retired = SKU.objects.create(name='Mango Float', category=category, price=Decimal('200.00'), is_active=False)
+        self.user = User.objects.create_user(username='cashier', password='-', role='cashier')
+        self.user.branches.add(self.branch)
+
+    def test_mixed_ids_resolve_in_one_query(self):
+        requested = [str(self.sku.id), self.other_sku.id, 'abc', None, 999999, str(self.sku.id), 'abc']
+
+        with self.assertNumQueries(1):
+            skus, missing = resolve_skus(requested)
+
+        self.assertEqual(skus, {self.sku.id: self.sku, self.other_sku.id: self.other_sku})
+        # Unknown and malformed ids, once each, in request order
+        self.assertEqual(missing, ['abc', None, 999999])
+
+    def test_inactive_skus(self):
+        requested = [self.sku.id, str(self.retired.id)]
+
+        skus, missing = resolve_skus(requested)
+        self.assertEqual((list(skus), missing), ([self.sku.id], [str(self.retired.id)]))
+
+        skus, missing = resolve_skus(requested, active_only=False)
+        self.assertEqual((sorted(skus), missing), (sorted([self.sku.id, self.retired.id]), []))
+
+    def test_pos_reports_every_unavailable_sku(self):
+        self.client.force_login(self.user)
+
+        response = self.client.post('/sales/pos/create-order/', json.dumps({'items': [
+            {'sku_id': self.sku.id, 'quantity': 1},
+            {'sku_id': self.retired.id, 'quantity': 1},
+            {'sku_id': '999999', 'quantity': 1},
+        ]}), content_type='application/json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['missing_sku_ids'], [self.retired.id, '999999'])
+
+    def test_cart_skips_unavailable_skus(self):
+        from orders.services import get_cart_from_session
+
+        session = {'cart': {
+            str(self.sku.id): {'quantity': 2, 'notes': ''},
+            str(self.retired.id): {'quantity': 1, 'notes': ''},
+            '999999': {'quantity': 1, 'notes': ''},
+        }}
+
+        with self.assertNumQueries(1):
+            cart = get_cart_from_session(session)
+
+        self.assertEqual([(item['sku'], item['quantity']) for item in cart['items']], [(self.sku, 2)])
+        self.assertEqual((cart['subtotal'], cart['count']), (Decimal('600.00'), 2))
+
+
+class AddInventoryViewTests(TestCase):
+    def setUp(self):
+        from users.models import User
+
+        self.branch = Branch.objects.create(name='Main', code='MAIN', address='-', phone='-')
+        category = Category.objects.create(name='Classic')
+        self.sku = SKU.objects.create(name='Margherita', category=category, price=Decimal('300.00'))
+        self.new_sku = SKU.objects.create(name='Pepperoni', category=category, price=Decimal('350.00'))
+        self.empty_sku = SKU.objects.create(name='Hawaiian', category=category, price=Decimal('320.00'))
+        self.user = User.objects.create_user(username='manager', password='-', role='manager')
+        self.user.branches.add(self.branch)
+        self.client.force_login(self.user)
+        apply_stock_transaction(self.branch, self.sku, 4, 'restock', user=self.user)
+
+    def test_added_stock_is_written_to_the_ledger(self):
+        response = self.client.post('/inventory/add/', {
+            'branch_id': self.branch.id,
+            'selected_skus': [self.sku.id, self.new_sku.id, self.empty_sku.id],
+            f'quantity_{self.sku.id}': 6,
+            f'quantity_{self.new_sku.id}': 3,
+            f'quantity_{self.empty_sku.id}': 0,
+            'notes': 'Delivery',
+        })
+        self.assertEqual(response.status_code, 302)
+
+        for sku, quantity in [(self.sku, 10), (self.new_sku, 3), (self.empty_sku, 0)]:
+            record = InventoryRecord.objects.get(branch=self.branch, sku=sku)
+            ledger_total = StockTransaction.objects.filter(
+                branch=self.branch, sku=sku
+            ).aggregate(total=Sum('quantity'))['total'] or 0
+            self.assertEqual((record.quantity, ledger_total), (quantity, quantity), sku.name)
+
+        restock = StockTransaction.objects.get(sku=self.new_sku)
+        self.assertEqual((restock.transaction_type, restock.user, restock.notes), ('restock', self.user, 'Delivery'))
+        self.assertIsNotNone(InventoryRecord.objects.get(branch=self.branch, sku=self.new_sku).last_restocked)
+
+
+class SKUListViewTests(TestCase):
+    def test_category_filter_lists_every_category(self):
+        from users.models import User
+
+        user = User.objects.create_user(username='manager', password='-', role='manager')
+        self.client.force_login(user)
+        active = Category.objects.create(name='Classic')
+        retired = Category.objects.create(name='Seasonal', is_active=False)
+        SKU.objects.create(name='Margherita', category=active, price=Decimal('300.00'))
+        SKU.objects.create(name='Mango Float', category=retired, price=Decimal('200.00'), is_active=False)
+
+        response = self.client.get('/inventory/skus/', {'category': retired.id})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([c.name for c in response.context['categories']], ['Classic', 'Seasonal'])
+        self.assertEqual([sku.name for sku in response.context['page_obj']], ['Mango Float'])
+
+
+class InventorySummaryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.branch = Branch.objects.create(name='Main', code='MAIN', address='-', phone='-')
+        self.other_branch = Branch.objects.create(name='North', code='NORTH', address='-', phone='-')
+        category = Category.objects.create(name='Classic')
+        self.skus = {}
+        for name, price, quantity in [
+            ('Plenty', '100.00', 20),
+            ('Exact', '50.00', 10),
+            ('Low', '200.00', 5),
+            ('Empty', '300.00', 0),
+        ]:
+            sku = SKU.objects.create(name=name, category=category, price=Decimal(price))
+            InventoryRecord.objects.create(branch=self.branch, sku=sku, quantity=quantity, safety_stock=10)
+            self.skus[name] = sku
+        InventoryRecord.objects.create(branch=self.other_branch, sku=self.skus['Empty'], quantity=99)
+
+    def test_counters(self):
+        self.assertEqual(summarize_inventory(InventoryRecord.objects.filter(branch=self.branch)), {
+            'total_items': 4,
+            'in_stock': 2,  # At or above safety stock
+            'low_stock': 1,
+            'out_of_stock': 1,
+            'below_safety_stock': 2,
+            'stock_value': Decimal('3500.00'),  # 20 x 100 + 10 x 50 + 5 x 200
+        })
+        empty = summarize_inventory(InventoryRecord.objects.none())
+        self.assertEqual((empty['total_items'], empty['stock_value']), (0, Decimal('0.00')))
+
+    def test_cache_is_rebuilt_after_committed_changes(self):
+        summary = get_inventory_summary(self.branch)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_inventory_summary(self.branch), summary)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            apply_stock_transaction(self.branch, self.skus['Empty'], 4, 'restock')
+            # Still the cached counters until the transaction commits
+            self.assertEqual(get_inventory_summary(self.branch)['out_of_stock'], 1)
+        summary = get_inventory_summary(self.branch)
+        self.assertEqual((summary['out_of_stock'], summary['low_stock']), (0, 2))
+        self.assertEqual(summary['stock_value'], Decimal('4700.00'))
+
+        # Price changes reach the stock value through the catalog version
+        with self.captureOnCommitCallbacks(execute=True):
+            self.skus['Plenty'].price = Decimal('110.00')
+            self.skus['Plenty'].save()
+        self.assertEqual(get_inventory_summary(self.branch)['stock_value'], Decimal('4900.00'))
+
+    def test_invalidation_is_per_branch(self):
+        get_inventory_summary(self.branch)
+        get_inventory_summary(self.other_branch)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            apply_stock_transaction(self.other_branch, self.skus['Empty'], -9, 'sale')
+
+        with self.assertNumQueries(0):
+            get_inventory_summary(self.branch)
+        with self.assertNumQueries(1):
+            self.assertEqual(get_inventory_summary(self.other_branch)['stock_value'], Decimal('27000.00'))
+
+
+class CatalogTests(TestCase):
+    """SKU and Category changes must reach the cached menu snapshot once committed"""
+
+    def setUp(self):
+        from users.models import User
+
+        cache.clear()
+        self.branch = Branch.objects.create(name='Main', code='MAIN', address='-', phone='-')
+        self.category = Category.objects.create(name='Classic')
+        self.sku = SKU.objects.create(name='Margherita', category=self.category, price=Decimal('300.00'))
+        self.user = User.objects.create_user(username='cashier', password='-', role='cashier')
+        self.user.branches.add(self.branch)
+
+    def _assert_bumps_version(self, change):
+        version = get_catalog_version()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            change()
+            self.assertEqual(get_catalog_version(), version)  # Not before the commit
+        self.assertTrue(callbacks)
+        self.assertNotEqual(get_catalog_version(), version)
+
+    def test_sku_and_category_signals_bump_the_version(self):
+        other = Category.objects.create(name='Specials')
+        extra = SKU.objects.create(name='Hawaiian', category=self.category, price=Decimal('320.00'))
+
+        def save_sku():
+            self.sku.price = Decimal('310.00')
+            self.sku.save()
+
+        self._assert_bumps_version(save_sku)
+        self._assert_bumps_version(extra.delete)
+        self._assert_bumps_version(lambda: Category.objects.create(name='Desserts'))
+        self._assert_bumps_version(other.delete)
+
+    def test_pos_and_menu_reflect_catalog_changes(self):
+        self.client.force_login(self.user)
+        self.assertEqual([sku['name'] for sku in get_menu_skus()], ['Margherita'])
+        self.client.get('/sales/pos/')
+        self.client.get('/order/MAIN/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sku.name = 'Margherita Classica'
+            self.sku.price = Decimal('325.00')
+            self.sku.save()
+            SKU.objects.create(name='Pepperoni', category=self.category, price=Decimal('350.00'))
+            self.category.name = 'Classics'
+            self.category.save()
+
+        self.assertEqual(
+            [(sku['name'], sku['price'], sku['category_name']) for sku in get_menu_skus()],
+            [('Margherita Classica', Decimal('325.00'), 'Classics'), ('Pepperoni', Decimal('350.00'), 'Classics')],
+        )
+        response = self.client.get('/sales/pos/')
+        self.assertEqual(
+            [sku['name'] for category in response.context['categories'] for sku in category['skus']],
+            ['Margherita Classica', 'Pepperoni'],
+        )
+        response = self.client.get('/order/MAIN/')
+        self.assertContains(response, 'Margherita Classica')
+        self.assertContains(response, 'Pepperoni')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sku.is_active = False
+            self.sku.save()
+        self.assertNotContains(self.client.get('/order/MAIN/'), 'Margherita Classica')
+
+
+class CursorPaginatorTests(TestCase):
+    def setUp(self):
+        branch = Branch.objects.create(name='Main', code='MAIN', address='-', phone='-')
+        sku = SKU.objects.create(
+            name='Margherita', category=Category.objects.create(name='Classic'), price=Decimal('300.00')
+        )
+        for _ in range(7):
+            apply_stock_transaction(branch, sku, 1, 'restock')
+        # Three rows share each timestamp, so pages must break ties on id
+        transactions = list(StockTransaction.objects.order_by('id'))
+        base = transactions[0].created_at
+        for i, transaction in enumerate(transactions):
+            StockTransaction.objects.filter(id=transaction.id).update(
+                created_at=base + timedelta(minutes=i // 3)
+            )
+        self.queryset = StockTransaction.objects.all()
+        self.expected = list(self.queryset.order_by('-created_at', '-id').values_list('id', flat=True))
+
+    def _ids(self, page):
+        return [transaction.id for transaction in page]
+
+    def test_pages_cover_every_row_once_across_ties(self):
+        paginator = CursorPaginator(self.queryset, 3)
+        first = paginator.page()
+        self.assertFalse(first.has_previous())
+
+        pages = [first]
+        while pages[-1].has_next():
+            pages.append(paginator.page(pages[-1].next_cursor))
+        self.assertEqual([self._ids(page) for page in pages], [self.expected[:3], self.expected[3:6], self.expected[6:]])
+        self.assertFalse(pages[-1].has_next())
+
+        # Walking back returns the same pages, ending on one with no previous
+        back = [pages[-1]]
+        while back[-1].has_previous():
+            back.append(paginator.page(back[-1].previous_cursor))
+        self.assertEqual([self._ids(page) for page in reversed(back)], [self._ids(page) for page in pages])
+        self.assertTrue(back[-1].has_next())
+
+    def test_cursor_round_trip(self):
+        paginator = CursorPaginator(self.queryset, 3)
+        page = paginator.page()
+        last = page.object_list[-1]
+
+        self.assertNotIn('=', page.next_cursor)
+        self.assertEqual(paginator._decode(page.next_cursor), ('n', [last.created_at, last.id]))
+        self.assertEqual(paginator._decode(paginator._encode(last, 'p')), ('p', [last.created_at, last.id]))
+
+    def test_bad_cursors_fall_back_to_the_first_page(self):
+        paginator = CursorPaginator(self.queryset, 3)
+
+        def encode(payload):
+            return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+        for cursor in [
+            'not-a-cursor',
+            encode(['x', ['2026-01-01 00:00:00+00:00', '1']]),  # Unknown direction
+            encode(['n', ['1']]),  # Wrong number of values
+            encode(['n', ['yesterday', '1']]),  # Not a timestamp
+            encode({'n': 1}),
+        ]:
+            with self.assertRaises(InvalidCursor, msg=cursor):
+                paginator.page(cursor)
+            page = paginator.get_page(cursor)
+            self.assertEqual(self._ids(page), self.expected[:3], cursor)
+            self.assertFalse(page.has_previous())
+
+    def test_count_modes(self):
+        self.assertEqual(CursorPaginator(self.queryset, 3).page().count, None)
+        for count, expected in [('exact', (7, False)), (50, (7, False)), (7, (7, False)), (5, (5, True))]:
+            page = CursorPaginator(self.queryset, 3, count=count).page()
+            self.assertEqual((page.count, page.count_is_capped), expected, count)
+
+    def test_mixed_ordering_directions_are_rejected(self):
+        with self.assertRaises(ValueError):
+            CursorPaginator(self.queryset, 3, ordering=('-created_at', 'id'))
+
+
+class ConcurrentStockMutationTests(TransactionTestCase):
+    workers = 8
+    attempts = 80
+    initial_stock = 50
+
+    def setUp(self):
+        self.branch = Branch.objects.create(name='Main', code='MAIN', address='-', phone='-')
+        category = Category.objects.create(name='Classic')
+        self.sku = SKU.objects.create(name='Margherita', category=category, price=Decimal('300.00'))
+        apply_stock_transaction(self.branch, self.sku, self.initial_stock, 'restock')
+
+    def _sell_one(self, _):
+        try:
+            while True:
+                try:
+                    apply_stock_transaction(self.branch, self.sku, -1, 'sale')
+                    return True
+                except InsufficientStockError:
+                    return False
+                except OperationalError:
+                    # SQLite's shared in-memory test database rejects concurrent
+                    # writers outright instead of waiting; retry like a busy till
+                    time.sleep(0.001)
+        finally:
+            connection.close()
+
+    def test_concurrent_decrements_match_ledger(self):
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            results = list(pool.map(self._sell_one, range(self.attempts)))
+
+        inventory = InventoryRecord.objects.get(branch=self.branch, sku=self.sku)
+        ledger_total = StockTransaction.objects.filter(
+            branch=self.branch, sku=self.sku
+        ).aggregate(total=Sum('quantity'))['total']
+
+        self.assertEqual(sum(results), self.initial_stock)
+        self.assertEqual(inventory.quantity, 0)
+        self.assertEqual(ledger_total, inventory.quantity)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Plans are checked with SQLite EXPLAIN QUERY PLAN')
+class QueryPlanTests(TestCase):
+    """Stock views must reach StockTransaction and InventoryRecord through indexes"""
+    tables = ('inventory_stocktransaction', 'inventory_inventoryrecord')
+
+    def setUp(self):
+        from users.models import User
+
+        self.branch = Branch.objects.create(name='Main', code='MAIN', address='-', phone='-')
+        category = Category.objects.create(name='Classic')
+        self.sku = SKU.objects.create(name='Margherita', category=category, price=Decimal('300.00'))
+        self.user = User.objects.create_user(username='admin', password='-', role='admin')
+        self.user.branches.add(self.branch)
+        apply_stock_transaction(self.branch, self.sku, 5, 'restock', user=self.user)
+        self.client.force_login(self.user)
+
+    def _plans(self, urls):
+        """Run EXPLAIN QUERY PLAN for every SELECT on the stock tables the URLs issue"""
+        with CaptureQueriesContext(connection) as captured:
+            for url in urls:
+                self.assertEqual(self.client.get(url).status_code, 200, url)
+            list(get_low_stock_items())
+
+        plans = []
+        with connection.cursor() as cursor:
+            for query in captured.captured_queries:
+                sql = query['sql']
+                if sql.startswith('SELECT') and any(table in sql for table in self.tables):
+                    cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                    plans.append((sql, [row[-1] for row in cursor.fetchall()]))
+        return plans
+
+    def test_stock_views_use_indexes(self):
+        plans = self._plans([
+            '/inventory/',
+            '/inventory/transactions/',
+            '/inventory/transactions/?type=restock',
+            f'/inventory/transactions/?sku={self.sku.id}',
+            f'/branches/stock/{self.branch.id}/',
+            f'/branches/stock/{self.branch.id}/?status=low',
+            f'/branches/stock/{self.branch.id}/?status=out',
+        ])
+        self.assertTrue(plans)
+
+        full_scan = re.compile(r'^SCAN (%s)$' % '|'.join(self.tables))
+        for sql, plan in plans:
+            self.assertFalse([step for step in plan if full_scan.match(step)], f"{sql}\n{plan}")
+            if 'FROM "inventory_stocktransaction"' in sql and 'ORDER BY' in sql:
+                self.assertTrue(any('stocktxn_' in step for step in plan), f"{sql}\n{plan}")
+                self.assertNotIn('USE TEMP B-TREE FOR ORDER BY', plan, sql)
+
+        used = ' '.join(step for _, plan in plans for step in plan)
+        self.assertIn('inventory_low_stock_idx', used)
+        self.assertIn('inventory_out_of_stock_idx', used)
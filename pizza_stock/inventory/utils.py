@@ -1,10 +1,58 @@
 from django.db import transaction
+from django.db.models import Case, F, Q, Value, When
 from django.utils import timezone
-from .models import InventoryRecord, StockTransaction
+from .models import SKU, InventoryRecord, StockTransaction
+from .summary import invalidate_inventory_summary_on_commit
 import qrcode
 from io import BytesIO
 from django.core.files import File
 
+class InsufficientStockError(ValueError):
+    """Raised when a stock movement would take an InventoryRecord below zero"""
+    
+    def __init__(self, branch, sku, available, requested):
+        self.branch = branch
+        self.sku = sku
+        self.available = available
+        self.requested = requested
+        super().__init__(
+            f"Insufficient stock for {sku.name}. Available: {available}, Requested: {requested}"
+        )
+
+class _StockGuardFailed(Exception):
+    """Internal signal used to roll back a partially applied bulk UPDATE"""
+
+def apply_stock_delta(branch, sku, qty, restock=False):
+    """
+    Change an InventoryRecord's quantity with one guarded UPDATE.
+    
+    The check and the change happen in the database
+    (quantity = quantity + qty WHERE quantity + qty >= 0), so concurrent
+    callers can never overwrite each other's changes.
+    
+    Args:
+        branch: Branch instance
+        sku: SKU instance
+        qty: Quantity (positive for addition, negative for deduction)
+        restock: Also stamp last_restocked (optional)
+    
+    Returns:
+        int: Number of rows updated (0 if the record is missing or the guard failed)
+    """
+    now = timezone.now()
+    update_fields = {'quantity': F('quantity') + qty, 'updated_at': now}
+    if restock:
+        update_fields['last_restocked'] = now
+    
+    updated = InventoryRecord.objects.filter(
+        branch=branch,
+        sku=sku,
+        quantity__gte=-qty
+    ).update(**update_fields)
+    if updated:
+        invalidate_inventory_summary_on_commit(branch.id)
+    return updated
+
 @transaction.atomic
 def apply_stock_transaction(branch, sku, qty, txn_type, user=None, notes=''):
     """
@@ -21,27 +69,20 @@ def apply_stock_transaction(branch, sku, qty, txn_type, user=None, notes=''):
     Returns:
         tuple: (InventoryRecord, StockTransaction)
     """
-    # Get or create inventory record
-    inventory, created = InventoryRecord.objects.get_or_create(
-        branch=branch,
-        sku=sku,
-        defaults={'quantity': 0}
-    )
-    
-    # Update quantity
-    new_quantity = inventory.quantity + qty
-    
-    # Prevent negative stock
-    if new_quantity < 0:
-        raise ValueError(f"Insufficient stock. Available: {inventory.quantity}, Requested: {abs(qty)}")
+    restock = txn_type == 'restock'
     
-    inventory.quantity = new_quantity
-    
-    # Update last restocked date for restock transactions
-    if txn_type == 'restock':
-        inventory.last_restocked = timezone.now()
+    if not apply_stock_delta(branch, sku, qty, restock=restock):
+        # Either the record does not exist yet or the guard failed
+        inventory, created = InventoryRecord.objects.get_or_create(
+            branch=branch,
+            sku=sku,
+            defaults={'quantity': 0}
+        )
+        if not apply_stock_delta(branch, sku, qty, restock=restock):
+            inventory.refresh_from_db(fields=['quantity'])
+            raise InsufficientStockError(branch, sku, inventory.quantity, abs(qty))
     
-    inventory.save()
+    inventory = InventoryRecord.objects.get(branch=branch, sku=sku)
     
     # Create transaction log
     transaction_log = StockTransaction.objects.create(
@@ -55,6 +96,168 @@ def apply_stock_transaction(branch, sku, qty, txn_type, user=None, notes=''):
     
     return inventory, transaction_log
 
+def _lock_inventory_records(branch, sku_ids):
+    """Lock the branch's InventoryRecord rows for sku_ids, ordered by SKU id"""
+    return {
+        record.sku_id: record
+        for record in InventoryRecord.objects.select_for_update().filter(
+            branch=branch,
+            sku_id__in=sku_ids
+        ).order_by('sku_id')
+    }
+
+@transaction.atomic
+def apply_stock_transactions(branch, lines, user=None, notes=''):
+    """
+    Apply several stock movements for one branch in a constant number of queries.
+    
+    Every affected InventoryRecord is locked in SKU id order (so concurrent
+    callers cannot deadlock or lose updates), every line is checked before
+    anything is written, the deltas are applied with a single UPDATE and the
+    ledger is written with a single bulk insert.
+    
+    Args:
+        branch: Branch instance
+        lines: Iterable of (sku, qty, txn_type) or (sku, qty, txn_type, notes)
+        user: User performing the transactions (optional)
+        notes: Default notes for lines that carry none (optional)
+    
+    Returns:
+        tuple: (list of InventoryRecord, list of StockTransaction), one
+        InventoryRecord per distinct SKU and one StockTransaction per line
+    """
+    lines = [tuple(line) + (notes,) * (4 - len(line)) for line in lines]
+    if not lines:
+        return [], []
+    
+    # Net change and restock flag per SKU (a SKU may appear on several lines)
+    deltas = {}
+    restocked = set()
+    skus = {}
+    for sku, qty, txn_type, _ in lines:
+        skus[sku.id] = sku
+        deltas[sku.id] = deltas.get(sku.id, 0) + qty
+        if txn_type == 'restock':
+            restocked.add(sku.id)
+    sku_ids = sorted(deltas)
+    
+    # Lock existing rows, creating any missing ones first
+    records = _lock_inventory_records(branch, sku_ids)
+    missing = [sku_id for sku_id in sku_ids if sku_id not in records]
+    if missing:
+        InventoryRecord.objects.bulk_create(
+            [InventoryRecord(branch=branch, sku_id=sku_id, quantity=0) for sku_id in missing],
+            ignore_conflicts=True
+        )
+        records = _lock_inventory_records(branch, sku_ids)
+    
+    # Prevent negative stock before writing anything
+    for sku_id in sku_ids:
+        inventory = records[sku_id]
+        if inventory.quantity + deltas[sku_id] < 0:
+            raise InsufficientStockError(
+                branch, skus[sku_id], inventory.quantity, abs(deltas[sku_id])
+            )
+    
+    # Apply all deltas in one conditional UPDATE, guarded per row so a backend
+    # without row locks still cannot go negative
+    now = timezone.now()
+    changed = [sku_id for sku_id in sku_ids if deltas[sku_id] or sku_id in restocked]
+    if changed:
+        update_fields = {
+            'quantity': Case(
+                *[When(sku_id=sku_id, then=F('quantity') + deltas[sku_id]) for sku_id in changed],
+                default=F('quantity')
+            ),
+            'updated_at': now,
+        }
+        if restocked:
+            update_fields['last_restocked'] = Case(
+                *[When(sku_id=sku_id, then=Value(now)) for sku_id in restocked],
+                default=F('last_restocked')
+            )
+        guard = Q()
+        for sku_id in changed:
+            guard |= Q(pk=records[sku_id].pk, quantity__gte=-deltas[sku_id])
+        
+        try:
+            with transaction.atomic():
+                updated = InventoryRecord.objects.filter(guard).update(**update_fields)
+                if updated != len(changed):
+                    raise _StockGuardFailed
+        except _StockGuardFailed:
+            # The savepoint is rolled back; report the row whose guard failed
+            current = dict(
+                InventoryRecord.objects.filter(
+                    pk__in=[records[sku_id].pk for sku_id in changed]
+                ).values_list('sku_id', 'quantity')
+            )
+            failed = next(
+                (sku_id for sku_id in changed if current[sku_id] + deltas[sku_id] < 0),
+                changed[0]
+            )
+            raise InsufficientStockError(
+                branch, skus[failed], current[failed], abs(deltas[failed])
+            )
+    
+    # Mirror the update on the locked instances
+    for sku_id in sku_ids:
+        inventory = records[sku_id]
+        inventory.quantity += deltas[sku_id]
+        if sku_id in restocked:
+            inventory.last_restocked = now
+        if sku_id in changed:
+            inventory.updated_at = now
+    
+    if changed or missing:
+        invalidate_inventory_summary_on_commit(branch.id)
+    
+    # Write the ledger in one insert
+    transaction_logs = StockTransaction.objects.bulk_create([
+        StockTransaction(
+            branch=branch,
+            sku=sku,
+            quantity=qty,
+            transaction_type=txn_type,
+            notes=line_notes,
+            user=user
+        )
+        for sku, qty, txn_type, line_notes in lines
+    ])
+    
+    return [records[sku_id] for sku_id in sku_ids], transaction_logs
+
+def resolve_skus(sku_ids, active_only=True):
+    """
+    Fetch SKUs by id with a single query.
+    
+    Args:
+        sku_ids: Iterable of SKU ids (ints or numeric strings)
+        active_only: Treat inactive SKUs as missing (default True)
+    
+    Returns:
+        tuple: (dict of id -> SKU, list of requested ids that are missing,
+        inactive or malformed, in request order)
+    """
+    requested = []
+    for sku_id in sku_ids:
+        try:
+            requested.append((sku_id, int(sku_id)))
+        except (TypeError, ValueError):
+            requested.append((sku_id, None))
+    
+    queryset = SKU.objects.all()
+    if active_only:
+        queryset = queryset.filter(is_active=True)
+    skus = queryset.in_bulk({pk for _, pk in requested if pk is not None})
+    
+    missing = []
+    for sku_id, pk in requested:
+        if pk not in skus and sku_id not in missing:
+            missing.append(sku_id)
+    
+    return skus, missing
+
 def generate_branch_qr(branch):
     """
     Generate QR code for branch ordering URL.
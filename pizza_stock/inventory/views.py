@@ -4,7 +4,12 @@ from django.contrib import messages
 from django.db.models import Q, Sum, F
 from django.core.paginator import Paginator
 from .models import Branch, Category, SKU, InventoryRecord, StockTransaction
-from .utils import apply_stock_transaction, generate_branch_qr, get_low_stock_items
+from .utils import (
+    apply_stock_transaction, apply_stock_transactions, generate_branch_qr, get_low_stock_items, resolve_skus,
+)
+from .catalog import get_menu_categories, get_menu_skus
+from .pagination import CursorPaginator
+from .summary import get_inventory_summary, invalidate_inventory_summary_on_commit
 from django.template.loader import render_to_string
 from django.http import JsonResponse
 from django.template.loader import render_to_string
@@ -98,13 +103,15 @@ def inventory_dashboard(request):
         branch=branch
     ).select_related('sku', 'user')[:10]
     
+    summary = get_inventory_summary(branch)
+    
     context = {
         'inventory': inventory,
-        'low_stock_count': low_stock.count(),
+        'low_stock_count': summary['below_safety_stock'],
         'low_stock_items': low_stock[:5],
         'recent_transactions': recent_txns,
-        'total_items': inventory.count(),
-        'out_of_stock': inventory.filter(quantity=0).count(),
+        'total_items': summary['total_items'],
+        'out_of_stock': summary['out_of_stock'],
     }
     
     return render(request, 'inventory/dashboard.html', context)
@@ -126,6 +133,7 @@ def sku_list(request):
     page_obj = paginator.get_page(page_number)
 
     context = {
+        # Every category, not just the menu's, since the list shows inactive SKUs too
         'categories': Category.objects.all(),
         'page_obj': page_obj,
         'query': query,
@@ -203,11 +211,11 @@ def add_sku(request):
 @login_required
 def add_inventory(request):
     """Add one or multiple SKUs to a specific branch inventory"""
-    from inventory.models import SKU, InventoryRecord as Inventory, Branch
+    from inventory.models import InventoryRecord as Inventory, Branch
 
     branches = Branch.objects.filter(is_active=True)
-    skus = SKU.objects.filter(is_active=True)
-    categories = {sku.category for sku in skus}
+    categories = get_menu_categories()
+    skus = get_menu_skus()
 
     if request.method == 'POST':
         branch_id = request.POST.get('branch_id')
@@ -220,28 +228,33 @@ def add_inventory(request):
 
         branch = get_object_or_404(Branch, id=branch_id)
 
-        added_count = 0
-        with transaction.atomic():
-            for sku_id in selected_skus:
-                quantity = int(request.POST.get(f'quantity_{sku_id}', 0))
-                if quantity < 0:
-                    quantity = 0
+        found, missing = resolve_skus(selected_skus, active_only=False)
+        if missing:
+            messages.error(request, f"SKU not found: {', '.join(str(sku_id) for sku_id in missing)}")
+            return redirect('inventory:add_inventory')
 
-                sku = get_object_or_404(SKU, id=sku_id)
+        # Stock goes through the ledger like every other movement; SKUs added
+        # with no quantity just get an empty inventory record
+        lines = []
+        empty = []
+        for sku_id in selected_skus:
+            sku = found[int(sku_id)]
+            quantity = max(0, int(request.POST.get(f'quantity_{sku_id}', 0) or 0))
+            if quantity:
+                lines.append((sku, quantity, 'restock'))
+            else:
+                empty.append(sku)
 
-                inventory, created = Inventory.objects.get_or_create(
-                    branch=branch,
-                    sku=sku,
-                    defaults={'quantity': quantity, 'safety_stock': 10, 'notes': notes}
+        with transaction.atomic():
+            if empty:
+                Inventory.objects.bulk_create(
+                    [Inventory(branch=branch, sku=sku, quantity=0) for sku in empty],
+                    ignore_conflicts=True
                 )
+                invalidate_inventory_summary_on_commit(branch.id)
+            apply_stock_transactions(branch, lines, user=request.user, notes=notes or 'Added to inventory')
 
-                if not created:
-                    inventory.quantity += quantity
-                    inventory.save()
-
-                added_count += 1
-
-        messages.success(request, f"{added_count} item(s) successfully added to {branch.name}'s inventory.")
+        messages.success(request, f"{len(found)} item(s) successfully added to {branch.name}'s inventory.")
         return redirect('inventory:dashboard')
 
     context = {
@@ -354,9 +367,9 @@ def transaction_history(request):
     if sku_id:
         transactions = transactions.filter(sku_id=sku_id)
     
-    paginator = Paginator(transactions, 30)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination: no OFFSET, and the total is only counted up to 1000
+    paginator = CursorPaginator(transactions, 30, count=1000)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
     
     skus = SKU.objects.filter(is_active=True).order_by('name')
     
@@ -0,0 +1,206 @@
+"""
+Live order events.
+
+The order services publish a small JSON event whenever an order is created
+or changes status, once the transaction commits. Staff boards and the
+customer status page read them as server-sent events (SSE) from async
+views served by config.asgi, one channel per branch.
+
+Events fan out through a broker. LocalBroker keeps subscribers in process
+memory, which is enough for a single ASGI process and for tests; set
+ORDER_EVENTS_REDIS_URL to use Redis pub/sub so every process sees every
+event.
+"""
+
+import asyncio
+import json
+import threading
+
+from django.conf import settings
+from django.db import transaction
+
+ORDER_EVENTS_CHANNEL = 'orders:events:{branch_id}'
+ORDER_EVENTS_KEEPALIVE = 15  # Seconds between keep-alive comments
+ORDER_EVENTS_RETRY = 3000  # Milliseconds before browsers reconnect
+ORDER_EVENTS_QUEUE_SIZE = 100  # Events buffered per subscriber before dropping
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+class LocalSubscription:
+    """Events on one channel of a LocalBroker"""
+
+    def __init__(self, broker, channel):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=ORDER_EVENTS_QUEUE_SIZE)
+
+    def offer(self, message):
+        """Queue a message from any thread, dropping it if the subscriber is too far behind"""
+        def put():
+            try:
+                self.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                pass
+
+        try:
+            self.loop.call_soon_threadsafe(put)
+        except RuntimeError:
+            # The subscriber's event loop has already closed
+            self.broker.unsubscribe(self)
+
+    async def get(self, timeout=None):
+        """Next message, or None if nothing arrives within `timeout` seconds"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker:
+    """In-process publish/subscribe; publish() may be called from any thread"""
+
+    def __init__(self):
+        self._subscriptions = {}
+        self._lock = threading.Lock()
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.offer(message)
+
+    async def subscribe(self, channel):
+        subscription = LocalSubscription(self, channel)
+        with self._lock:
+            self._subscriptions.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self._subscriptions.pop(subscription.channel, None)
+
+
+class RedisSubscription:
+    """Events on one Redis pub/sub channel"""
+
+    def __init__(self, client, pubsub):
+        self.client = client
+        self.pubsub = pubsub
+
+    async def get(self, timeout=None):
+        """Next message, or None if nothing arrives within `timeout` seconds"""
+        message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        if message is None:
+            return None
+        data = message['data']
+        return data.decode() if isinstance(data, bytes) else data
+
+    async def close(self):
+        await self.pubsub.aclose()
+        await self.client.aclose()
+
+
+class RedisBroker:
+    """Redis pub/sub, so events published in one process reach subscribers in all of them"""
+
+    def __init__(self, url):
+        import redis
+
+        self.url = url
+        self.client = redis.Redis.from_url(url)
+
+    def publish(self, channel, message):
+        self.client.publish(channel, message)
+
+    async def subscribe(self, channel):
+        from redis import asyncio as aioredis
+
+        client = aioredis.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(channel)
+        return RedisSubscription(client, pubsub)
+
+
+def get_broker():
+    """The process-wide broker (Redis if ORDER_EVENTS_REDIS_URL is set, else local)"""
+    global _broker
+
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                url = getattr(settings, 'ORDER_EVENTS_REDIS_URL', '')
+                _broker = RedisBroker(url) if url else LocalBroker()
+    return _broker
+
+
+def order_channel(branch_id):
+    return ORDER_EVENTS_CHANNEL.format(branch_id=branch_id)
+
+
+def order_event(order, event, previous_status=None):
+    """
+    Event payload for an order.
+
+    Args:
+        order: Order instance
+        event: 'created' or 'status'
+        previous_status: Status before the change (for 'status' events)
+
+    Returns:
+        dict: JSON-serialisable event
+    """
+    return {
+        'event': event,
+        'id': order.id,
+        'order_number': order.order_number,
+        'branch_id': order.branch_id,
+        'status': order.status,
+        'status_display': order.get_status_display(),
+        'previous_status': previous_status,
+        'total_amount': str(order.total_amount),
+        'updated_at': order.updated_at.isoformat() if order.updated_at else None,
+    }
+
+
+def publish_order_event(order, event, previous_status=None):
+    """
+    Publish an order event once the current transaction commits.
+
+    A failing broker is logged by Django and never breaks the order flow.
+    """
+    channel = order_channel(order.branch_id)
+    message = json.dumps(order_event(order, event, previous_status))
+    transaction.on_commit(lambda: get_broker().publish(channel, message), robust=True)
+
+
+async def event_stream(branch_id, order_id=None):
+    """
+    Server-sent event stream of a branch's order events.
+
+    Args:
+        branch_id: Branch to follow
+        order_id: Only pass on events for this order (optional)
+
+    Yields:
+        str: SSE frames, with a keep-alive comment when the branch is quiet
+    """
+    subscription = await get_broker().subscribe(order_channel(branch_id))
+    try:
+        yield f"retry: {ORDER_EVENTS_RETRY}\n\n"
+        while True:
+            message = await subscription.get(timeout=ORDER_EVENTS_KEEPALIVE)
+            if message is None:
+                yield ": keep-alive\n\n"
+            elif order_id is None or json.loads(message)['id'] == order_id:
+                yield f"data: {message}\n\n"
+    finally:
+        await subscription.close()
@@ -0,0 +1,67 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from inventory.catalog import invalidate_catalog
+from inventory.models import Branch
+
+LOCAL_CACHE_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+class Command(BaseCommand):
+    help = "Benchmark the public QR menu on catalog cache misses and cache hits"
+
+    def add_arguments(self, parser):
+        parser.add_argument('branch_code', nargs='?', help='Branch code (defaults to the first active branch)')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per run (default 200)')
+        parser.add_argument('--force', action='store_true', help='Run against a shared cache backend (the miss run invalidates its catalog)')
+
+    def handle(self, *args, **options):
+        backend = settings.CACHES['default']['BACKEND']
+        if backend not in LOCAL_CACHE_BACKENDS and not options['force']:
+            raise CommandError(
+                f'The cache backend is {backend}. The miss run invalidates the catalog for every process '
+                'sharing it; use a local cache or pass --force.'
+            )
+
+        branch_code = options['branch_code']
+        if branch_code:
+            branch = Branch.objects.filter(code=branch_code, is_active=True).first()
+        else:
+            branch = Branch.objects.filter(is_active=True).first()
+        if branch is None:
+            raise CommandError('No active branch found.')
+
+        url = reverse('orders_public:menu', args=[branch.code])
+        client = Client(HTTP_HOST='localhost')
+        count = options['requests']
+
+        # Cache miss: every request rebuilds the catalog and re-renders the menu body
+        miss = self._run(client, url, count, before_each=invalidate_catalog)
+
+        # Cache hit: catalog snapshot and menu fragment are served from cache
+        client.get(url)
+        hit = self._run(client, url, count)
+
+        self.stdout.write(f"Menu benchmark for {branch.code} ({count} requests each)")
+        self.stdout.write(f"  cache miss: {miss:8.1f} req/s")
+        self.stdout.write(f"  cache hit:  {hit:8.1f} req/s")
+        self.stdout.write(self.style.SUCCESS(f"  speedup:    {hit / miss:8.2f}x"))
+
+    def _run(self, client, url, count, before_each=None):
+        elapsed = 0.0
+        for _ in range(count):
+            if before_each:
+                before_each()
+            start = time.perf_counter()
+            response = client.get(url)
+            elapsed += time.perf_counter() - start
+            if response.status_code != 200:
+                raise CommandError(f'{url} returned {response.status_code}')
+        return count / elapsed
@@ -20,6 +20,8 @@ class Order(models.Model):
         ('paymaya', 'PayMaya'),
     ]
     
+    TAX_RATE = Decimal('0.12')  # 12% VAT
+    
     order_number = models.CharField(max_length=20, unique=True, editable=False)
     branch = models.ForeignKey('inventory.Branch', on_delete=models.CASCADE, related_name='orders')
     customer_name = models.CharField(max_length=100, blank=True)
@@ -67,11 +69,15 @@ class Order(models.Model):
     
     def calculate_totals(self):
         """Calculate subtotal, tax, and total"""
-        self.subtotal = sum(item.get_total() for item in self.items.all())
-        self.tax = self.subtotal * Decimal('0.12')  # 12% VAT
-        self.total_amount = self.subtotal + self.tax
+        self.set_totals(sum(item.get_total() for item in self.items.all()))
         self.save()
     
+    def set_totals(self, subtotal):
+        """Set subtotal, tax, and total from a subtotal without saving"""
+        self.subtotal = subtotal
+        self.tax = self.subtotal * self.TAX_RATE
+        self.total_amount = self.subtotal + self.tax
+    
     def can_cancel(self):
         """Check if order can be cancelled"""
         return self.status in ['pending', 'paid']
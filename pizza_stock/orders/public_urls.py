@@ -12,6 +12,7 @@ urlpatterns = [
     # Cart actions
     path('api/add-to-cart/', views.add_to_cart_view, name='add_to_cart'),
     path('api/update-cart/', views.update_cart_view, name='update_cart'),
+    path('api/cart-summary/', views.cart_summary_view, name='cart_summary'),
     
     # Payment
     path('payment/process/<int:payment_id>/', views.payment_process, name='payment_process'),
@@ -21,4 +22,5 @@ urlpatterns = [
     # Order tracking
     path('confirmation/<str:order_number>/', views.order_confirmation, name='order_confirmation'),
     path('status/<str:order_number>/', views.order_status, name='order_status'),
+    path('status/<str:order_number>/events/', views.order_status_events, name='order_status_events'),
 ]
\ No newline at end of file
@@ -1,50 +1,101 @@
+from django.core.cache import cache
 from django.db import transaction
+from django.db.models import Count, Prefetch
 from django.utils import timezone
 from .models import Order, OrderItem, Payment
-from sales.services import record_sale
+from .events import publish_order_event
+from sales.services import record_sales
+from inventory.utils import resolve_skus
+from collections import Counter
+from decimal import Decimal
 import uuid
 
+ORDER_STATUS_VERSION_KEY = 'orders:status_version:{branch_id}'
+ORDER_STATUS_COUNTS_KEY = 'orders:status_counts:{branch_id}:{version}'
+ORDER_STATUS_COUNTS_TIMEOUT = 60 * 10  # 10 minutes
+
+def orders_with_items(queryset=None):
+    """
+    Load orders for display with a fixed number of queries.
+    
+    The branch is joined and the items, with their SKUs, are prefetched in
+    one extra query, so rendering any number of orders and lines costs two
+    queries in total.
+    
+    Args:
+        queryset: Order QuerySet to extend (defaults to all orders)
+    
+    Returns:
+        QuerySet: Orders with branch, items and items' SKUs loaded
+    """
+    if queryset is None:
+        queryset = Order.objects.all()
+    return queryset.select_related('branch').prefetch_related(
+        Prefetch('items', queryset=OrderItem.objects.select_related('sku'))
+    )
+
 @transaction.atomic
 def create_order(branch, items_data, payment_method, customer_info=None):
     """
     Create a new order with items.
     
+    Prices come from one resolve_skus lookup, totals are computed in
+    memory, the order is written once and its items with one bulk insert.
+    
     Args:
         branch: Branch instance
-        items_data: List of dicts with 'sku', 'quantity', 'notes'
+        items_data: List of dicts with 'sku' (or 'sku_id'), 'quantity', 'notes';
+            one line per SKU
         payment_method: Payment method choice
         customer_info: Dict with customer details (optional)
     
     Returns:
         Order: Created order instance
+    
+    Raises:
+        ValueError: If a SKU is listed twice, or is missing or inactive
     """
-    # Create order
-    order = Order.objects.create(
+    sku_ids = [
+        item_data['sku'].id if 'sku' in item_data else int(item_data['sku_id'])
+        for item_data in items_data
+    ]
+    duplicates = sorted(sku_id for sku_id, count in Counter(sku_ids).items() if count > 1)
+    if duplicates:
+        raise ValueError(f"Duplicate SKU in order: {', '.join(str(sku_id) for sku_id in duplicates)}")
+    
+    # Inactive SKUs count as missing, so unavailable items cannot be ordered
+    skus, missing = resolve_skus(sku_ids)
+    if missing:
+        raise ValueError(f"SKU not found: {', '.join(str(sku_id) for sku_id in missing)}")
+    
+    # Build items and totals in memory
+    items = [
+        OrderItem(
+            sku=skus[sku_id],
+            quantity=item_data['quantity'],
+            unit_price=skus[sku_id].price,
+            notes=item_data.get('notes', '')
+        )
+        for sku_id, item_data in zip(sku_ids, items_data)
+    ]
+    
+    order = Order(
         branch=branch,
         payment_method=payment_method,
         customer_name=customer_info.get('name', '') if customer_info else '',
         customer_phone=customer_info.get('phone', '') if customer_info else '',
         table_number=customer_info.get('table', '') if customer_info else '',
         notes=customer_info.get('notes', '') if customer_info else '',
-        total_amount=0  # Will be calculated
     )
+    order.set_totals(sum((item.get_total() for item in items), Decimal('0')))
+    order.save()
     
     # Create order items
-    for item_data in items_data:
-        sku = item_data['sku']
-        quantity = item_data['quantity']
-        notes = item_data.get('notes', '')
-        
-        OrderItem.objects.create(
-            order=order,
-            sku=sku,
-            quantity=quantity,
-            unit_price=sku.price,
-            notes=notes
-        )
+    for item in items:
+        item.order = order
+    OrderItem.objects.bulk_create(items)
     
-    # Calculate totals
-    order.calculate_totals()
+    publish_order_event(order, 'created')
     
     return order
 
@@ -66,6 +117,7 @@ def mark_order_paid(order, payment_method=None, reference=None, user=None):
         raise ValueError(f"Order {order.order_number} cannot be marked as paid. Current status: {order.status}")
     
     # Update order
+    previous_status = order.status
     order.status = 'paid'
     order.paid_at = timezone.now()
     if payment_method:
@@ -75,15 +127,17 @@ def mark_order_paid(order, payment_method=None, reference=None, user=None):
     order.save()
     
     # Record sales and deduct inventory
-    for item in order.items.all():
-        record_sale(
-            branch=order.branch,
-            sku=item.sku,
-            qty=item.quantity,
-            price=item.unit_price,
-            user=user,
-            order=order
-        )
+    record_sales(
+        branch=order.branch,
+        lines=[
+            (item.sku, item.quantity, item.unit_price)
+            for item in order.items.select_related('sku')
+        ],
+        user=user,
+        order=order
+    )
+    
+    publish_order_event(order, 'status', previous_status)
     
     return order
 
@@ -102,10 +156,41 @@ def cancel_order(order, reason=''):
     if not order.can_cancel():
         raise ValueError(f"Order {order.order_number} cannot be cancelled. Current status: {order.status}")
     
+    previous_status = order.status
     order.status = 'cancelled'
     order.notes = f"{order.notes}\n[CANCELLED] {reason}".strip()
     order.save()
     
+    publish_order_event(order, 'status', previous_status)
+    
+    return order
+
+@transaction.atomic
+def set_order_status(order, status):
+    """
+    Move an order to a new status (kitchen progress: preparing, ready, completed).
+    
+    Use mark_order_paid and cancel_order for payment and cancellation, which
+    also touch stock and notes.
+    
+    Args:
+        order: Order instance
+        status: New status from Order.STATUS_CHOICES
+    
+    Returns:
+        Order: Updated order instance
+    """
+    if status not in dict(Order.STATUS_CHOICES):
+        raise ValueError(f"Invalid order status: {status}")
+    
+    previous_status = order.status
+    order.status = status
+    if status == 'completed' and not order.completed_at:
+        order.completed_at = timezone.now()
+    order.save()
+    
+    publish_order_event(order, 'status', previous_status)
+    
     return order
 
 def get_cart_from_session(session):
@@ -129,30 +214,30 @@ def get_cart_from_session(session):
             'count': 0
         }
     
-    from inventory.models import SKU
-    from decimal import Decimal
+    # Resolve every cart entry with one query; unavailable items are skipped
+    skus, missing = resolve_skus(cart.keys())
     
     items = []
     subtotal = Decimal('0')
     
     for sku_id, item_data in cart.items():
-        try:
-            sku = SKU.objects.get(id=sku_id, is_active=True)
-            quantity = item_data['quantity']
-            line_total = sku.price * quantity
-            
-            items.append({
-                'sku': sku,
-                'quantity': quantity,
-                'notes': item_data.get('notes', ''),
-                'line_total': line_total
-            })
-            
-            subtotal += line_total
-        except SKU.DoesNotExist:
+        if sku_id in missing:
             continue
+        
+        sku = skus[int(sku_id)]
+        quantity = item_data['quantity']
+        line_total = sku.price * quantity
+        
+        items.append({
+            'sku': sku,
+            'quantity': quantity,
+            'notes': item_data.get('notes', ''),
+            'line_total': line_total
+        })
+        
+        subtotal += line_total
     
-    tax = subtotal * Decimal('0.12')
+    tax = subtotal * Order.TAX_RATE
     total = subtotal + tax
     
     return {
@@ -163,6 +248,15 @@ def get_cart_from_session(session):
         'count': sum(item['quantity'] for item in items)
     }
 
+def get_cart_count(session):
+    """
+    Count cart items straight from the session, without touching the database.
+    
+    Items that have since become unavailable are still counted; use
+    get_cart_from_session when exact totals matter.
+    """
+    return sum(item_data['quantity'] for item_data in session.get('cart', {}).values())
+
 def add_to_cart(session, sku_id, quantity=1, notes=''):
     """Add item to session cart"""
     cart = session.get('cart', {})
@@ -197,4 +291,54 @@ def update_cart_item(session, sku_id, quantity):
 def clear_cart(session):
     """Clear the cart"""
     session['cart'] = {}
-    session.modified = True
\ No newline at end of file
+    session.modified = True
+
+def count_orders_by_status(branch):
+    """
+    Count a branch's orders per status with one GROUP BY query.
+    
+    Args:
+        branch: Branch instance
+    
+    Returns:
+        dict: {status: count} for every status in Order.STATUS_CHOICES
+    """
+    counts = dict.fromkeys(dict(Order.STATUS_CHOICES), 0)
+    counts.update(
+        Order.objects.filter(branch=branch).order_by().values_list('status').annotate(count=Count('id'))
+    )
+    return counts
+
+def get_order_status_version(branch_id):
+    """Return the branch's current order status version, creating one if the cache is empty"""
+    key = ORDER_STATUS_VERSION_KEY.format(branch_id=branch_id)
+    version = cache.get(key)
+    if version is None:
+        # add() so concurrent processes agree on a single version
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+def get_order_status_counts(branch):
+    """
+    Cached per-status order counts for a branch (see count_orders_by_status).
+    
+    Every order save or delete starts a new version for its branch (see
+    orders.signals), so the counts are rebuilt after any status transition.
+    
+    Args:
+        branch: Branch instance
+    
+    Returns:
+        dict: {status: count} for every status in Order.STATUS_CHOICES
+    """
+    key = ORDER_STATUS_COUNTS_KEY.format(branch_id=branch.id, version=get_order_status_version(branch.id))
+    counts = cache.get(key)
+    if counts is None:
+        counts = count_orders_by_status(branch)
+        cache.set(key, counts, ORDER_STATUS_COUNTS_TIMEOUT)
+    return counts
+
+def invalidate_order_status_counts(branch_id):
+    """Start a new order status version so the branch's cached counts are rebuilt"""
+    cache.set(ORDER_STATUS_VERSION_KEY.format(branch_id=branch_id), uuid.uuid4().hex, None)
@@ -0,0 +1,11 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Order
+from .services import invalidate_order_status_counts
+
+@receiver([post_save, post_delete], sender=Order)
+def invalidate_status_counts_on_change(sender, instance, **kwargs):
+    """Drop the branch's cached status counts once the order change is committed"""
+    branch_id = instance.branch_id
+    transaction.on_commit(lambda: invalidate_order_status_counts(branch_id))
@@ -1,3 +1,318 @@
-from django.test import TestCase
+import asyncio
+import json
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import Client, TestCase, override_settings
+
+from inventory.models import Branch, Category, SKU
+from users.models import User
+from .events import get_broker, order_channel
+from .models import Order
+from .services import cancel_order, create_order, get_order_status_counts, set_order_status
+from .views import render_menu_body
+
+
+class CreateOrderTests(TestCase):
+    def setUp(self):
+        self.branch = Branch.objects.create(name='Main', code='MAIN', address='-', phone='-')
+        category = Category.objects.create(name='Classic')
+        self.margherita = SKU.objects.create(name='Margherita', category=category, price=Decimal('300.00'))
+        self.pepperoni = SKU.objects.create(name='Pepperoni', category=category, price=Decimal('349.50'))
+        self.retired = SKU.objects.create(name='Mango Float', category=category, price=Decimal('200.00'), is_active=False)
+
+    def test_totals_come_from_current_prices(self):
+        order = create_order(self.branch, [
+            {'sku': self.margherita, 'quantity': 2, 'notes': 'Extra cheese'},
+            {'sku_id': str(self.pepperoni.id), 'quantity': 1},
+        ], 'counter', {'name': 'Juan', 'table': '4'})
+
+        order.refresh_from_db()
+        subtotal = Decimal('949.50')
+        self.assertEqual(order.subtotal, subtotal)
+        self.assertEqual(order.tax, (subtotal * Order.TAX_RATE).quantize(Decimal('0.01')))
+        self.assertEqual(order.total_amount, order.subtotal + order.tax)
+        self.assertEqual((order.customer_name, order.table_number), ('Juan', '4'))
+        self.assertEqual(
+            [(item.sku, item.quantity, item.unit_price, item.notes) for item in order.items.all()],
+            [
+                (self.margherita, 2, Decimal('300.00'), 'Extra cheese'),
+                (self.pepperoni, 1, Decimal('349.50'), ''),
+            ],
+        )
+
+    def test_rejects_duplicate_missing_and_inactive_skus(self):
+        for items, message in [
+            ([{'sku': self.margherita, 'quantity': 1}, {'sku_id': self.margherita.id, 'quantity': 2}], 'Duplicate'),
+            ([{'sku': self.margherita, 'quantity': 1}, {'sku_id': 999999, 'quantity': 1}], '999999'),
+            ([{'sku': self.retired, 'quantity': 1}], str(self.retired.id)),
+        ]:
+            with self.assertRaisesMessage(ValueError, message):
+                create_order(self.branch, items, 'counter')
+        self.assertFalse(Order.objects.exists())
+
+
+class OrderStatusCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.branch = Branch.objects.create(name='Main', code='MAIN', address='-', phone='-')
+        self.other_branch = Branch.objects.create(name='North', code='NORTH', address='-', phone='-')
+        category = Category.objects.create(name='Classic')
+        self.sku = SKU.objects.create(name='Margherita', category=category, price=Decimal('300.00'))
+
+    def _committed(self, change, *args):
+        with self.captureOnCommitCallbacks(execute=True):
+            return change(*args)
+
+    def _create_order(self, branch=None):
+        return self._committed(create_order, branch or self.branch, [{'sku': self.sku, 'quantity': 1}], 'counter')
+
+    def _counts(self):
+        return {status: count for status, count in get_order_status_counts(self.branch).items() if count}
+
+    def test_counts_follow_committed_changes(self):
+        self.assertEqual(self._counts(), {})
+        first, second, third = self._create_order(), self._create_order(), self._create_order()
+        self._create_order(self.other_branch)
+        self.assertEqual(self._counts(), {'pending': 3})
+        self.assertEqual(set(get_order_status_counts(self.branch)), {status for status, _ in Order.STATUS_CHOICES})
+
+        self._committed(set_order_status, first, 'preparing')
+        self.assertEqual(self._counts(), {'pending': 2, 'preparing': 1})
+        with self.assertNumQueries(0):
+            self._counts()
+
+        self._committed(cancel_order, second, 'Customer left')
+        self._committed(set_order_status, first, 'ready')
+        self.assertEqual(self._counts(), {'pending': 1, 'ready': 1, 'cancelled': 1})
+
+        self._committed(third.delete)
+        self.assertEqual(self._counts(), {'ready': 1, 'cancelled': 1})
+
+    def test_counts_are_stale_until_commit(self):
+        order = self._create_order()
+        self.assertEqual(self._counts(), {'pending': 1})
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            set_order_status(order, 'preparing')
+        self.assertEqual(self._counts(), {'pending': 1})
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self._counts(), {'preparing': 1})
+
+
+class MenuCacheTests(TestCase):
+    """The public menu body is cached per catalog version"""
+
+    def setUp(self):
+        cache.clear()
+        self.branch = Branch.objects.create(name='Main', code='MAIN', address='-', phone='-')
+        category = Category.objects.create(name='Classic')
+        self.sku = SKU.objects.create(name='Margherita', category=category, price=Decimal('300.00'))
+
+    def test_cached_fragment_skips_queries_until_the_catalog_changes(self):
+        body = render_menu_body(self.branch)
+        self.assertIn('Margherita', body)
+        with self.assertNumQueries(0):
+            self.assertEqual(render_menu_body(self.branch), body)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sku.name = 'Margherita Classica'
+            self.sku.save()
+
+        self.assertIn('Margherita Classica', render_menu_body(self.branch))
+        response = self.client.get(f'/order/{self.branch.code}/')
+        self.assertContains(response, 'Margherita Classica')
+
+    def test_cart_summary_reflects_the_session_cart(self):
+        self.assertEqual(self.client.get('/order/api/cart-summary/').json(), {'cart_count': 0, 'cart_total': 0.0})
+
+        self.client.post('/order/api/add-to-cart/', {'sku_id': self.sku.id, 'quantity': 2})
+
+        self.assertEqual(self.client.get('/order/api/cart-summary/').json(), {'cart_count': 2, 'cart_total': 672.0})
+
+    def test_benchmark_refuses_shared_caches_without_force(self):
+        shared = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': '/tmp/menu-cache'}}
+        with override_settings(CACHES=shared):
+            with self.assertRaisesMessage(CommandError, '--force'):
+                call_command('benchmark_menu', self.branch.code, requests=1)
+
+        out = StringIO()
+        call_command('benchmark_menu', self.branch.code, requests=2, stdout=out)
+        self.assertIn('cache miss', out.getvalue())
+
+
+class OrderQueryBudgetTests(TestCase):
+    """Order pages must cost the same number of queries however many orders and lines they show"""
+
+    def setUp(self):
+        cache.clear()
+        self.branch = Branch.objects.create(name='Main', code='MAIN', address='-', phone='-')
+        category = Category.objects.create(name='Classic')
+        self.skus = [
+            SKU.objects.create(name=f'Pizza {i}', category=category, price=Decimal('100.00'))
+            for i in range(5)
+        ]
+        self.user = User.objects.create_user(username='manager', password='-', role='manager')
+        self.user.branches.add(self.branch)
+        self.client.force_login(self.user)
+
+    def _create_orders(self, orders, lines):
+        return [
+            create_order(
+                self.branch,
+                [{'sku': sku, 'quantity': 2} for sku in self.skus[:lines]],
+                'counter',
+                {'name': 'Juan'},
+            )
+            for _ in range(orders)
+        ]
+
+    def _assert_budget(self, url, queries, client=None):
+        client = client or self.client
+        # Warm the per-branch caches (status counts) first
+        self.assertEqual(client.get(url).status_code, 200, url)
+        with self.assertNumQueries(queries):
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return response
+
+    def _assert_all_budgets(self, orders, lines):
+        order = self._create_orders(orders, lines)[-1]
+
+        # Staff pages: 7 queries for the session, user and branch middleware
+        # (including the session save), plus the orders and their items
+        response = self._assert_budget('/orders/', 9)
+        self.assertContains(response, self.skus[lines - 1].name)
+        # ... plus the branch access check
+        self._assert_budget(f'/orders/{order.id}/', 10)
+        self._assert_budget(f'/sales/pos/receipt/{order.id}/', 10)
+        # Public pages are opened by customers without logging in
+        customer = Client()
+        self._assert_budget(f'/order/confirmation/{order.order_number}/', 2, customer)
+        self._assert_budget(f'/order/status/{order.order_number}/', 2, customer)
+
+    def test_single_order_single_line(self):
+        self._assert_all_budgets(orders=1, lines=1)
+
+    def test_full_page_of_multi_line_orders(self):
+        self._assert_all_budgets(orders=25, lines=5)
+
+
+class OrderEventTests(TestCase):
+    """Order services publish lifecycle events that the SSE views stream per branch"""
+
+    def setUp(self):
+        self.branch = Branch.objects.create(name='Main', code='MAIN', address='-', phone='-')
+        self.other_branch = Branch.objects.create(name='North', code='NORTH', address='-', phone='-')
+        category = Category.objects.create(name='Classic')
+        self.sku = SKU.objects.create(name='Margherita', category=category, price=Decimal('300.00'))
+        self.user = User.objects.create_user(username='manager', password='-', role='manager')
+        self.user.branches.add(self.branch)
+
+    def _create_order(self, branch=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return create_order(branch or self.branch, [{'sku': self.sku, 'quantity': 1}], 'counter')
+
+    def _set_status(self, order, status):
+        with self.captureOnCommitCallbacks(execute=True):
+            return set_order_status(order, status)
+
+    async def _next_event(self, stream):
+        """Next data frame from an SSE stream, skipping comments"""
+        while True:
+            chunk = (await asyncio.wait_for(anext(stream), 5)).decode()
+            if chunk.startswith('data: '):
+                return json.loads(chunk[len('data: '):])
+
+    async def _disconnect(self, stream):
+        """Cancel a waiting read, as the ASGI handler does when the client goes away"""
+        pending = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0)
+        pending.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await pending
+
+    def test_services_publish_on_commit(self):
+        published = []
+        broker = get_broker()
+        with mock.patch.object(broker, 'publish', side_effect=lambda channel, message: published.append(
+            (channel, json.loads(message))
+        )):
+            with self.captureOnCommitCallbacks() as callbacks:
+                order = create_order(self.branch, [{'sku': self.sku, 'quantity': 1}], 'counter')
+            self.assertEqual(published, [])  # Nothing leaves before the commit
+            for callback in callbacks:
+                callback()
+
+            with self.captureOnCommitCallbacks(execute=True):
+                cancel_order(order, 'Customer left')
+            self._set_status(self._create_order(self.other_branch), 'preparing')
+
+        channel, other_channel = order_channel(self.branch.id), order_channel(self.other_branch.id)
+        self.assertEqual(
+            [(c, e['event'], e['previous_status'], e['status']) for c, e in published],
+            [
+                (channel, 'created', None, 'pending'),
+                (channel, 'status', 'pending', 'cancelled'),
+                (other_channel, 'created', None, 'pending'),
+                (other_channel, 'status', 'pending', 'preparing'),
+            ],
+        )
+        self.assertEqual(published[0][1]['order_number'], order.order_number)
+
+    async def test_board_stream_delivers_branch_events(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get('/orders/events/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        stream = aiter(response.streaming_content)
+        self.assertTrue((await anext(stream)).startswith(b'retry:'))  # Subscribed
+
+        await sync_to_async(self._create_order)(self.other_branch)
+        order = await sync_to_async(self._create_order)()
+        event = await self._next_event(stream)
+        self.assertEqual((event['event'], event['id']), ('created', order.id))
+
+        await sync_to_async(self._set_status)(order, 'ready')
+        event = await self._next_event(stream)
+        self.assertEqual((event['status'], event['previous_status']), ('ready', 'pending'))
+
+        await self._disconnect(stream)
+        self.assertNotIn(order_channel(self.branch.id), get_broker()._subscriptions)
+
+    async def test_status_stream_follows_one_order(self):
+        other = await sync_to_async(self._create_order)()
+        order = await sync_to_async(self._create_order)()
+        response = await self.async_client.get(f'/order/status/{order.order_number}/events/')
+        stream = aiter(response.streaming_content)
+        await anext(stream)
+
+        await sync_to_async(self._set_status)(other, 'preparing')
+        await sync_to_async(self._set_status)(order, 'completed')
+        event = await self._next_event(stream)
+        self.assertEqual((event['id'], event['status']), (order.id, 'completed'))
+        await self._disconnect(stream)
+
+    def test_streams_are_not_held_open_under_wsgi(self):
+        order = self._create_order()
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get('/orders/events/').status_code, 204)
+        self.assertEqual(self.client.get(f'/order/status/{order.order_number}/events/').status_code, 204)
+        self.assertEqual(self.client.get('/order/status/NOPE/events/').status_code, 204)
+
+    def test_order_card_renders_for_the_board(self):
+        order = self._create_order()
+        self.client.force_login(self.user)
+        response = self.client.get(f'/orders/{order.id}/card/')
+        self.assertContains(response, f'id="order-{order.id}"')
+        self.assertContains(response, 'Margherita')
+
+        other = self._create_order(self.other_branch)
+        self.assertEqual(self.client.get(f'/orders/{other.id}/card/').status_code, 403)
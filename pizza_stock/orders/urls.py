@@ -6,7 +6,10 @@ app_name = 'orders'
 urlpatterns = [
     # Staff dashboard
     path('', views.orders_dashboard, name='dashboard'),
+    path('status-counts/', views.order_status_counts, name='status_counts'),
+    path('events/', views.order_events, name='events'),
     path('<int:order_id>/', views.order_detail, name='detail'),
+    path('<int:order_id>/card/', views.order_card, name='card'),
     path('<int:order_id>/update-status/', views.update_order_status, name='update_status'),
     path('<int:order_id>/cancel/', views.cancel_order_view, name='cancel'),
 ]
\ No newline at end of file
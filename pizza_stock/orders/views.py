@@ -1,40 +1,71 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.core.paginator import Paginator
 from django.db.models import Q, Count, Sum
 from django.views.decorators.http import require_http_methods
-from django.http import JsonResponse
-from inventory.models import Branch, SKU, Category
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from inventory.models import Branch, SKU
 from .models import Order, Payment
 from .services import (
-    create_order, mark_order_paid, cancel_order,
-    get_cart_from_session, add_to_cart, update_cart_item, clear_cart
+    create_order, mark_order_paid, cancel_order, set_order_status,
+    get_order_status_counts, orders_with_items,
+    get_cart_from_session, get_cart_count, add_to_cart, update_cart_item, clear_cart
 )
+from inventory.catalog import CATALOG_TIMEOUT, get_catalog_version, get_menu_categories
+from inventory.pagination import CursorPaginator
 from .payments import initiate_payment, simulate_payment_success, simulate_payment_failure
+from .events import event_stream
 
 # ============================================
 # PUBLIC ORDERING VIEWS (Customer-facing)
 # ============================================
 
+MENU_FRAGMENT_KEY = 'menu:body:{branch_code}:{version}'
+
+def render_menu_body(branch):
+    """
+    Render the menu body for a branch, cached per (branch, catalog version).
+    
+    A catalog change starts a new version, so stale fragments are never
+    served and simply expire.
+    """
+    key = MENU_FRAGMENT_KEY.format(branch_code=branch.code, version=get_catalog_version())
+    body = cache.get(key)
+    
+    if body is None:
+        body = render_to_string('orders/public/partials/menu_body.html', {
+            'branch': branch,
+            'categories': get_menu_categories(),
+        })
+        cache.set(key, body, CATALOG_TIMEOUT)
+    
+    return mark_safe(body)
+
 def public_menu(request, branch_code):
     """Public menu for QR code ordering"""
     branch = get_object_or_404(Branch, code=branch_code, is_active=True)
     
-    # Get active categories and SKUs
-    categories = Category.objects.filter(is_active=True).prefetch_related('skus')
-    
-    # Get cart info
-    cart = get_cart_from_session(request.session)
-    
     context = {
         'branch': branch,
-        'categories': categories,
-        'cart': cart,
+        'menu_body': render_menu_body(branch),
+        'cart_count': get_cart_count(request.session),
     }
     
     return render(request, 'orders/public/menu.html', context)
 
+def cart_summary_view(request):
+    """Cart badge data for the cached menu page"""
+    cart = get_cart_from_session(request.session)
+    
+    return JsonResponse({
+        'cart_count': cart['count'],
+        'cart_total': float(cart['total'])
+    })
+
 @require_http_methods(["POST"])
 def add_to_cart_view(request):
     """Add item to cart via AJAX"""
@@ -184,7 +215,7 @@ def payment_failed(request, payment_id):
 
 def order_confirmation(request, order_number):
     """Order confirmation page"""
-    order = get_object_or_404(Order, order_number=order_number)
+    order = get_object_or_404(orders_with_items(), order_number=order_number)
     
     context = {
         'order': order,
@@ -195,7 +226,7 @@ def order_confirmation(request, order_number):
 
 def order_status(request, order_number):
     """Check order status"""
-    order = get_object_or_404(Order, order_number=order_number)
+    order = get_object_or_404(orders_with_items(), order_number=order_number)
     
     context = {
         'order': order,
@@ -220,7 +251,7 @@ def orders_dashboard(request):
     # Filter by status
     status = request.GET.get('status', '')
     
-    orders = Order.objects.filter(branch=branch).select_related('branch').prefetch_related('items')
+    orders = orders_with_items(Order.objects.filter(branch=branch))
     
     if status:
         orders = orders.filter(status=status)
@@ -228,35 +259,33 @@ def orders_dashboard(request):
         # Default: show active orders (not completed/cancelled)
         orders = orders.exclude(status__in=['completed', 'cancelled'])
     
-    # Order by creation (newest first)
-    orders = orders.order_by('-created_at')
-    
-    # Pagination
-    paginator = Paginator(orders, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
-    # Summary stats
-    summary = {
-        'pending': Order.objects.filter(branch=branch, status='pending').count(),
-        'paid': Order.objects.filter(branch=branch, status='paid').count(),
-        'preparing': Order.objects.filter(branch=branch, status='preparing').count(),
-        'ready': Order.objects.filter(branch=branch, status='ready').count(),
-    }
+    # Keyset pagination, newest first (the summary below has the counts)
+    paginator = CursorPaginator(orders, 20)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
     
     context = {
         'page_obj': page_obj,
-        'summary': summary,
+        'summary': get_order_status_counts(branch),
         'selected_status': status,
         'status_choices': Order.STATUS_CHOICES,
     }
     
     return render(request, 'orders/staff/dashboard.html', context)
 
+@login_required
+def order_status_counts(request):
+    """Per-status order counts for the current branch (polled by the dashboard)"""
+    branch = request.current_branch
+    
+    if not branch:
+        return JsonResponse({'success': False, 'message': 'No branch selected'}, status=400)
+    
+    return JsonResponse({'success': True, 'counts': get_order_status_counts(branch)})
+
 @login_required
 def order_detail(request, order_id):
     """View order details"""
-    order = get_object_or_404(Order, id=order_id)
+    order = get_object_or_404(orders_with_items(), id=order_id)
     
     # Check access
     if not request.user.can_access_branch(order.branch):
@@ -269,6 +298,16 @@ def order_detail(request, order_id):
     
     return render(request, 'orders/staff/detail.html', context)
 
+@login_required
+def order_card(request, order_id):
+    """One order's dashboard card, fetched by the board when the order changes"""
+    order = get_object_or_404(orders_with_items(), id=order_id)
+    
+    if not request.user.can_access_branch(order.branch):
+        return HttpResponse(status=403)
+    
+    return render(request, 'orders/staff/partials/order_card.html', {'order': order})
+
 @login_required
 @require_http_methods(["POST"])
 def update_order_status(request, order_id):
@@ -288,8 +327,7 @@ def update_order_status(request, order_id):
             mark_order_paid(order, user=request.user)
             message = f'Order #{order.order_number} marked as paid'
         else:
-            order.status = new_status
-            order.save()
+            set_order_status(order, new_status)
             message = f'Order status updated to {order.get_status_display()}'
         
         return JsonResponse({
@@ -324,4 +362,42 @@ def cancel_order_view(request, order_id):
         'order': order,
     }
     
-    return render(request, 'orders/staff/cancel.html', context)
\ No newline at end of file
+    return render(request, 'orders/staff/cancel.html', context)
+
+# ============================================
+# LIVE ORDER EVENTS (server-sent events, ASGI)
+# ============================================
+
+def sse_response(stream):
+    """Wrap an async event stream as a text/event-stream response"""
+    response = StreamingHttpResponse(stream, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Stop nginx from buffering the stream
+    return response
+
+@login_required
+async def order_events(request):
+    """Live order events for the current branch (staff order board)"""
+    if not isinstance(request, ASGIRequest):
+        # Under WSGI the stream would hold a worker for as long as the page
+        # is open; 204 tells EventSource not to reconnect
+        return HttpResponse(status=204)
+    
+    branch = request.current_branch
+    
+    if not branch:
+        return HttpResponse(status=403)
+    
+    return sse_response(event_stream(branch.id))
+
+async def order_status_events(request, order_number):
+    """Live status events for one order (customer status page)"""
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    
+    try:
+        order = await Order.objects.only('id', 'branch_id').aget(order_number=order_number)
+    except Order.DoesNotExist:
+        raise Http404("Order not found")
+    
+    return sse_response(event_stream(order.branch_id, order_id=order.id))
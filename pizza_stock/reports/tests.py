@@ -1,3 +1,41 @@
+from decimal import Decimal
+
 from django.test import TestCase
+from django.utils import timezone
+
+from inventory.models import Branch, Category, SKU
+from inventory.utils import apply_stock_transaction
+from sales.services import record_sale
+from users.models import User
+
+
+class SalesAnalyticsViewTests(TestCase):
+    def setUp(self):
+        self.branch = Branch.objects.create(name='Main', code='MAIN', address='-', phone='-')
+        category = Category.objects.create(name='Classic')
+        self.sku = SKU.objects.create(name='Margherita', category=category, price=Decimal('300.00'))
+        self.user = User.objects.create_user(username='manager', password='-', role='manager')
+        self.user.branches.add(self.branch)
+        apply_stock_transaction(self.branch, self.sku, 10, 'restock', user=self.user)
+        self.client.force_login(self.user)
+
+    def test_renders_category_and_hourly_charts(self):
+        sale = record_sale(self.branch, self.sku, 2, Decimal('300.00'), user=self.user)
+
+        response = self.client.get('/reports/analytics/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'id="hourly-chart-data"')
+        category_chart = response.context['category_chart']
+        self.assertEqual(category_chart, {'labels': ['Classic'], 'revenue': [600.0]})
+
+        hourly_chart = response.context['hourly_chart']
+        self.assertEqual(len(hourly_chart['labels']), 24)
+        hour = timezone.localtime(sale.created_at).hour
+        self.assertEqual(hourly_chart['revenue'][hour], 600.0)
+        self.assertEqual(hourly_chart['transactions'][hour], 1)
 
-# Create your tests here.
+    def test_renders_without_sales(self):
+        response = self.client.get('/reports/analytics/?days=7')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'No category data available')
@@ -7,4 +7,5 @@ urlpatterns = [
     path('dashboard/', views.main_dashboard, name='dashboard'),
     path('analytics/', views.sales_analytics, name='analytics'),
     path('inventory/', views.inventory_report, name='inventory'),
+    path('reorder/', views.reorder_report, name='reorder'),
 ]
\ No newline at end of file
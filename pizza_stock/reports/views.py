@@ -8,7 +8,9 @@ from sales.models import Sale, DailySales
 from orders.models import Order
 from inventory.models import InventoryRecord
 from inventory.utils import get_low_stock_items
-from sales.services import get_top_selling_items
+from inventory.summary import get_inventory_summary
+from sales.services import get_top_selling_items, get_hourly_sales
+from forecast.reorder import get_branch_reorder_suggestions, get_reorder_settings
 
 @login_required
 def main_dashboard(request):
@@ -113,16 +115,21 @@ def sales_analytics(request):
         transaction_count=Count('id')
     ).order_by('-total_revenue')
     
-    # Hourly sales pattern
-    hourly_sales = Sale.objects.filter(
-        branch=branch,
-        created_at__date__gte=start_date
-    ).extra(
-        select={'hour': 'EXTRACT(hour FROM created_at)'}
-    ).values('hour').annotate(
-        total=Sum('total_amount'),
-        count=Count('id')
-    ).order_by('hour')
+    # Hourly sales pattern, one entry per hour of the day
+    hourly_sales = {row['hour']: row for row in get_hourly_sales(branch, start_date)}
+    hourly_rows = [
+        {
+            'hour': hour,
+            'label': f"{hour:02d}:00",
+            'total': hourly_sales[hour]['total'] if hour in hourly_sales else 0,
+            'count': hourly_sales[hour]['count'] if hour in hourly_sales else 0,
+        }
+        for hour in range(24)
+    ]
+    peak_total = max(row['total'] for row in hourly_rows)
+    for row in hourly_rows:
+        # Heat level 0-4 for the hour grid
+        row['level'] = round(4 * row['total'] / peak_total) if peak_total else 0
     
     # Payment method breakdown
     payment_breakdown = Order.objects.filter(
@@ -146,9 +153,22 @@ def sales_analytics(request):
         total_spent=Sum('total_amount')
     ).order_by('-total_spent')[:10]
     
+    # Chart data (rendered with json_script)
+    category_chart = {
+        'labels': [row['sku__category__name'] for row in category_sales],
+        'revenue': [float(row['total_revenue'] or 0) for row in category_sales],
+    }
+    hourly_chart = {
+        'labels': [row['label'] for row in hourly_rows],
+        'revenue': [float(row['total']) for row in hourly_rows],
+        'transactions': [row['count'] for row in hourly_rows],
+    }
+    
     context = {
         'category_sales': category_sales,
-        'hourly_sales': list(hourly_sales),
+        'hourly_rows': hourly_rows,
+        'category_chart': category_chart,
+        'hourly_chart': hourly_chart,
         'payment_breakdown': payment_breakdown,
         'top_customers': top_customers,
         'days': days,
@@ -177,135 +197,22 @@ def inventory_report(request):
     ).order_by('sku__category', 'sku__name')
     
     # Calculate totals
-    total_items = inventory.count()
-    total_stock_value = sum(inv.stock_value for inv in inventory)
-    low_stock_items = inventory.filter(quantity__lt=F('safety_stock'))
-    out_of_stock_items = inventory.filter(quantity=0)
+    summary = get_inventory_summary(branch)
     
     context = {
         'inventory': inventory,
-        'total_items': total_items,
-        'total_stock_value': total_stock_value,
-        'low_stock_items': low_stock_items,
-        'out_of_stock_items': out_of_stock_items,
+        'total_items': summary['total_items'],
+        'total_stock_value': summary['stock_value'],
+        'low_stock_count': summary['below_safety_stock'],
+        'out_of_stock_count': summary['out_of_stock'],
     }
     
     return render(request, 'reports/inventory.html', context)
-    
-    # Inventory alerts
-    low_stock = get_low_stock_items(branch)
-    out_of_stock = InventoryRecord.objects.filter(branch=branch, quantity=0).count()
-    
-    # Top selling items
-    top_items = get_top_selling_items(branch=branch, days=days, limit=5)
-    
-    # Daily sales trend (for chart)
-    daily_trends = DailySales.objects.filter(
-        branch=branch,
-        date__gte=start_date
-    ).values('date').annotate(
-        daily_total=Sum('total_amount'),
-        daily_quantity=Sum('total_quantity')
-    ).order_by('date')
-    
-    # Format for Chart.js
-    chart_labels = [trend['date'].strftime('%b %d') for trend in daily_trends]
-    chart_revenue = [float(trend['daily_total']) for trend in daily_trends]
-    chart_quantity = [trend['daily_quantity'] for trend in daily_trends]
-    
-    context = {
-        'sales_summary': sales_summary,
-        'orders_summary': orders_summary,
-        'low_stock_count': low_stock.count(),
-        'low_stock_items': low_stock[:5],
-        'out_of_stock_count': out_of_stock,
-        'top_items': top_items,
-        'days': days,
-        'chart_labels': chart_labels,
-        'chart_revenue': chart_revenue,
-        'chart_quantity': chart_quantity,
-    }
-    
-    return render(request, 'reports/dashboard.html', context)
 
-@login_required
-def sales_analytics(request):
-    """Detailed sales analytics"""
-    if not request.user.is_manager():
-        messages.error(request, 'You do not have permission to view analytics.')
-        return redirect('reports:dashboard')
-    
-    branch = request.current_branch
-    
-    if not branch:
-        messages.warning(request, 'Please select a branch.')
-        return redirect('users:profile')
-    
-    # Date range
-    days = int(request.GET.get('days', 30))
-    start_date = timezone.now().date() - timedelta(days=days)
-    
-    # Category performance
-    from django.db.models import Sum
-    from inventory.models import Category
-    
-    category_sales = Sale.objects.filter(
-        branch=branch,
-        created_at__date__gte=start_date
-    ).values(
-        'sku__category__name'
-    ).annotate(
-        total_revenue=Sum('total_amount'),
-        total_quantity=Sum('quantity'),
-        transaction_count=Count('id')
-    ).order_by('-total_revenue')
-    
-    # Hourly sales pattern
-    hourly_sales = Sale.objects.filter(
-        branch=branch,
-        created_at__date__gte=start_date
-    ).extra(
-        select={'hour': 'EXTRACT(hour FROM created_at)'}
-    ).values('hour').annotate(
-        total=Sum('total_amount'),
-        count=Count('id')
-    ).order_by('hour')
-    
-    # Payment method breakdown
-    payment_breakdown = Order.objects.filter(
-        branch=branch,
-        created_at__date__gte=start_date,
-        status__in=['paid', 'completed']
-    ).values('payment_method').annotate(
-        count=Count('id'),
-        total=Sum('total_amount')
-    )
-    
-    # Top customers (by phone)
-    top_customers = Order.objects.filter(
-        branch=branch,
-        created_at__date__gte=start_date,
-        customer_phone__isnull=False
-    ).exclude(customer_phone='').values(
-        'customer_name', 'customer_phone'
-    ).annotate(
-        order_count=Count('id'),
-        total_spent=Sum('total_amount')
-    ).order_by('-total_spent')[:10]
-    
-    context = {
-        'category_sales': category_sales,
-        'hourly_sales': list(hourly_sales),
-        'payment_breakdown': payment_breakdown,
-        'top_customers': top_customers,
-        'days': days,
-    }
-    
-    return render(request, 'reports/analytics.html', context)
 
 @login_required
-def inventory_report(request):
-    """Inventory status report"""
+def reorder_report(request):
+    """Forecast-driven reorder suggestions"""
     if not request.user.is_manager():
         messages.error(request, 'You do not have permission to view this report.')
         return redirect('reports:dashboard')
@@ -316,25 +223,15 @@ def inventory_report(request):
         messages.warning(request, 'Please select a branch.')
         return redirect('users:profile')
     
-    # Get all inventory with stock levels
-    inventory = InventoryRecord.objects.filter(
-        branch=branch
-    ).select_related('sku', 'sku__category').annotate(
-        stock_value=F('quantity') * F('sku__price')
-    ).order_by('sku__category', 'sku__name')
-    
-    # Calculate totals
-    total_items = inventory.count()
-    total_stock_value = sum(inv.stock_value for inv in inventory)
-    low_stock_items = inventory.filter(quantity__lt=F('safety_stock'))
-    out_of_stock_items = inventory.filter(quantity=0)
+    lead_time_days, review_days = get_reorder_settings()
+    suggestions = get_branch_reorder_suggestions(branch, lead_time_days, review_days)
     
     context = {
-        'inventory': inventory,
-        'total_items': total_items,
-        'total_stock_value': total_stock_value,
-        'low_stock_items': low_stock_items,
-        'out_of_stock_items': out_of_stock_items,
+        'suggestions': suggestions,
+        'total_units': sum(row['suggested'] for row in suggestions),
+        'without_forecast': sum(1 for row in suggestions if not row['has_forecast']),
+        'lead_time_days': lead_time_days,
+        'review_days': review_days,
     }
     
-    return render(request, 'reports/inventory.html', context)
\ No newline at end of file
+    return render(request, 'reports/reorder.html', context)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Sale, DailySales
+from .models import Sale, DailySales, HourlySales
 
 @admin.register(Sale)
 class SaleAdmin(admin.ModelAdmin):
@@ -15,4 +15,12 @@ class DailySalesAdmin(admin.ModelAdmin):
     list_filter = ['date']
     search_fields = ['sku__name']
     readonly_fields = ['created_at', 'updated_at']
-    date_hierarchy = 'date'
\ No newline at end of file
+    date_hierarchy = 'date'
+
+@admin.register(HourlySales)
+class HourlySalesAdmin(admin.ModelAdmin):
+    list_display = ['date', 'hour', 'branch', 'sku', 'total_quantity', 'total_amount', 'transaction_count']
+    list_filter = ['date', 'hour']
+    search_fields = ['sku__name']
+    readonly_fields = ['created_at', 'updated_at']
+    date_hierarchy = 'date'
@@ -0,0 +1,27 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from sales.services import aggregate_sales_range, aggregate_sales_incremental
+
+
+class Command(BaseCommand):
+    help = "Aggregate sales into DailySales for a date range, or incrementally since the last run"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=date.fromisoformat, help='First day (YYYY-MM-DD, default yesterday)')
+        parser.add_argument('--end', type=date.fromisoformat, help='Last day, inclusive (YYYY-MM-DD, default --start)')
+        parser.add_argument('--incremental', action='store_true', help='Only re-aggregate days with sales since the last run')
+
+    def handle(self, *args, **options):
+        if options['incremental']:
+            count = aggregate_sales_incremental()
+        else:
+            start = options['start'] or timezone.localdate() - timedelta(days=1)
+            end = options['end'] or start
+            if end < start:
+                raise CommandError('--end must not be before --start.')
+            count = aggregate_sales_range(start, end)
+
+        self.stdout.write(self.style.SUCCESS(f"Aggregated {count} DailySales rows"))
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0003_alter_sku_image"),
+        ("sales", "0003_aggregationcheckpoint"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HourlySales",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("hour", models.PositiveSmallIntegerField()),
+                ("total_quantity", models.PositiveIntegerField(default=0)),
+                (
+                    "total_amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                ("transaction_count", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "branch",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="hourly_sales",
+                        to="inventory.branch",
+                    ),
+                ),
+                (
+                    "sku",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="hourly_sales",
+                        to="inventory.sku",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Hourly sales",
+                "ordering": ["-date", "hour", "branch", "sku"],
+                "indexes": [
+                    models.Index(
+                        fields=["branch", "-date"],
+                        name="sales_hourl_branch__a716bf_idx",
+                    )
+                ],
+                "unique_together": {("branch", "sku", "date", "hour")},
+            },
+        ),
+    ]
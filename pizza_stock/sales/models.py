@@ -50,4 +50,36 @@ class DailySales(models.Model):
         ]
     
     def __str__(self):
-        return f"{self.date} - {self.branch.code} - {self.sku.name}: {self.total_quantity} units"
\ No newline at end of file
+        return f"{self.date} - {self.branch.code} - {self.sku.name}: {self.total_quantity} units"
+
+class HourlySales(models.Model):
+    """Aggregated hourly sales per SKU per branch (local time)"""
+    branch = models.ForeignKey('inventory.Branch', on_delete=models.CASCADE, related_name='hourly_sales')
+    sku = models.ForeignKey('inventory.SKU', on_delete=models.CASCADE, related_name='hourly_sales')
+    date = models.DateField()
+    hour = models.PositiveSmallIntegerField()  # 0-23
+    total_quantity = models.PositiveIntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    transaction_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['branch', 'sku', 'date', 'hour']
+        ordering = ['-date', 'hour', 'branch', 'sku']
+        verbose_name_plural = 'Hourly sales'
+        indexes = [
+            models.Index(fields=['branch', '-date']),
+        ]
+    
+    def __str__(self):
+        return f"{self.date} {self.hour:02d}:00 - {self.branch.code} - {self.sku.name}: {self.total_quantity} units"
+
+class AggregationCheckpoint(models.Model):
+    """High-water mark for incremental sales aggregation"""
+    name = models.CharField(max_length=50, unique=True)
+    last_sale_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.name}: sale #{self.last_sale_id}"
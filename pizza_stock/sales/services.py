@@ -1,7 +1,7 @@
 from django.db import transaction
 from django.utils import timezone
-from .models import Sale, DailySales
-from inventory.utils import apply_stock_transaction
+from .models import Sale, DailySales, HourlySales, AggregationCheckpoint
+from inventory.utils import apply_stock_transaction, apply_stock_transactions
 
 @transaction.atomic
 def record_sale(branch, sku, qty, price, user=None, order=None):
@@ -43,50 +43,318 @@ def record_sale(branch, sku, qty, price, user=None, order=None):
         notes=f'Sale ID: {sale.id}'
     )
     
+    # Keep today's DailySales row current
+    update_daily_sales(branch, [sale])
+    
     return sale
 
-def aggregate_sales_daily(date=None):
+@transaction.atomic
+def record_sales(branch, lines, user=None, order=None):
     """
-    Aggregate sales data for a specific date.
-    Used by cron job for daily aggregation.
+    Record several sales and deduct inventory in a constant number of queries.
     
     Args:
-        date: Date to aggregate (defaults to yesterday)
+        branch: Branch instance
+        lines: Iterable of (sku, qty, price) tuples
+        user: User making the sales (optional)
+        order: Related Order instance (optional)
+    
+    Returns:
+        list: Created Sale records, in the order of lines
+    """
+    sales = Sale.objects.bulk_create([
+        Sale(
+            branch=branch,
+            sku=sku,
+            quantity=qty,
+            unit_price=price,
+            total_amount=price * qty,
+            order=order,
+            user=user
+        )
+        for sku, qty, price in lines
+    ])
+    
+    # Deduct from inventory
+    apply_stock_transactions(
+        branch,
+        [(sale.sku, -sale.quantity, 'sale', f'Sale ID: {sale.id}') for sale in sales],
+        user=user
+    )
+    
+    # Keep today's DailySales rows current
+    update_daily_sales(branch, sales)
+    
+    return sales
+
+def update_daily_sales(branch, sales):
+    """
+    Fold newly recorded sales into their DailySales rows with atomic increments.
+    
+    Missing rows are created with one insert, then quantity, amount and
+    transaction count are incremented and the running average unit price is
+    updated with one UPDATE, so concurrent tills never overwrite each other.
+    
+    Args:
+        branch: Branch instance
+        sales: Saved Sale instances for that branch
+    
+    Returns:
+        int: Number of DailySales rows updated
+    """
+    from django.db.models import Case, DecimalField, ExpressionWrapper, F, FloatField, IntegerField, Q, When
+    from django.db.models.functions import Cast
+    
+    # Totals per (sku, local date)
+    groups = {}
+    for sale in sales:
+        key = (sale.sku_id, timezone.localdate(sale.created_at))
+        group = groups.setdefault(key, {'quantity': 0, 'amount': 0, 'count': 0, 'prices': 0})
+        group['quantity'] += sale.quantity
+        group['amount'] += sale.total_amount
+        group['count'] += 1
+        group['prices'] += sale.unit_price
+    
+    if not groups:
+        return 0
+    
+    DailySales.objects.bulk_create(
+        [DailySales(branch=branch, sku_id=sku_id, date=date) for sku_id, date in groups],
+        ignore_conflicts=True
+    )
+    
+    def increment(field, value, output_field):
+        return Case(
+            *[
+                When(sku_id=sku_id, date=date, then=F(field) + group[value])
+                for (sku_id, date), group in groups.items()
+            ],
+            default=F(field),
+            output_field=output_field
+        )
+    
+    # Running mean of unit prices over all transactions of the day; every
+    # right-hand side reads the pre-update values. The numerator is cast to
+    # float because SQLite stores whole decimals as integers and would
+    # truncate the division (Avg in aggregate_sales_range divides in float too)
+    average_price = Case(
+        *[
+            When(sku_id=sku_id, date=date, then=ExpressionWrapper(
+                Cast(F('average_price') * F('transaction_count') + group['prices'], FloatField())
+                / (F('transaction_count') + group['count']),
+                output_field=DecimalField()
+            ))
+            for (sku_id, date), group in groups.items()
+        ],
+        default=F('average_price'),
+        output_field=DecimalField()
+    )
+    
+    rows = Q()
+    for sku_id, date in groups:
+        rows |= Q(sku_id=sku_id, date=date)
+    
+    return DailySales.objects.filter(rows, branch=branch).update(
+        total_quantity=increment('total_quantity', 'quantity', IntegerField()),
+        total_amount=increment('total_amount', 'amount', DecimalField()),
+        transaction_count=increment('transaction_count', 'count', IntegerField()),
+        average_price=average_price,
+        updated_at=timezone.now()
+    )
+
+def local_day_range(start_date, end_date=None):
+    """
+    Half-open timestamp range covering whole days in the configured TIME_ZONE.
+    
+    Filtering created_at on [start, end) keeps the ['branch', '-created_at']
+    index usable, unlike created_at__date which casts the column.
+    
+    Args:
+        start_date: First day (date)
+        end_date: Last day, inclusive (defaults to start_date)
+    
+    Returns:
+        tuple: (start, end) aware datetimes
+    """
+    from datetime import datetime, time, timedelta
+    
+    tz = timezone.get_default_timezone()
+    end_date = end_date or start_date
+    start = datetime.combine(start_date, time.min, tzinfo=tz)
+    end = datetime.combine(end_date + timedelta(days=1), time.min, tzinfo=tz)
+    return start, end
+
+def _delete_stale_rollups(rollups, sales, key_fields):
+    """
+    Delete rollup rows whose key no longer has any sales, in one DELETE.
+    
+    Args:
+        rollups: Rollup rows covering the re-aggregated range
+        sales: Sales in the range, annotated with every key field
+        key_fields: Fields of the rollup's unique key
+    
+    Returns:
+        int: Number of rows deleted
+    """
+    from django.db.models import Exists, OuterRef
+    
+    matching = sales.filter(**{field: OuterRef(field) for field in key_fields})
+    return rollups.filter(~Exists(matching)).delete()[0]
+
+@transaction.atomic
+def aggregate_sales_range(start_date, end_date=None, branch=None):
+    """
+    Aggregate sales into DailySales and HourlySales for every day in a date range in one pass.
+    
+    Sales are grouped by (branch, sku, local date) and by (branch, sku,
+    local date, hour) with one query each and written with one bulk upsert
+    each, so backfilling months of history costs the same number of
+    queries as one day. Rollup rows in the range whose sales are all gone
+    (e.g. deleted or moved to another day) are removed in the same
+    transaction.
+    
+    Args:
+        start_date: First day to aggregate (date)
+        end_date: Last day to aggregate, inclusive (defaults to start_date)
+        branch: Restrict to one Branch (optional)
     
     Returns:
         int: Number of DailySales records created/updated
     """
     from django.db.models import Sum, Count, Avg
-    from datetime import timedelta
+    from django.db.models.functions import ExtractHour, TruncDate
     
-    if date is None:
-        # Default to yesterday
-        date = (timezone.now() - timedelta(days=1)).date()
+    tz = timezone.get_default_timezone()
+    start, end = local_day_range(start_date, end_date)
     
-    # Get all sales for the date
-    sales = Sale.objects.filter(
-        created_at__date=date
-    ).values('branch', 'sku').annotate(
+    sales = Sale.objects.filter(created_at__gte=start, created_at__lt=end)
+    if branch:
+        sales = sales.filter(branch=branch)
+    
+    daily_sales = sales.annotate(date=TruncDate('created_at', tzinfo=tz))
+    hourly_sales = daily_sales.annotate(hour=ExtractHour('created_at', tzinfo=tz))
+    
+    groups = daily_sales.values('branch', 'sku', 'date').annotate(
         total_quantity=Sum('quantity'),
         total_amount=Sum('total_amount'),
         average_price=Avg('unit_price'),
         transaction_count=Count('id')
+    ).order_by()
+    
+    end_date = end_date or start_date
+    rollups = {
+        model: model.objects.filter(date__gte=start_date, date__lte=end_date)
+        for model in (DailySales, HourlySales)
+    }
+    if branch:
+        rollups = {model: queryset.filter(branch=branch) for model, queryset in rollups.items()}
+    
+    rows = [
+        DailySales(
+            branch_id=group['branch'],
+            sku_id=group['sku'],
+            date=group['date'],
+            total_quantity=group['total_quantity'],
+            total_amount=group['total_amount'],
+            average_price=group['average_price'],
+            transaction_count=group['transaction_count'],
+        )
+        for group in groups
+    ]
+    
+    DailySales.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['branch', 'sku', 'date'],
+        update_fields=['total_quantity', 'total_amount', 'average_price', 'transaction_count', 'updated_at'],
     )
+    _delete_stale_rollups(rollups[DailySales], daily_sales, ['branch', 'sku', 'date'])
+    
+    hourly_groups = hourly_sales.values('branch', 'sku', 'date', 'hour').annotate(
+        total_quantity=Sum('quantity'),
+        total_amount=Sum('total_amount'),
+        transaction_count=Count('id')
+    ).order_by()
     
-    count = 0
-    for sale_data in sales:
-        DailySales.objects.update_or_create(
-            branch_id=sale_data['branch'],
-            sku_id=sale_data['sku'],
-            date=date,
-            defaults={
-                'total_quantity': sale_data['total_quantity'],
-                'total_amount': sale_data['total_amount'],
-                'average_price': sale_data['average_price'],
-                'transaction_count': sale_data['transaction_count'],
-            }
+    hourly_rows = [
+        HourlySales(
+            branch_id=group['branch'],
+            sku_id=group['sku'],
+            date=group['date'],
+            hour=group['hour'],
+            total_quantity=group['total_quantity'],
+            total_amount=group['total_amount'],
+            transaction_count=group['transaction_count'],
         )
-        count += 1
+        for group in hourly_groups
+    ]
+    
+    HourlySales.objects.bulk_create(
+        hourly_rows,
+        update_conflicts=True,
+        unique_fields=['branch', 'sku', 'date', 'hour'],
+        update_fields=['total_quantity', 'total_amount', 'transaction_count', 'updated_at'],
+    )
+    _delete_stale_rollups(rollups[HourlySales], hourly_sales, ['branch', 'sku', 'date', 'hour'])
+    
+    return len(rows)
+
+def aggregate_sales_daily(date=None):
+    """
+    Aggregate sales data for a specific date.
+    Used by cron job for daily aggregation. DailySales is already kept
+    current by update_daily_sales on every sale, so this is a
+    reconciliation pass that fixes any drift by recomputing the day.
+    
+    Args:
+        date: Date to aggregate (defaults to yesterday)
+    
+    Returns:
+        int: Number of DailySales records created/updated
+    """
+    from datetime import timedelta
+    
+    if date is None:
+        # Default to yesterday
+        date = timezone.localdate() - timedelta(days=1)
+    
+    return aggregate_sales_range(date)
+
+@transaction.atomic
+def aggregate_sales_incremental():
+    """
+    Re-aggregate only the days that received sales since the last run.
+    
+    The high-water mark is the highest Sale id seen by the previous run
+    (stored in AggregationCheckpoint). Each affected day is recomputed from
+    scratch, so the result is always exact for that day; a sale that commits
+    after a higher id was already seen is picked up by the next run that
+    touches its day or by the nightly aggregate_sales_daily.
+    
+    Returns:
+        int: Number of DailySales records created/updated
+    """
+    from django.db.models import Max, Min
+    
+    checkpoint, _ = AggregationCheckpoint.objects.select_for_update().get_or_create(
+        name='sales_daily'
+    )
+    
+    new_sales = Sale.objects.filter(id__gt=checkpoint.last_sale_id).aggregate(
+        last_id=Max('id'),
+        first_at=Min('created_at'),
+        last_at=Max('created_at'),
+    )
+    if new_sales['last_id'] is None:
+        return 0
+    
+    count = aggregate_sales_range(
+        timezone.localdate(new_sales['first_at']),
+        timezone.localdate(new_sales['last_at'])
+    )
+    
+    checkpoint.last_sale_id = new_sales['last_id']
+    checkpoint.save(update_fields=['last_sale_id', 'updated_at'])
     
     return count
 
@@ -144,4 +412,75 @@ def get_sales_by_period(branch=None, start_date=None, end_date=None):
     if end_date:
         queryset = queryset.filter(created_at__date__lte=end_date)
     
-    return queryset.select_related('branch', 'sku', 'sku__category')
\ No newline at end of file
+    return queryset.select_related('branch', 'sku', 'sku__category')
+
+def get_hourly_sales(branch, start_date, end_date=None):
+    """
+    Sales per local hour of day for a branch over a date range.
+    
+    Reads the HourlySales rollup for days it covers. Today, and any earlier
+    day with no rollup rows yet, falls back to grouping raw Sale rows with a
+    portable ExtractHour over the day's half-open range.
+    
+    Args:
+        branch: Branch instance
+        start_date: First day (date)
+        end_date: Last day, inclusive (defaults to today)
+    
+    Returns:
+        list: Dicts with 'hour', 'total' and 'count', ordered by hour
+    """
+    from datetime import timedelta
+    from django.db.models import Q, Sum, Count
+    from django.db.models.functions import ExtractHour
+    
+    today = timezone.localdate()
+    end_date = min(end_date or today, today)
+    
+    rollup = HourlySales.objects.filter(
+        branch=branch,
+        date__gte=start_date,
+        date__lte=end_date
+    ).exclude(date=today)
+    
+    rolled_dates = set(rollup.values_list('date', flat=True).distinct())
+    gap_dates = [
+        start_date + timedelta(days=offset)
+        for offset in range((end_date - start_date).days + 1)
+        if start_date + timedelta(days=offset) not in rolled_dates
+    ]
+    
+    hours = {}
+    for row in rollup.values('hour').annotate(
+        total=Sum('total_amount'),
+        count=Sum('transaction_count')
+    ).order_by():
+        hours[row['hour']] = {'hour': row['hour'], 'total': row['total'], 'count': row['count']}
+    
+    # Merge consecutive gap days so a quiet branch costs one range, not one per day
+    gap_runs = []
+    for gap_date in gap_dates:
+        if gap_runs and gap_runs[-1][1] + timedelta(days=1) == gap_date:
+            gap_runs[-1][1] = gap_date
+        else:
+            gap_runs.append([gap_date, gap_date])
+    
+    if gap_runs:
+        gaps = Q()
+        for first, last in gap_runs:
+            start, end = local_day_range(first, last)
+            gaps |= Q(created_at__gte=start, created_at__lt=end)
+        
+        live = Sale.objects.filter(gaps, branch=branch).annotate(
+            hour=ExtractHour('created_at', tzinfo=timezone.get_default_timezone())
+        ).values('hour').annotate(
+            total=Sum('total_amount'),
+            count=Count('id')
+        ).order_by()
+        
+        for row in live:
+            entry = hours.setdefault(row['hour'], {'hour': row['hour'], 'total': 0, 'count': 0})
+            entry['total'] += row['total']
+            entry['count'] += row['count']
+    
+    return [hours[hour] for hour in sorted(hours)]
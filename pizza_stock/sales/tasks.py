@@ -1,4 +1,4 @@
-from .services import aggregate_sales_daily
+from .services import aggregate_sales_daily, aggregate_sales_incremental
 
 def aggregate_sales_daily_task():
     """
@@ -7,4 +7,13 @@ def aggregate_sales_daily_task():
     """
     count = aggregate_sales_daily()
     print(f"Aggregated sales for {count} SKUs")
-    return count
\ No newline at end of file
+    return count
+
+def aggregate_sales_incremental_task():
+    """
+    Cron job to refresh DailySales for days with new sales.
+    Run this every 15 minutes so dashboards stay current during the day.
+    """
+    count = aggregate_sales_incremental()
+    print(f"Incrementally aggregated sales for {count} SKUs")
+    return count
@@ -1,3 +1,129 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from inventory.models import Branch, Category, SKU
+from inventory.utils import apply_stock_transaction
+from .models import AggregationCheckpoint, DailySales, HourlySales, Sale
+from .services import aggregate_sales_incremental, aggregate_sales_range, get_hourly_sales, record_sale
+
+
+def backdated_sale(branch, sku, day, hour, quantity):
+    """Sale created directly (no live rollup), stamped at a local day and hour"""
+    sale = Sale.objects.create(
+        branch=branch, sku=sku, quantity=quantity,
+        unit_price=Decimal('300.00'), total_amount=Decimal('300.00') * quantity,
+    )
+    created_at = timezone.make_aware(datetime.combine(day, datetime.min.time()).replace(hour=hour))
+    Sale.objects.filter(id=sale.id).update(created_at=created_at)
+    return sale
+
+
+class DailySalesRollupTests(TestCase):
+    def setUp(self):
+        self.branch = Branch.objects.create(name='Main', code='MAIN', address='-', phone='-')
+        category = Category.objects.create(name='Classic')
+        self.sku = SKU.objects.create(name='Margherita', category=category, price=Decimal('300.00'))
+        apply_stock_transaction(self.branch, self.sku, 100, 'restock')
+
+    def _daily_row(self):
+        row = DailySales.objects.get(branch=self.branch, sku=self.sku, date=timezone.localdate())
+        return row.total_quantity, row.total_amount, row.average_price, row.transaction_count
+
+    def test_live_rollup_matches_reconciliation(self):
+        for qty, price in [(1, '300'), (2, '301'), (1, '300.50')]:
+            record_sale(self.branch, self.sku, qty, Decimal(price))
+        live = self._daily_row()
+
+        aggregate_sales_range(timezone.localdate())
+
+        self.assertEqual(live, self._daily_row())
+        self.assertEqual(live, (4, Decimal('1202.50'), Decimal('300.50'), 3))
+
+    def test_reconciliation_removes_rollups_without_sales(self):
+        other_branch = Branch.objects.create(name='North', code='NORTH', address='-', phone='-')
+        apply_stock_transaction(other_branch, self.sku, 100, 'restock')
+        sale = record_sale(self.branch, self.sku, 1, Decimal('300'))
+        other_sale = record_sale(other_branch, self.sku, 1, Decimal('300'))
+        today = timezone.localdate()
+        aggregate_sales_range(today)
+        Sale.objects.filter(id__in=[sale.id, other_sale.id]).delete()
+
+        aggregate_sales_range(today, branch=self.branch)
+
+        for model in (DailySales, HourlySales):
+            self.assertFalse(model.objects.filter(branch=self.branch).exists())
+            # Other branches are outside the pass
+            self.assertTrue(model.objects.filter(branch=other_branch).exists())
+
+
+class IncrementalAggregationTests(TestCase):
+    def setUp(self):
+        self.branch = Branch.objects.create(name='Main', code='MAIN', address='-', phone='-')
+        category = Category.objects.create(name='Classic')
+        self.sku = SKU.objects.create(name='Margherita', category=category, price=Decimal('300.00'))
+        self.yesterday = timezone.localdate() - timedelta(days=1)
+
+    def _sale(self, day, hour, quantity):
+        return backdated_sale(self.branch, self.sku, day, hour, quantity)
+
+    def _checkpoint(self):
+        return AggregationCheckpoint.objects.get(name='sales_daily').last_sale_id
+
+    def _daily(self, day):
+        row = DailySales.objects.get(branch=self.branch, sku=self.sku, date=day)
+        return row.total_quantity, row.transaction_count
+
+    def test_checkpoint_advances_and_late_sales_are_picked_up(self):
+        self._sale(self.yesterday, 10, 1)
+        sale = self._sale(timezone.localdate(), 9, 2)
+
+        self.assertEqual(aggregate_sales_incremental(), 2)
+        self.assertEqual(self._checkpoint(), sale.id)
+        self.assertEqual(self._daily(self.yesterday), (1, 1))
+        self.assertEqual(self._daily(timezone.localdate()), (2, 1))
+
+        # Nothing new: no rollups are touched and the checkpoint stays put
+        updated_at = DailySales.objects.get(date=self.yesterday).updated_at
+        self.assertEqual(aggregate_sales_incremental(), 0)
+        self.assertEqual(self._checkpoint(), sale.id)
+        self.assertEqual(DailySales.objects.get(date=self.yesterday).updated_at, updated_at)
+
+        # A late sale for a day that was already rolled recomputes that day
+        late = self._sale(self.yesterday, 20, 3)
+        self.assertEqual(aggregate_sales_incremental(), 1)
+        self.assertEqual(self._checkpoint(), late.id)
+        self.assertEqual(self._daily(self.yesterday), (4, 2))
+        self.assertEqual(self._daily(timezone.localdate()), (2, 1))
+        self.assertEqual(
+            sorted(HourlySales.objects.filter(date=self.yesterday).values_list('hour', 'total_quantity')),
+            [(10, 1), (20, 3)],
+        )
+
+
+class HourlySalesTests(TestCase):
+    def test_rollups_and_raw_gaps_are_combined(self):
+        branch = Branch.objects.create(name='Main', code='MAIN', address='-', phone='-')
+        category = Category.objects.create(name='Classic')
+        sku = SKU.objects.create(name='Margherita', category=category, price=Decimal('300.00'))
+        today = timezone.localdate()
+        backdated_sale(branch, sku, today - timedelta(days=10), 12, 2)
+        aggregate_sales_range(today - timedelta(days=10))
+        backdated_sale(branch, sku, today - timedelta(days=20), 12, 1)
+        backdated_sale(branch, sku, today - timedelta(days=3), 18, 1)
+        backdated_sale(branch, sku, today, 0, 1)
+
+        with CaptureQueriesContext(connection) as queries:
+            hours = get_hourly_sales(branch, today - timedelta(days=29))
 
-# Create your tests here.
+        self.assertEqual(
+            [(row['hour'], row['total'], row['count']) for row in hours],
+            [(0, Decimal('300.00'), 1), (12, Decimal('900.00'), 2), (18, Decimal('300.00'), 1)],
+        )
+        # The 29 days without rollups form two ranges around the one rolled day
+        raw_sql = queries.captured_queries[-1]['sql']
+        self.assertEqual(raw_sql.count('"created_at" >='), 2)
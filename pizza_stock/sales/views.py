@@ -1,7 +1,6 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.core.paginator import Paginator
 from django.db.models import Sum, Count
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
@@ -10,9 +9,12 @@ from datetime import timedelta
 from django.utils import timezone
 from .models import Sale, DailySales
 from .services import get_top_selling_items, get_sales_by_period, record_sale
-from inventory.models import SKU, Category
+from inventory.models import SKU
+from inventory.utils import resolve_skus
+from inventory.catalog import get_menu_categories
+from inventory.pagination import CursorPaginator
 from orders.models import Order, OrderItem
-from orders.services import create_order, mark_order_paid
+from orders.services import create_order, mark_order_paid, orders_with_items
 from decimal import Decimal
 
 @login_required
@@ -80,10 +82,9 @@ def sales_report(request):
         end_date=end_date
     )
     
-    # Pagination
-    paginator = Paginator(sales, 50)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination (the summary below already counts transactions)
+    paginator = CursorPaginator(sales, 50)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
     
     # Summary stats
     summary = sales.aggregate(
@@ -115,11 +116,8 @@ def pos_dashboard(request):
         messages.warning(request, 'Please select a branch.')
         return redirect('users:profile')
     
-    # Get all active SKUs grouped by category
-    categories = Category.objects.filter(
-        is_active=True,
-        skus__is_active=True
-    ).prefetch_related('skus').distinct()
+    # Get all active SKUs grouped by category from the cached catalog
+    categories = get_menu_categories()
     
     # Get today's sales stats
     today = timezone.now().date()
@@ -171,21 +169,24 @@ def pos_create_order(request):
         if not items_data:
             return JsonResponse({'success': False, 'error': 'No items in order'}, status=400)
         
+        # Resolve all SKUs in one query and report every unavailable id together
+        skus, missing = resolve_skus(item['sku_id'] for item in items_data)
+        if missing:
+            return JsonResponse({
+                'success': False,
+                'error': f'SKU {", ".join(str(sku_id) for sku_id in missing)} not found',
+                'missing_sku_ids': missing
+            }, status=400)
+        
         # Prepare items for order creation
-        order_items = []
-        for item in items_data:
-            try:
-                sku = SKU.objects.get(id=item['sku_id'], is_active=True)
-                order_items.append({
-                    'sku': sku,
-                    'quantity': int(item['quantity']),
-                    'notes': item.get('notes', '')
-                })
-            except SKU.DoesNotExist:
-                return JsonResponse({
-                    'success': False, 
-                    'error': f'SKU {item["sku_id"]} not found'
-                }, status=400)
+        order_items = [
+            {
+                'sku': skus[int(item['sku_id'])],
+                'quantity': int(item['quantity']),
+                'notes': item.get('notes', '')
+            }
+            for item in items_data
+        ]
         
         # Create the order
         with transaction.atomic():
@@ -277,7 +278,7 @@ def pos_quick_sale(request):
 @login_required
 def pos_receipt(request, order_id):
     """Display printable receipt for POS order"""
-    order = get_object_or_404(Order, id=order_id)
+    order = get_object_or_404(orders_with_items(), id=order_id)
     
     # Check access
     if not request.user.can_access_branch(order.branch):